@@ -18,37 +18,58 @@
 import argparse
 import asyncio
 import logging
+import os
+import socket
 
 from aiohttp import web
 import aiohttp_cors
 
+from remme.shared.histograms import HISTOGRAMS, PROMETHEUS_CONTENT_TYPE
 from remme.shared.logging_setup import setup_logging
+from remme.shared.loop_monitor import start_loop_monitor
+from remme.shared.message_stats import MESSAGE_STATS
 from remme.shared.messaging import Connection
+from remme.shared.supervisor import ProcessSupervisor, WorkerProcess
 from remme.settings.default import load_toml_with_defaults
 
 from ._base import JsonRpc
+from ._limits import RateLimiter
+from .event._handlers import REPLAYABLE_EVENT_TYPES
+from .event._journal import EventJournal
 
 
 logger = logging.getLogger(__name__)
 
 
-if __name__ == '__main__':
-    cfg_rpc = load_toml_with_defaults(
-        '/config/remme-rpc-api.toml'
-    )['remme']['rpc_api']
-
-    cfg_ws = load_toml_with_defaults(
-        '/config/remme-client-config.toml'
-    )['remme']['client']
-
-    setup_logging('remme-rpc-api')
-    parser = argparse.ArgumentParser()
-
-    parser.add_argument('--port', type=int, default=cfg_rpc["port"])
-    parser.add_argument('--bind', default=cfg_rpc["bind"])
-    arguments = parser.parse_args()
-
-    loop = asyncio.get_event_loop()
+async def metrics(request):
+    body = HISTOGRAMS.render_prometheus() + MESSAGE_STATS.render_prometheus()
+    rate_limiter = request.app.get('rate_limiter')
+    if rate_limiter is not None:
+        body += rate_limiter.render_prometheus()
+    return web.Response(
+        body=body.encode('utf-8'),
+        headers={'Content-Type': PROMETHEUS_CONTENT_TYPE},
+    )
+
+
+def run_server(cfg_rpc, cfg_ws, bind, port, worker_index=None):
+    """Run the server until it is interrupted.
+
+    :param worker_index: Optional. Index of the worker process, which shares
+        the port with other workers.
+    """
+    if worker_index is None:
+        loop = asyncio.get_event_loop()
+    else:
+        # The loop of the supervisor may be inherited on fork, its selector
+        # must not be shared by workers
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    start_loop_monitor(
+        loop, 'rpc_api.loop_lag',
+        interval=cfg_rpc['loop_lag_interval'],
+        slow_callback_threshold=cfg_rpc['slow_callback_threshold'],
+    )
 
     app = web.Application(loop=loop)
     cors_config = cfg_rpc["cors"]
@@ -66,16 +87,89 @@ if __name__ == '__main__':
         ) for ao in cors_config["allow_origin"]
     })
     zmq_url = f'tcp://{ cfg_ws["validator_ip"] }:{ cfg_ws["validator_port"] }'
-    rpc = JsonRpc(zmq_url=zmq_url, websocket_state_logger=cfg_rpc['websocket_state_logger'], loop=loop, max_workers=1)
+
+    cfg_journal = cfg_rpc['event_journal']
+    journal_path = cfg_journal['path']
+    if journal_path and worker_index is not None:
+        # Every worker receives events on its own
+        journal_path = os.path.join(journal_path, f'worker-{worker_index}')
+    event_journal = EventJournal(
+        journal_path,
+        event_types=REPLAYABLE_EVENT_TYPES,
+        segment_max_bytes=cfg_journal['segment_max_bytes'],
+        max_segments=cfg_journal['max_segments'],
+    ) if journal_path else None
+
+    cfg_rate_limit = cfg_rpc['rate_limit']
+    rate_limiter = RateLimiter(
+        cfg_rate_limit['classes'],
+        api_key_header=cfg_rate_limit['api_key_header'],
+        api_keys=cfg_rate_limit['api_keys'],
+        max_clients=cfg_rate_limit['max_clients'],
+    )
+    app['rate_limiter'] = rate_limiter
+
+    rpc = JsonRpc(zmq_url=zmq_url, websocket_state_logger=cfg_rpc['websocket_state_logger'],
+                  event_hashes_capacity=cfg_rpc['event_hashes_capacity'],
+                  event_hashes_ttl=cfg_rpc['event_hashes_ttl'],
+                  event_journal=event_journal,
+                  outbound_queue_size=cfg_rpc['outbound_queue_size'],
+                  outbound_overflow_policy=cfg_rpc['outbound_overflow_policy'],
+                  response_cache_size=cfg_rpc['response_cache_size'],
+                  rate_limiter=rate_limiter,
+                  loop=loop, max_workers=1)
     rpc.load_from_modules(cfg_rpc['available_modules'])
     cors.add(app.router.add_route('GET', '/', rpc))
     cors.add(app.router.add_route('POST', '/', rpc))
+    app.router.add_route('GET', '/metrics', metrics)
 
     logger.info('All server parts loaded')
 
     async def start_app():
         stream = Connection.get_single_connection(zmq_url)
         await stream.open()
+        await rpc.start_events()
+        if cfg_rpc['warm_up']:
+            asyncio.ensure_future(rpc.warm_up())
         return app
 
-    web.run_app(start_app(), host=arguments.bind, port=arguments.port)
+    web.run_app(start_app(), host=bind, port=port, reuse_port=worker_index is not None)
+
+
+if __name__ == '__main__':
+    cfg_rpc = load_toml_with_defaults(
+        '/config/remme-rpc-api.toml'
+    )['remme']['rpc_api']
+
+    cfg_ws = load_toml_with_defaults(
+        '/config/remme-client-config.toml'
+    )['remme']['client']
+
+    setup_logging('remme-rpc-api')
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--port', type=int, default=cfg_rpc["port"])
+    parser.add_argument('--bind', default=cfg_rpc["bind"])
+    parser.add_argument('-w', '--workers', type=int, default=cfg_rpc['workers'],
+                        help='number of server processes sharing the port')
+    arguments = parser.parse_args()
+
+    if arguments.workers < 1:
+        parser.error('number of workers should be positive')
+
+    if arguments.workers == 1:
+        run_server(cfg_rpc, cfg_ws, arguments.bind, arguments.port)
+    else:
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            parser.error('multiple workers require SO_REUSEPORT support')
+
+        # Workers are forked before any event loop or connection is created,
+        # so every worker has its own ones
+        ProcessSupervisor([
+            WorkerProcess(
+                f'remme-rpc-api-{index}',
+                run_server,
+                (cfg_rpc, cfg_ws, arguments.bind, arguments.port, index),
+            )
+            for index in range(arguments.workers)
+        ]).run()
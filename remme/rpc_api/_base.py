@@ -16,6 +16,7 @@ import logging
 import weakref
 import asyncio
 import threading
+import time
 from contextlib import contextmanager, suppress
 
 import aiohttp
@@ -37,11 +38,14 @@ from aiohttp_json_rpc.exceptions import (
     RpcError,
 )
 
-from remme.shared.router import Router
-from remme.shared.exceptions import RemmeRpcError
-from remme.shared.messaging import Connection
+from remme.shared.exceptions import RateLimitExceeded, RemmeRpcError
 from remme.shared.metrics import METRICS_SENDER
-from .utils import load_methods
+from remme.shared.tracing import TRACER
+from ._cache import ResponseCache, etag_matches, get_cache_key
+from .event._dedup import RecentHashes
+from .event._hub import EventHub
+from ._outbound import OutboundQueue, DROP_OLDEST
+from .utils import get_module_methods, load_lazily
 
 
 LOGGER = logging.getLogger(__name__)
@@ -49,12 +53,25 @@ LOGGER = logging.getLogger(__name__)
 
 class JsonRpc(JsonRpc):
 
-    def __init__(self, zmq_url, websocket_state_logger=False, *args, **kwargs):
+    def __init__(self, zmq_url, websocket_state_logger=False,
+                 event_hashes_capacity=10000, event_hashes_ttl=3600,
+                 event_journal=None, outbound_queue_size=100,
+                 outbound_overflow_policy=DROP_OLDEST, response_cache_size=1000,
+                 rate_limiter=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._zmq_url = zmq_url
         self._accepting = True
         self._evthashes = {}
+        self._evthashes_capacity = event_hashes_capacity
+        self._evthashes_ttl = event_hashes_ttl
+        self._event_hub = EventHub(self, zmq_url, journal=event_journal)
+        self._outbound_queue_size = outbound_queue_size
+        self._outbound_overflow_policy = outbound_overflow_policy
+        self._response_cache = ResponseCache(response_cache_size)
+        self._rate_limiter = rate_limiter
         self._subsevt = {}
+        # Subscriptions of websockets are changed one at a time
+        self._event_lock = asyncio.Lock()
 
         if websocket_state_logger:
             self._print_storage_state_task = weakref.ref(
@@ -80,32 +97,63 @@ class JsonRpc(JsonRpc):
             return (await self._handle_rpc_msg(request))
 
     def load_from_modules(self, modules):
-        self.add_methods(
-            *(('', method) for method in load_methods('remme.rpc_api',
-                                                      modules)))
+        """Add methods of the modules, the modules are imported on the first
+        call of their methods or by `warm_up`.
+        """
+        self.add_methods(*(
+            ('', load_lazily('remme.rpc_api', module, name))
+            for module, name in get_module_methods(modules)
+        ))
+
+    async def warm_up(self):
+        """Import modules of the methods in the background, so the first
+        calls don't wait for them.
+        """
+        started = time.perf_counter()
+        try:
+            await self.loop.run_in_executor(None, self._load_methods)
+        except Exception:
+            LOGGER.exception('Failed to load methods')
+            return
+        LOGGER.info(f'Methods loaded in {time.perf_counter() - started:.3f} s')
+
+    def _load_methods(self):
+        for method in self.methods.values():
+            load = getattr(method.method, 'load', None)
+            if load is not None:
+                load()
 
     @property
     def rpc_methods(self):
         if not hasattr(self, '_rpc_methods'):
-            self._rpc_methods = {
-                method.__name__ for method in load_methods('remme.rpc_api')
-            }
+            self._rpc_methods = {name for _, name in get_module_methods()}
         return self._rpc_methods
 
+    async def start_events(self):
+        """Start receiving events shared by websockets, e.g. to journal them.
+        """
+        await self._event_hub.start()
+
+    def create_event_hashes(self):
+        """Create storage of hashes of notifications sent to a websocket.
+        """
+        return RecentHashes(self._evthashes_capacity, self._evthashes_ttl)
+
     @contextmanager
-    def register(self, ws, stream):
+    def register(self, ws):
         try:
-            ws.stream = stream
-            ws.stream.router = Router(stream)
             yield
         finally:
-            stream.close()
-            with suppress(KeyError):
-                del ws.stream
+            self._event_hub.remove(ws)
+            event_subscription = getattr(ws, 'event_subscription', None)
+            if event_subscription is not None:
+                asyncio.ensure_future(event_subscription.release(), loop=self.loop)
             with suppress(KeyError):
                 del self._subsevt[ws]
             with suppress(KeyError):
                 del self._evthashes[ws]
+            with suppress(AttributeError):
+                ws.outbound.close()
 
     async def handle_websocket_request(self, http_request):
         if not self._accepting:
@@ -113,22 +161,18 @@ class JsonRpc(JsonRpc):
 
         http_request.pending = {}
 
-        LOGGER.debug('WS ready')
-
-        stream = Connection(self._zmq_url, loop=self.loop)
-        await stream.open()
-
-        LOGGER.debug('ZMQ ready')
-
         # prepare and register websocket
         ws = aiohttp.web_ws.WebSocketResponse()
         await ws.prepare(http_request)
         LOGGER.debug('WS ready')
 
         http_request.ws = ws
+        ws.outbound = OutboundQueue(
+            ws, self._outbound_queue_size, self._outbound_overflow_policy,
+        )
         self.clients.append(http_request)
 
-        with self.register(ws, stream):
+        with self.register(ws):
             while not ws.closed:
                 self.logger.debug('waiting for messages')
                 raw_msg = await ws.receive()
@@ -175,41 +219,77 @@ class JsonRpc(JsonRpc):
                                            message=err_msg)
                 ))
 
+            if self._rate_limiter is not None:
+                try:
+                    self._rate_limiter.acquire(
+                        self._rate_limiter.get_client_key(http_request), method)
+                except RateLimitExceeded as error:
+                    return await self._send_str(http_request, encode_error(
+                        error, id=msg.data.get('id', None)))
+
             measurement = METRICS_SENDER.get_time_measurement(f'rpc_api.{method}')
 
+            # Module of the method is imported on the first call, unless it
+            # is warmed up
+            load = getattr(http_request.methods[method].method, 'load', None)
+            if load is not None:
+                load()
+
             # call method
             raw_response = getattr(
                 http_request.methods[method].method,
                 'raw_response',
                 False,
             )
+            immutable = getattr(
+                http_request.methods[method].method,
+                'immutable',
+                False,
+            )
 
-            try:
-                result = await http_request.methods[method](
-                    http_request=http_request,
-                    rpc=self,
-                    msg=msg,
-                )
-
-                if not raw_response:
-                    result = encode_result(msg.data['id'], result)
-
-            except (RpcGenericServerDefinedError,
-                    RpcInvalidRequestError,
-                    RpcInvalidParamsError,
-                    RemmeRpcError) as error:
-
-                result = encode_error(error, id=msg.data.get('id', None))
-
-            except Exception as error:
-                logging.error(error, exc_info=True)
-
-                result = encode_error(
-                    RpcInternalError(msg_id=msg.data.get('id', None))
-                )
-
-            measurement.done()
-            return await self._send_str(http_request, result)
+            with TRACER.trace(f'rpc_api.{method}') as span:
+                cached = None
+                if immutable:
+                    cache_key = get_cache_key(method, msg.data['params'])
+                    cached = self._response_cache.get(cache_key)
+                    span.set_attribute('cache', 'hit' if cached else 'miss')
+                    if cached is not None:
+                        measurement.done()
+                        return await self._send_cached(http_request, msg.data['id'], cached)
+
+                try:
+                    result = await http_request.methods[method](
+                        http_request=http_request,
+                        rpc=self,
+                        msg=msg,
+                    )
+
+                    if immutable:
+                        cached = self._response_cache.put(cache_key, result)
+                    elif not raw_response:
+                        result = encode_result(msg.data['id'], result)
+
+                except (RpcGenericServerDefinedError,
+                        RpcInvalidRequestError,
+                        RpcInvalidParamsError,
+                        RemmeRpcError) as error:
+
+                    span.set_attribute('error', type(error).__name__)
+                    result = encode_error(error, id=msg.data.get('id', None))
+
+                except Exception as error:
+                    logging.error(error, exc_info=True)
+
+                    span.set_attribute('error', type(error).__name__)
+                    result = encode_error(
+                        RpcInternalError(msg_id=msg.data.get('id', None))
+                    )
+
+                measurement.done()
+                with TRACER.span('rpc_api.send_response'):
+                    if cached is not None:
+                        return await self._send_cached(http_request, msg.data['id'], cached)
+                    return await self._send_str(http_request, result)
 
         # handle result
         elif msg.type == JsonRpcMsgTyp.RESULT:
@@ -232,7 +312,28 @@ class JsonRpc(JsonRpc):
             return await self._ws_send_str(request, string)
         return self._http_send_str(request, string)
 
-    async def _ws_send_str(self, client, string):
+    async def _send_cached(self, request, msg_id, cached):
+        """Send the cached result, or "304 Not Modified" if the HTTP client
+        has the result with the same ETag.
+        """
+        if request.protocol._upgrade:
+            return await self._ws_send_str(request, cached.encode(msg_id))
+
+        if etag_matches(request.headers.get('If-None-Match'), cached.etag):
+            return web.Response(status=304, headers={'ETag': cached.etag})
+
+        response = self._http_send_str(request, cached.encode(msg_id))
+        response.headers['ETag'] = cached.etag
+        return response
+
+    async def _ws_send_str(self, client, string, droppable=False, conflation_key=None):
+        """Send the string to the websocket through its outbound queue.
+
+        :param droppable: whether the string may be dropped if the client
+            is too slow to receive it, e.g. a notification.
+        :param conflation_key: Optional. Key of the entity the string is
+            about, see `OutboundQueue`.
+        """
         if client.ws._writer.transport.is_closing():
             try:
                 self.clients.remove(client)
@@ -240,7 +341,12 @@ class JsonRpc(JsonRpc):
                 pass
             await client.ws.close()
 
-        await client.ws.send_str(string)
+        outbound = getattr(client.ws, 'outbound', None)
+        if outbound is None:
+            await client.ws.send_str(string)
+            return
+
+        outbound.put(string, droppable=droppable, conflation_key=conflation_key)
 
     async def _print_storage_state(self):
         while self._print_storage_state_running:
@@ -0,0 +1,109 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+import hashlib
+import json
+from collections import OrderedDict
+
+from aiohttp_json_rpc.protocol import JSONRPC
+
+
+def encode_serialized_result(msg_id, result):
+    """The same as `encode_result`, for the already serialized result.
+    """
+    return f'{{"jsonrpc": "{JSONRPC}", "id": {json.dumps(msg_id)}, "result": {result}}}'
+
+
+def get_cache_key(method, params):
+    """Key of the result of the method called with the params, the same for
+    params differing only in the order of keys.
+    """
+    return method, json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+
+def etag_matches(if_none_match, etag):
+    """Check if the "If-None-Match" header value matches the ETag.
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    # Weak comparison is used for "If-None-Match"
+    tags = (tag.strip() for tag in if_none_match.split(','))
+    return etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+
+class CachedResult:
+    """Serialized result of a method with its strong ETag.
+    """
+
+    __slots__ = ('result', 'etag')
+
+    def __init__(self, result):
+        """
+        :param result: result of the method, not serialized.
+        """
+        self.result = json.dumps(result)
+        self.etag = f'"{hashlib.sha256(self.result.encode("utf-8")).hexdigest()}"'
+
+    def encode(self, msg_id):
+        return encode_serialized_result(msg_id, self.result)
+
+
+class ResponseCache:
+    """Least recently used results of methods with immutable results, e.g.
+    blocks fetched by id, so they are served without requests to the
+    validator and without serializing them again.
+    """
+
+    def __init__(self, capacity):
+        """
+        :param capacity: number of results to keep, 0 disables caching.
+        """
+        self._capacity = capacity
+        self._results = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def get(self, key):
+        cached = self._results.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+
+        self._results.move_to_end(key)
+        self.hits += 1
+        return cached
+
+    def put(self, key, result):
+        """Cache the result.
+
+        :return: `CachedResult` of the result.
+        """
+        cached = CachedResult(result)
+        if self._capacity <= 0:
+            return cached
+
+        self._results[key] = cached
+        self._results.move_to_end(key)
+        while len(self._results) > self._capacity:
+            self._results.popitem(last=False)
+        return cached
@@ -0,0 +1,144 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Rate limiting of requests by token buckets.
+
+Every client has a token bucket per class of methods. A bucket holds up to
+`burst` tokens and is refilled with `rate` tokens per second, a request
+takes a token from the bucket of its method class or is rejected at once if
+the bucket is empty. So cheap methods are not limited by expensive ones,
+e.g. listing of blocks with a huge limit.
+
+Clients are identified by a configured API key or by the IP address.
+"""
+
+import time
+from collections import OrderedDict, defaultdict
+
+from remme.shared.exceptions import RateLimitExceeded
+
+
+DEFAULT_CLASS = 'default'
+
+PROMETHEUS_METRIC = 'remme_rpc_rate_limited_total'
+
+
+class TokenBucket:
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst, now):
+        """
+        :param rate: number of tokens added per second.
+        :param burst: maximum number of tokens.
+        :param now: monotonic time of the bucket creation.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def consume(self, now):
+        """Take a token.
+
+        :return: 0 if the token is taken, otherwise number of seconds until
+            there is a token.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token buckets of clients by method class.
+    """
+
+    def __init__(self, classes, api_key_header=None, api_keys=(), max_clients=10000):
+        """
+        :param classes: dict of class name to dict with `rate`, `burst` and
+            `methods` of the class. Methods not listed in any class belong to
+            the "default" class. Zero rate disables limiting of the class.
+        :param api_key_header: Optional. Header with the API key.
+        :param api_keys: API keys to identify clients by instead of the IP
+            address, other keys are ignored, so they can't be changed to
+            get new buckets.
+        :param max_clients: number of buckets to keep, buckets of the least
+            recently seen clients are forgotten.
+        """
+        self._classes = {
+            name: (cfg['rate'], max(cfg['burst'], 1))
+            for name, cfg in classes.items()
+        }
+        self._method_classes = {
+            method: name
+            for name, cfg in classes.items()
+            for method in cfg.get('methods', ())
+        }
+        self._api_key_header = api_key_header
+        self._api_keys = frozenset(api_keys)
+        self._max_clients = max_clients
+        self._buckets = OrderedDict()
+
+        # Method to number of rejected requests
+        self.rejected = defaultdict(int)
+
+    def get_client_key(self, request):
+        """Get API key or IP address of the client of the HTTP request.
+        """
+        if self._api_key_header:
+            api_key = request.headers.get(self._api_key_header)
+            if api_key in self._api_keys:
+                return f'key:{api_key}'
+        return request.remote
+
+    def acquire(self, client_key, method):
+        """Take a token of the method class from the bucket of the client.
+
+        :raises RateLimitExceeded: if the bucket is empty.
+        """
+        name = self._method_classes.get(method, DEFAULT_CLASS)
+        rate, burst = self._classes.get(name, (0, 0))
+        if rate <= 0:
+            return
+
+        now = time.monotonic()
+        key = (client_key, name)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+            if len(self._buckets) > self._max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        retry_after = bucket.consume(now)
+        if retry_after:
+            self.rejected[method] += 1
+            raise RateLimitExceeded(f'Too many requests, retry in {retry_after:.3f} s')
+
+    def render_prometheus(self):
+        """Get numbers of rejected requests in Prometheus text format.
+        """
+        lines = [
+            f'# HELP {PROMETHEUS_METRIC} Requests rejected by the rate limit.',
+            f'# TYPE {PROMETHEUS_METRIC} counter',
+        ]
+        for method, count in sorted(self.rejected.items()):
+            lines.append(f'{PROMETHEUS_METRIC}{{method="{method}"}} {count}')
+        return '\n'.join(lines) + '\n'
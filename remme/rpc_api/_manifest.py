@@ -0,0 +1,68 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+# Methods of the RPC API modules, the same as `__all__` of the modules, so
+# names of methods are known without importing the modules
+METHODS = {
+    'account': (
+        'get_balance',
+        'get_public_keys_list',
+    ),
+    'atomic_swap': (
+        'get_atomic_swap_info',
+        'get_atomic_swap_public_key',
+    ),
+    'block_info': (
+        'get_block_number',
+        'get_blocks',
+        'list_blocks',
+        'fetch_block',
+    ),
+    'debug': (
+        'get_validator_requests_stats',
+        'get_event_loop_stats',
+    ),
+    'event': (
+        'decode_entities_changed',
+        'event_to_dict',
+        'subscribe',
+        'unsubscribe',
+    ),
+    'network': (
+        'get_node_info',
+        'fetch_peers',
+    ),
+    'personal': (
+        'set_node_key',
+        'export_node_key',
+    ),
+    'pkc': (
+        'get_node_config',
+        'get_public_key_info',
+    ),
+    'state': (
+        'list_state',
+        'fetch_state',
+    ),
+    'transaction': (
+        'send_raw_transaction',
+        'get_batch_status',
+        'list_receipts',
+        'list_batches',
+        'list_transactions',
+        'fetch_batch',
+        'fetch_transaction',
+    ),
+}
@@ -0,0 +1,135 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+import asyncio
+import logging
+from collections import deque
+
+from aiohttp import WSCloseCode
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Policies applied to a full queue
+DROP_OLDEST = 'drop_oldest'
+DISCONNECT = 'disconnect'
+CONFLATE = 'conflate'
+
+OVERFLOW_POLICIES = (DROP_OLDEST, DISCONNECT, CONFLATE)
+
+
+class _Entry:
+
+    __slots__ = ('frame', 'droppable', 'conflation_key')
+
+    def __init__(self, frame, droppable, conflation_key):
+        self.frame = frame
+        self.droppable = droppable
+        self.conflation_key = conflation_key
+
+
+class OutboundQueue:
+    """Bounded queue of frames to send to a websocket by a writer task.
+
+    Frames are put without waiting for slow clients. The writer sends all
+    queued frames one after another and waits for the transport only when
+    its buffer is over the limit, so small frames are coalesced into socket
+    writes. When the queue is full:
+
+    * `drop_oldest` drops the oldest droppable frame (a notification);
+    * `disconnect` closes the websocket;
+    * `conflate` replaces a queued frame of the same entity, e.g. the
+      previous state of the atomic swap, with the new frame, or drops the
+      oldest droppable frame if there is no such frame.
+
+    Responses to requests are never dropped, the client waits for them.
+    """
+
+    def __init__(self, ws, max_size=100, policy=DROP_OLDEST):
+        """
+        :param ws: websocket to send frames to.
+        :param max_size: number of frames to queue before the policy applies.
+        :param policy: one of `OVERFLOW_POLICIES`.
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy "{policy}", '
+                             f'expected one of: {", ".join(OVERFLOW_POLICIES)}')
+
+        self._ws = ws
+        self._max_size = max_size
+        self._policy = policy
+        self._entries = deque()
+        self._ready = asyncio.Event()
+        self._writer_task = asyncio.ensure_future(self._write())
+        self._closed = False
+
+        self.dropped = 0
+        self.conflated = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def put(self, frame, droppable=False, conflation_key=None):
+        """Queue the frame to send.
+
+        :param frame: string to send.
+        :param droppable: whether the frame may be dropped on overflow.
+        :param conflation_key: Optional. Key of the entity the frame is
+            about, for the `conflate` policy.
+        """
+        if self._closed:
+            return
+
+        if len(self._entries) >= self._max_size and droppable:
+            if self._policy == DISCONNECT:
+                LOGGER.warning(f'Disconnect slow websocket {self._ws}')
+                self.close()
+                asyncio.ensure_future(self._ws.close(
+                    code=WSCloseCode.TRY_AGAIN_LATER, message=b'Slow consumer',
+                ))
+                return
+
+            if self._policy == CONFLATE and conflation_key is not None:
+                for entry in self._entries:
+                    if entry.conflation_key == conflation_key:
+                        entry.frame = frame
+                        self.conflated += 1
+                        return
+
+            for entry in self._entries:
+                if entry.droppable:
+                    self._entries.remove(entry)
+                    self.dropped += 1
+                    break
+
+        self._entries.append(_Entry(frame, droppable, conflation_key))
+        self._ready.set()
+
+    def close(self):
+        self._closed = True
+        self._entries.clear()
+        self._writer_task.cancel()
+
+    async def _write(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+
+            while self._entries:
+                entry = self._entries.popleft()
+                try:
+                    await self._ws.send_str(entry.frame)
+                except Exception as e:
+                    LOGGER.debug(f'Failed to send to websocket {self._ws}: {e}')
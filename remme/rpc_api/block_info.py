@@ -18,7 +18,7 @@ from remme.clients.block_info import BlockInfoClient
 from remme.shared.exceptions import KeyNotFound
 from remme.shared.forms import ProtoForm, IdentifierForm
 
-from .utils import validate_params
+from .utils import immutable_result, validate_params
 
 
 __all__ = (
@@ -64,6 +64,7 @@ async def list_blocks(request):
     return await client.list_blocks(ids, start, limit, head, reverse)
 
 
+@immutable_result
 @validate_params(IdentifierForm)
 async def fetch_block(request):
     id = request.params['id']
@@ -0,0 +1,42 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+import logging
+
+from remme.shared.forms import ProtoForm
+from remme.shared.loop_monitor import get_loop_monitor
+from remme.shared.message_stats import MESSAGE_STATS
+
+from .utils import validate_params
+
+
+__all__ = (
+    'get_validator_requests_stats',
+    'get_event_loop_stats',
+)
+
+logger = logging.getLogger(__name__)
+
+
+@validate_params(ProtoForm)
+async def get_validator_requests_stats(request):
+    return MESSAGE_STATS.get_stats()
+
+
+@validate_params(ProtoForm)
+async def get_event_loop_stats(request):
+    monitor = get_loop_monitor()
+    if monitor is None:
+        return {}
+    return monitor.get_stats()
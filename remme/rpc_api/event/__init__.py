@@ -13,9 +13,12 @@
 # limitations under the License.
 # ------------------------------------------------------------------------
 
+from ._decoder import decode_entities_changed, event_to_dict
 from ._event import subscribe, unsubscribe
 
 __all__ = (
+    'decode_entities_changed',
+    'event_to_dict',
     'subscribe',
     'unsubscribe',
 )
@@ -0,0 +1,69 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+import json
+import logging
+
+from remme.shared.event_data import decode_entities
+from remme.shared.utils import from_proto_to_dict
+
+LOGGER = logging.getLogger(__name__)
+
+ENTITIES_CHANGED_ATTRIBUTE = 'entities_changed'
+
+
+def event_to_dict(event):
+    """Convert `Event` protobuf to dict keeping its data as raw bytes.
+    """
+    return {
+        'event_type': event.event_type,
+        'attributes': [
+            {'key': attribute.key, 'value': attribute.value}
+            for attribute in event.attributes
+        ],
+        'data': event.data,
+    }
+
+
+def decode_entities_changed(evt):
+    """Get entities changed by a transaction from the event dict.
+
+    The binary event data is used when it is present, otherwise entities are
+    loaded from the JSON `entities_changed` attribute.
+
+    :param evt: event dict from `event_to_dict`.
+    :return: list of dicts with "address", "type" and protobuf fields, or
+        `None` if the event has no entities.
+    """
+    data = evt.get('data')
+    if data:
+        try:
+            entities = decode_entities(data)
+        except ValueError as e:
+            LOGGER.warning(f'Failed to decode event data: {e}')
+            return None
+
+        return [
+            {
+                'address': address,
+                'type': pb.DESCRIPTOR.name,
+                **from_proto_to_dict(pb),
+            }
+            for address, pb in entities
+        ]
+
+    for attribute in evt.get('attributes', ()):
+        if attribute['key'] == ENTITIES_CHANGED_ATTRIBUTE:
+            return json.loads(attribute['value'])
@@ -0,0 +1,65 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+import time
+from collections import OrderedDict
+
+
+class RecentHashes:
+    """Bounded set of hashes of notifications sent to a websocket.
+
+    A hash is remembered for `ttl` seconds and at most `capacity` latest hashes
+    are kept, so memory stays flat for connections open for days. Duplicates
+    of a notification come from re-subscriptions and forks, which happen soon
+    after the original one, so forgetting old hashes doesn't lead to resending.
+    """
+
+    __slots__ = ('_capacity', '_ttl', '_hashes')
+
+    def __init__(self, capacity=10000, ttl=3600):
+        """
+        :param capacity: maximum number of hashes to keep.
+        :param ttl: number of seconds to keep a hash for.
+        """
+        self._capacity = capacity
+        self._ttl = ttl
+        # Hashes in the order they were added, with times they expire at
+        self._hashes = OrderedDict()
+
+    def add(self, value):
+        now = time.monotonic()
+        self._hashes.pop(value, None)
+        self._hashes[value] = now + self._ttl
+        self._prune(now)
+
+    def __contains__(self, value):
+        expires_at = self._hashes.get(value)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def __len__(self):
+        self._prune(time.monotonic())
+        return len(self._hashes)
+
+    def __repr__(self):
+        return f'<RecentHashes {len(self)}/{self._capacity}>'
+
+    def _prune(self, now):
+        # Hashes are added with the same ttl, so the oldest expires first
+        hashes = self._hashes
+        while hashes:
+            expires_at = next(iter(hashes.values()))
+            if expires_at > now and len(hashes) <= self._capacity:
+                break
+            hashes.popitem(last=False)
@@ -15,25 +15,22 @@
 
 import logging
 import asyncio
+from functools import partial
 
-from aiohttp_json_rpc.protocol import encode_result
 from aiohttp_json_rpc.exceptions import RpcInvalidParamsError
 
 from sawtooth_sdk.protobuf.validator_pb2 import Message
-from sawtooth_sdk.protobuf.client_event_pb2 import (
-    ClientEventsSubscribeResponse,
-)
 from sawtooth_sdk.protobuf.events_pb2 import EventList
 
-from remme.settings import ZMQ_CONNECTION_TIMEOUT
-from remme.shared.utils import message_to_dict
 from remme.shared.exceptions import ClientException
 
+from ._decoder import event_to_dict
 from ._handlers import EVENT_HANDLERS, SAWTOOTH_TO_REMME_EVENT
+from ._hub import encode_notification, send_notification
+from ._subscription import ValidatorSubscription
 
 
 LOGGER = logging.getLogger(__name__)
-event_lock = asyncio.Lock()
 
 
 async def subscribe(request):
@@ -56,66 +53,33 @@ async def subscribe(request):
         raise ClientException(
             message=f'Event "{event_type}" not defined')
 
-    async with event_lock:
+    async with request.rpc._event_lock:
         subsevt = request.rpc._subsevt.setdefault(ws, {})
         if event_type in subsevt:
             raise ClientException(
                 message=f'Already subscribed to event "{event_type}"')
 
-        router = ws.stream.router
-
-        event_types = set(subsevt.keys())
-        event_types.add(event_type)
-
-        LOGGER.debug(f'Events to re-subsribe: {event_types}')
-
         validated_data = evt_tr.validate(msg_id, request.params)
-        from_block = validated_data.get('from_block')
-        if not from_block:
-            from_block = (await router.list_blocks(limit=1))['head']
-
-        req_msg = evt_tr.prepare_subscribe_message(event_types, from_block)
-
-        LOGGER.debug(f'Request message: {req_msg}')
-
-        msg = await ws.stream.send(
-            message_type=Message.CLIENT_EVENTS_SUBSCRIBE_REQUEST,
-            message_content=req_msg.SerializeToString(),
-            timeout=ZMQ_CONNECTION_TIMEOUT)
-
-        LOGGER.debug(f'Message type: {msg.message_type}')
-
-        # Validate the response type
-        if msg.message_type != Message.CLIENT_EVENTS_SUBSCRIBE_RESPONSE:
-            raise ClientException(
-                message=f'Unexpected message type {msg.message_type}')
-
-        # Parse the response
-        response = ClientEventsSubscribeResponse()
-        response.ParseFromString(msg.content)
-
-        # Validate the response status
-        if response.status != ClientEventsSubscribeResponse.OK:
-            if response.status == ClientEventsSubscribeResponse.UNKNOWN_BLOCK:
-                raise ClientException(
-                    message=f'Unknown block "{from_block}"')
-            raise ClientException(
-                message='Subscription failed: Couldn\'t '
-                        'send multipart')
 
         if ws not in request.rpc._evthashes:
-            request.rpc._evthashes[ws] = set()
+            request.rpc._evthashes[ws] = request.rpc.create_event_hashes()
 
-        LOGGER.debug(f'Create cosumer task for {ws}')
-        request.rpc.loop.create_task(_consumer(request))
-
-        if event_type == 'batch':
-            LOGGER.debug(f'Create producer task for {ws}')
-            request.rpc.loop.create_task(_producer(request))
+        # Catch-up from a block not in the events journal needs own
+        # validator subscription
+        from_block = validated_data.get('from_block')
+        shared = evt_tr.SHARED and (
+            not from_block or request.rpc._event_hub.can_replay(from_block)
+        )
+        if shared:
+            await request.rpc._event_hub.subscribe(
+                request, event_type, msg_id, validated_data)
+        else:
+            await _subscribe_stream(request, event_type, validated_data)
 
         subsevt[event_type] = {
             'msg_id': msg_id,
             'validated_data': validated_data,
+            'shared': shared,
         }
 
     return 'SUBSCRIBED'
@@ -133,43 +97,79 @@ async def unsubscribe(request):
     except KeyError as e:
         raise RpcInvalidParamsError(message='Missed event_type')
 
-    async with event_lock:
+    async with request.rpc._event_lock:
         subsevt = request.rpc._subsevt.get(ws, {})
         try:
-            del subsevt[event_type]
+            subscription = subsevt.pop(event_type)
         except KeyError:
             raise ClientException(
                 message='Subscription not found')
 
+        if subscription['shared']:
+            request.rpc._event_hub.unsubscribe(ws, event_type)
+        else:
+            try:
+                await ws.event_subscription.update(_get_stream_keys(subsevt))
+            except Exception as e:
+                LOGGER.warning(f'Failed to unsubscribe {ws} from "{event_type}": {e}')
+
     return 'UNSUBSCRIBED'
 
 
-async def _producer(request):
+def _get_stream_keys(subsevt):
+    """Subscription keys of events received by own validator connection.
+    """
+    return {
+        name: {EVENT_HANDLERS[name].get_subscription_key(data['validated_data'])}
+        for name, data in subsevt.items()
+        if not data['shared']
+    }
+
+
+async def _subscribe_stream(request, event_type, validated_data):
+    """Subscribe own validator connection of the websocket to the event.
+
+    The connection is opened with the first event and released with the
+    last one, see `ValidatorSubscription`.
+    """
     ws = request.ws
-    stream = ws.stream
+    if getattr(ws, 'event_subscription', None) is None:
+        ws.event_subscription = ValidatorSubscription(
+            request.rpc._zmq_url, partial(_process_msg, request), loop=request.rpc.loop,
+        )
 
-    while not ws.closed:
-        LOGGER.debug('Producer: Start producing a new messages...')
-        for evt_name, data in request.rpc._subsevt.get(ws, {}).items():
-            evt_tr = EVENT_HANDLERS[evt_name]
-            await evt_tr.produce_custom_msg(stream, data['validated_data'])
-        LOGGER.debug('Producer: Waiting...')
-        await asyncio.sleep(1)
+    subscription_keys = _get_stream_keys(request.rpc._subsevt[ws])
+    subscription_keys[event_type] = {
+        EVENT_HANDLERS[event_type].get_subscription_key(validated_data),
+    }
 
+    LOGGER.debug(f'Events to subscribe: {subscription_keys}')
 
-async def _consumer(request):
+    await ws.event_subscription.update(
+        subscription_keys, validated_data.get('from_block'))
+
+    if event_type == 'batch' and getattr(ws, 'producer_task', None) is None:
+        LOGGER.debug(f'Create producer task for {ws}')
+        ws.producer_task = request.rpc.loop.create_task(_producer(request))
+
+
+async def _producer(request):
     ws = request.ws
-    stream = ws.stream
+    subscription = ws.event_subscription
 
-    while not ws.closed:
-        LOGGER.debug(f'Consumer: Start fetching a new messages for {ws}...')
-        try:
-            msg = await stream.receive()
-        except asyncio.QueueEmpty:
-            continue
-        LOGGER.debug(f'Msg received from socket {msg}')
-        await _process_msg(request, msg)
-        LOGGER.debug(f'Consumer: Waiting new messages for {ws}...')
+    try:
+        while not ws.closed and subscription.stream is not None:
+            LOGGER.debug('Producer: Start producing a new messages...')
+            subsevt = request.rpc._subsevt.get(ws, {})
+            for evt_name, data in list(subsevt.items()):
+                if data['shared'] or subscription.stream is None:
+                    continue
+                evt_tr = EVENT_HANDLERS[evt_name]
+                await evt_tr.produce_custom_msg(subscription.stream, data['validated_data'])
+            LOGGER.debug('Producer: Waiting...')
+            await asyncio.sleep(1)
+    finally:
+        ws.producer_task = None
 
 
 async def _process_msg(request, msg):
@@ -186,7 +186,7 @@ async def _process_msg(request, msg):
     subsevt = request.rpc._subsevt.get(ws, {})
 
     for proto_data in evt_resp.events:
-        evt = message_to_dict(proto_data)
+        evt = event_to_dict(proto_data)
         LOGGER.debug(f'Dicted response evt: {evt}')
 
         event_type = evt['event_type']
@@ -200,8 +200,10 @@ async def _process_msg(request, msg):
         for evt_name in evt_names:
             evt_tr = EVENT_HANDLERS[evt_name]
 
-            # Check if evt_name is subscribed
-            if evt_name not in subsevt:
+            # Check if evt_name is subscribed by own validator connection,
+            # shared subscriptions are notified by the events hub
+            subscription = subsevt.get(evt_name)
+            if subscription is None or subscription['shared']:
                 LOGGER.debug('No active ws connection '
                              f'for evt "{evt_name}"')
                 continue
@@ -219,11 +221,7 @@ async def _process_msg(request, msg):
                 LOGGER.debug('Skiping evt with no state update')
                 continue
 
-            validated_data = subsevt[evt_name]['validated_data']
-            LOGGER.debug(f'Loaded validated data: {validated_data}')
-            msg_id = subsevt[evt_name]['msg_id']
-
-            response = evt_tr.prepare_response(updated_state, validated_data)
+            response = evt_tr.prepare_response(updated_state, subscription['validated_data'])
             if asyncio.iscoroutine(response):
                 response = await response
 
@@ -232,19 +230,9 @@ async def _process_msg(request, msg):
                 continue
 
             LOGGER.debug(f'Got response: {response}')
-            evthash = evt_tr.prepare_evt_hash(response)
-            LOGGER.debug(f'Evt hash calculated: {evthash}')
-
-            # Check if we already have sent update
-            if evthash in request.rpc._evthashes[ws]:
-                LOGGER.debug(f'Connection {ws} already '
-                             'received this notification')
-                continue
-
-            result = encode_result(msg_id, {
-                'event_type': evt_name,
-                'attributes': response
-            })
-            await request.rpc._ws_send_str(request, result)
-
-            request.rpc._evthashes[ws].add(evthash)
+            conflation_key = evt_tr.get_conflation_key(response)
+            await send_notification(
+                request.rpc, request, subscription['msg_id'],
+                evt_tr.prepare_evt_hash(response), encode_notification(evt_name, response),
+                None if conflation_key is None else (evt_name, conflation_key),
+            )
@@ -15,19 +15,20 @@
 
 import uuid
 import logging
-import json
 import abc
 import hashlib
 import re
 
 from aiohttp_json_rpc.exceptions import RpcInvalidParamsError
 from sawtooth_sdk.protobuf.client_event_pb2 import ClientEventsSubscribeRequest
-from sawtooth_sdk.protobuf.events_pb2 import EventSubscription, EventList, Event
+from sawtooth_sdk.protobuf.events_pb2 import EventSubscription, EventFilter, EventList, Event
 from sawtooth_sdk.protobuf.validator_pb2 import Message
 
 from remme.clients.block_info import BlockInfoClient
 from remme.shared.exceptions import ClientException
-from remme.shared.constants import Events
+from remme.shared.constants import Events, EVENT_ADDRESS_ATTRIBUTE, EVENT_SWAP_ID_ATTRIBUTE
+
+from ._decoder import decode_entities_changed
 
 LOGGER = logging.getLogger(__name__)
 
@@ -56,6 +57,13 @@ def _create_event_payload(event_type, attributes):
 
 class BaseEventHandler(metaclass=abc.ABCMeta):
 
+    # Events are received from the validator by a subscription shared by all
+    # websockets, custom events are produced for every websocket instead
+    SHARED = True
+
+    # Events are journaled to be replayed for subscribers with "from_block"
+    REPLAYABLE = False
+
     @abc.abstractproperty
     def NAME(cls):
         """Name of event for handler
@@ -86,6 +94,54 @@ class BaseEventHandler(metaclass=abc.ABCMeta):
         """Keys from state to create a unique hash
         """
 
+    def get_subscription_key(self, validated_data):
+        """Key to index the subscription by, `None` to receive all events
+        """
+        return None
+
+    def get_event_keys(self, state):
+        """Keys of subscriptions to deliver the parsed event to, besides
+        subscriptions with `None` key
+        """
+        return ()
+
+    def get_event_filters(self, event_type, key):
+        """Filters for the validator to send only events of the subscription
+        key, empty to send all events of the type
+        """
+        return []
+
+    def create_subscriptions(self, keys):
+        """Create validator subscriptions to events of the subscription keys.
+
+        :param keys: set of subscription keys, `None` stands for all events.
+        :return: list of `EventSubscription`.
+        """
+        subscriptions = []
+        for event_type in self.EVENTS:
+            if None in keys:
+                subscriptions.append(EventSubscription(event_type=event_type))
+                continue
+
+            for key in sorted(keys):
+                filters = self.get_event_filters(event_type, key)
+                subscriptions.append(EventSubscription(event_type=event_type, filters=filters))
+                if not filters:
+                    break
+        return subscriptions
+
+    def prepare_shared_response(self, state):
+        """Prepare the response for all subscribers of a shared subscription,
+        which are matched to the event by the subscription index
+        """
+        return self.prepare_response(state, {})
+
+    def get_conflation_key(self, response):
+        """Key of the entity the response is about, a queued notification of
+        a slow websocket is replaced by a newer one of the same entity
+        """
+        return None
+
     async def produce_custom_msg(self, stream, validated_data):
         """Produce custom events that sawtooth does not have implementation
         """
@@ -97,30 +153,31 @@ class BaseEventHandler(metaclass=abc.ABCMeta):
         return hashlib.sha256(f'{cls.NAME}:{hstr}'.encode("utf-8")).hexdigest()
 
     @classmethod
-    def prepare_subscribe_message(cls, event_types, from_block=None):
+    def prepare_subscribe_message(cls, subscription_keys, from_block=None):
+        """
+        :param subscription_keys: dict of event names to sets of
+            subscription keys, see `create_subscriptions`.
+        """
         last_known_block_ids = [from_block] if from_block else []
         LOGGER.debug(f'last_known_block_ids {last_known_block_ids}')
-        return cls._create_subscribe_request(event_types, last_known_block_ids)
+        return cls._create_subscribe_request(subscription_keys, last_known_block_ids)
 
     @classmethod
-    def _create_subscriptions(cls, event_types):
-        return [EventSubscription(event_type=event_name)
-                for event_name in cls._prepare_events(event_types)]
+    def _create_subscriptions(cls, subscription_keys):
+        subscriptions = []
+        for event_type, keys in subscription_keys.items():
+            instance = EVENT_HANDLERS.get(event_type)
+            if not instance:
+                continue
+            subscriptions.extend(instance.create_subscriptions(keys))
+        return subscriptions
 
     @classmethod
-    def _create_subscribe_request(cls, event_types, last_known_block_ids):
+    def _create_subscribe_request(cls, subscription_keys, last_known_block_ids):
         return ClientEventsSubscribeRequest(
-            subscriptions=cls._create_subscriptions(event_types),
+            subscriptions=cls._create_subscriptions(subscription_keys),
             last_known_block_ids=last_known_block_ids)
 
-    @classmethod
-    def _prepare_events(cls, event_types):
-        for event_type in event_types:
-            instance = EVENT_HANDLERS.get(event_type)
-            if not instance:
-                continue
-            yield from instance.EVENTS
-
 
 @register
 class BlockEventHandler(BaseEventHandler):
@@ -130,6 +187,9 @@ class BlockEventHandler(BaseEventHandler):
         Events.SAWTOOTH_BLOCK_COMMIT.value,
     )
 
+    def __init__(self):
+        self._block_information_client = None
+
     @classmethod
     def hash_keys(cls):
         return ('id',)
@@ -140,8 +200,13 @@ class BlockEventHandler(BaseEventHandler):
 
         To fetch block by number, consider blocks like elements in array. To get second, count from zero.
         """
-        block_information_client = BlockInfoClient()
-        block_information = await block_information_client.get_block_info(block_num=int(state['block_num']) - 1)
+        # The client loads the configuration and the key file, so it is reused
+        if self._block_information_client is None:
+            self._block_information_client = BlockInfoClient()
+
+        block_information = await self._block_information_client.get_block_info(
+            block_num=int(state['block_num']) - 1,
+        )
 
         block_identifier = state.get('block_id')
 
@@ -172,11 +237,15 @@ class BatchEventHandler(BaseEventHandler):
     EVENTS = (
         Events.REMME_BATCH_DELTA.value,
     )
+    SHARED = False
 
     @classmethod
     def hash_keys(cls):
         return ('id', 'status')
 
+    def get_conflation_key(self, response):
+        return response['id']
+
     def prepare_response(self, state, validated_data):
         return state
 
@@ -238,28 +307,39 @@ class TransferEventHandler(BaseEventHandler):
     def hash_keys(cls):
         return ('from', 'to')
 
+    def get_subscription_key(self, validated_data):
+        return validated_data['address']
+
+    def get_event_keys(self, state):
+        return {entity['address'] for entity in state[:2]}
+
+    def get_event_filters(self, event_type, key):
+        return [EventFilter(
+            key=EVENT_ADDRESS_ATTRIBUTE,
+            match_string=key,
+            filter_type=EventFilter.SIMPLE_ANY,
+        )]
+
     def prepare_response(self, state, validated_data):
         sender, receiver = state[0], state[1]
-        if any([
-            sender['address'] == validated_data['address'],
-            receiver['address'] == validated_data['address']
-        ]):
-            return {
-                'from': {
-                    'address': sender['address'],
-                    'balance': float(sender['balance'])
-                },
-                'to': {
-                    'address': receiver['address'],
-                    'balance': float(receiver['balance'])
-                },
-            }
+        if validated_data['address'] in (sender['address'], receiver['address']):
+            return self.prepare_shared_response(state)
+
+    def prepare_shared_response(self, state):
+        sender, receiver = state[0], state[1]
+        return {
+            'from': {
+                'address': sender['address'],
+                'balance': float(sender['balance'])
+            },
+            'to': {
+                'address': receiver['address'],
+                'balance': float(receiver['balance'])
+            },
+        }
 
     def parse_evt(self, evt):
-        try:
-            return json.loads(next(filter(lambda el: el['key'] == 'entities_changed', evt['attributes']))['value'])
-        except StopIteration:
-            pass
+        return decode_entities_changed(evt)
 
     def validate(self, msg_id, params):
         try:
@@ -288,11 +368,30 @@ class AtomicSwapEventHandler(BaseEventHandler):
         Events.SWAP_SET_SECRET_LOCK.value,
         Events.SAWTOOTH_BLOCK_COMMIT.value,
     )
+    REPLAYABLE = True
 
     @classmethod
     def hash_keys(cls):
         return ('swap_id', 'state')
 
+    def get_subscription_key(self, validated_data):
+        return validated_data.get('id')
+
+    def get_event_keys(self, state):
+        return {entity['swap_id'] for entity in state if entity['type'] == 'AtomicSwapInfo'}
+
+    def get_conflation_key(self, response):
+        return response['swap_id']
+
+    def get_event_filters(self, event_type, key):
+        if event_type == Events.SAWTOOTH_BLOCK_COMMIT.value:
+            return []
+        return [EventFilter(
+            key=EVENT_SWAP_ID_ATTRIBUTE,
+            match_string=key,
+            filter_type=EventFilter.SIMPLE_ANY,
+        )]
+
     def prepare_response(self, state, validated_data):
         swap_info = next(filter(lambda el: el['type'] == 'AtomicSwapInfo', state))
         LOGGER.debug(f'Parsed swap info: {swap_info}')
@@ -300,14 +399,11 @@ class AtomicSwapEventHandler(BaseEventHandler):
         id_ = validated_data.get('id')
         if id_ and id_ != swap_info['swap_id']:
             return
-        del swap_info['type']
-        return swap_info
+        # The state is shared by all subscribers of the event
+        return {key: value for key, value in swap_info.items() if key != 'type'}
 
     def parse_evt(self, evt):
-        try:
-            return json.loads(next(filter(lambda el: el['key'] == 'entities_changed', evt['attributes']))['value'])
-        except StopIteration:
-            pass
+        return decode_entities_changed(evt)
 
     def validate(self, msg_id, params):
 
@@ -337,3 +433,11 @@ for evt in EVENT_HANDLERS.values():
             SAWTOOTH_TO_REMME_EVENT[evt_type].add(evt.NAME)
         else:
             SAWTOOTH_TO_REMME_EVENT[evt_type] = {evt.NAME}
+
+REPLAYABLE_EVENT_NAMES = {evt.NAME for evt in EVENT_HANDLERS.values() if evt.REPLAYABLE}
+
+REPLAYABLE_EVENT_TYPES = {
+    evt_type
+    for evt in EVENT_HANDLERS.values() if evt.REPLAYABLE
+    for evt_type in evt.EVENTS
+}
@@ -0,0 +1,333 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+import asyncio
+import json
+import logging
+
+from sawtooth_sdk.protobuf.events_pb2 import EventList
+from sawtooth_sdk.protobuf.validator_pb2 import Message
+
+from .._cache import encode_serialized_result
+from ._decoder import event_to_dict
+from ._handlers import (
+    EVENT_HANDLERS,
+    REPLAYABLE_EVENT_NAMES,
+    SAWTOOTH_TO_REMME_EVENT,
+)
+from ._index import SubscriptionIndex
+from ._subscription import ValidatorSubscription
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Number of subscription keys of an event to filter its events by in the
+# validator, with more keys all events of the type are received, as every
+# event is checked against every filter by the validator
+MAX_FILTERED_KEYS = 100
+
+
+def encode_notification(evt_name, response):
+    """Serialize the notification result, once for all its subscribers.
+    """
+    return json.dumps({
+        'event_type': evt_name,
+        'attributes': response
+    })
+
+
+async def send_notification(rpc, client, msg_id, evthash, result, conflation_key=None):
+    """Send the notification to the subscribed websocket, unless it was sent
+    before.
+
+    :param rpc: `JsonRpc` instance.
+    :param client: request of the websocket.
+    :param msg_id: id of the subscription request.
+    :param evthash: hash of the notification from `prepare_evt_hash`.
+    :param result: serialized result from `encode_notification`.
+    :param conflation_key: Optional. Key of the entity the notification is
+        about, see `OutboundQueue`.
+    """
+    evthashes = rpc._evthashes.get(client.ws)
+    if evthashes is None:
+        LOGGER.warning(f'Connection {client.ws} not found')
+        return
+
+    # Check if we already have sent update
+    if evthash in evthashes:
+        LOGGER.debug(f'Connection {client.ws} already '
+                     'received this notification')
+        return
+
+    frame = encode_serialized_result(msg_id, result)
+    await rpc._ws_send_str(client, frame, droppable=True, conflation_key=conflation_key)
+
+    evthashes.add(evthash)
+
+
+class EventHub:
+    """Validator events subscription shared by all websockets.
+
+    Live events are received from the validator once, each event is parsed
+    once by its handler and delivered to the websockets matched by the
+    subscription index. Custom events stay on the own validator connection
+    of a websocket, see `BaseEventHandler.SHARED`.
+
+    With the events journal, events of replayable handlers are always
+    received and journaled, so subscribers with `from_block` are caught up
+    from the journal, then switched to live events. Live events received
+    during the catch-up are queued for the subscriber until it ends.
+
+    Without the journal, the validator connection is released when the last
+    subscriber is gone.
+    """
+
+    def __init__(self, rpc, zmq_url, journal=None):
+        """
+        :param rpc: `JsonRpc` instance.
+        :param zmq_url: url of the validator.
+        :param journal: Optional. `EventJournal` to replay events from.
+        """
+        self._rpc = rpc
+        self._zmq_url = zmq_url
+        self._journal = journal
+        self._subscription = ValidatorSubscription(
+            zmq_url, self._handle_message, loop=rpc.loop,
+        )
+        self._index = SubscriptionIndex()
+        # Websocket to event name to subscription
+        self._subscriptions = {}
+
+    async def start(self):
+        """Start journaling of events, if the journal is set.
+        """
+        if self._journal is None:
+            return
+
+        try:
+            await self._update_validator_subscription()
+        except Exception as e:
+            LOGGER.error(f'Failed to subscribe to events to journal, '
+                         f'will retry on the first subscription: {e}')
+
+    def can_replay(self, block_id):
+        """Check if events following the block may be replayed.
+        """
+        return self._journal is not None and self._journal.has_block(block_id)
+
+    async def subscribe(self, client, evt_name, msg_id, validated_data):
+        """Subscribe the websocket to the event.
+
+        If there is "from_block" in the validated data, events following the
+        block are replayed from the journal first, see `can_replay`.
+
+        :param client: request of the websocket.
+        :raises ClientException: if the validator rejected the subscription.
+        """
+        ws = client.ws
+        key = EVENT_HANDLERS[evt_name].get_subscription_key(validated_data)
+        from_block = validated_data.get('from_block')
+        subscription = {
+            'client': client,
+            'msg_id': msg_id,
+            'validated_data': validated_data,
+            'key': key,
+            # Live notifications queued until the catch-up ends
+            'pending': [] if from_block else None,
+        }
+        # Journal records are taken at once with the registration, so later
+        # blocks are queued as live ones
+        records = self._journal.get_records_after(from_block) if from_block else None
+        self._subscriptions.setdefault(ws, {})[evt_name] = subscription
+        self._index.add(evt_name, key, ws)
+
+        try:
+            await self._update_validator_subscription()
+        except Exception:
+            self._remove_subscription(ws, evt_name)
+            raise
+
+        if from_block:
+            self._rpc.loop.create_task(self._catch_up(ws, evt_name, subscription, records))
+
+    def unsubscribe(self, ws, evt_name):
+        """Unsubscribe the websocket from the event, the validator
+        subscription is narrowed in the background.
+        """
+        if self._remove_subscription(ws, evt_name):
+            self._schedule_update()
+
+    def remove(self, ws):
+        """Remove all subscriptions of the closed websocket.
+        """
+        removed = [
+            self._remove_subscription(ws, evt_name)
+            for evt_name in list(self._subscriptions.get(ws, ()))
+        ]
+        if removed:
+            self._schedule_update()
+
+    def _remove_subscription(self, ws, evt_name):
+        subscriptions = self._subscriptions.get(ws, {})
+        subscription = subscriptions.pop(evt_name, None)
+        if subscription is None:
+            return False
+
+        self._index.remove(evt_name, subscription['key'], ws)
+        if not subscriptions:
+            del self._subscriptions[ws]
+        return True
+
+    def _schedule_update(self):
+        asyncio.ensure_future(self._update_unused(), loop=self._rpc.loop)
+
+    async def _update_unused(self):
+        try:
+            await self._update_validator_subscription()
+        except Exception as e:
+            LOGGER.warning(f'Failed to narrow shared subscription: {e}')
+
+    async def dispatch(self, events):
+        """Deliver events to the subscribed websockets.
+
+        :param events: list of event dicts from `event_to_dict`.
+        """
+        for evt in events:
+            evt_names = SAWTOOTH_TO_REMME_EVENT.get(evt['event_type'], ())
+            for evt_name in evt_names:
+                if not self._index.has_subscribers(evt_name):
+                    continue
+
+                evt_tr = EVENT_HANDLERS[evt_name]
+                state = evt_tr.parse_evt(evt)
+                if not state:
+                    LOGGER.debug('Skiping evt with no state update')
+                    continue
+
+                subscribers = self._index.match(evt_name, evt_tr.get_event_keys(state))
+                if not subscribers:
+                    continue
+
+                notification = await self._prepare_notification(evt_name, state)
+                if notification is None:
+                    continue
+
+                for ws in subscribers:
+                    # Websocket may unsubscribe while others are notified
+                    subscription = self._subscriptions.get(ws, {}).get(evt_name)
+                    if subscription is None:
+                        continue
+                    if subscription['pending'] is not None:
+                        subscription['pending'].append(notification)
+                        continue
+                    await self._notify(ws, evt_name, subscription, notification)
+
+    async def _prepare_notification(self, evt_name, state):
+        """
+        :return: tuple of the notification hash, serialized result and
+            conflation key or `None` if there is nothing to notify of.
+        """
+        evt_tr = EVENT_HANDLERS[evt_name]
+
+        # Subscribers are filtered by the index, so the response is the same
+        # for all of them
+        response = evt_tr.prepare_shared_response(state)
+        if asyncio.iscoroutine(response):
+            response = await response
+
+        if not response:
+            LOGGER.debug('Skiping evt with empty response')
+            return None
+
+        conflation_key = evt_tr.get_conflation_key(response)
+        return (
+            evt_tr.prepare_evt_hash(response),
+            encode_notification(evt_name, response),
+            None if conflation_key is None else (evt_name, conflation_key),
+        )
+
+    async def _notify(self, ws, evt_name, subscription, notification):
+        evthash, result, conflation_key = notification
+        try:
+            await send_notification(
+                self._rpc, subscription['client'], subscription['msg_id'],
+                evthash, result, conflation_key,
+            )
+        except Exception as e:
+            LOGGER.warning(f'Failed to notify {ws} of "{evt_name}": {e}')
+
+    async def _catch_up(self, ws, evt_name, subscription, records):
+        evt_tr = EVENT_HANDLERS[evt_name]
+        key = subscription['key']
+
+        for record in records:
+            events = self._journal.read(record)
+            if events is None:
+                LOGGER.warning(f'Journal segment of block {record.block_id} was removed')
+                continue
+
+            for evt in events.events:
+                if evt_name not in SAWTOOTH_TO_REMME_EVENT.get(evt.event_type, ()):
+                    continue
+
+                state = evt_tr.parse_evt(event_to_dict(evt))
+                if not state or key is not None and key not in evt_tr.get_event_keys(state):
+                    continue
+
+                notification = await self._prepare_notification(evt_name, state)
+                if notification is not None:
+                    await self._notify(ws, evt_name, subscription, notification)
+
+            # Stop if the subscriber is gone
+            if self._subscriptions.get(ws, {}).get(evt_name) is not subscription:
+                return
+
+        pending = subscription['pending']
+        while pending:
+            await self._notify(ws, evt_name, subscription, pending.pop(0))
+        subscription['pending'] = None
+
+        LOGGER.debug(f'{ws} caught up with "{evt_name}" events from {len(records)} blocks')
+
+    async def _update_validator_subscription(self):
+        subscription_keys = {}
+        for name in self._index.names:
+            keys = self._index.keys(name)
+            if len(keys) > MAX_FILTERED_KEYS:
+                keys = {None}
+            subscription_keys[name] = keys
+
+        if self._journal is not None:
+            # All events to replay are journaled
+            for name in REPLAYABLE_EVENT_NAMES:
+                subscription_keys[name] = {None}
+
+        await self._subscription.update(subscription_keys)
+
+    async def _handle_message(self, msg):
+        if msg.message_type != Message.CLIENT_EVENTS:
+            LOGGER.debug(f'Skip unexpected msg type {msg.message_type}')
+            return
+
+        evt_resp = EventList()
+        evt_resp.ParseFromString(msg.content)
+
+        if self._journal is not None:
+            try:
+                self._journal.append(evt_resp)
+            except OSError as e:
+                LOGGER.error(f'Failed to journal events: {e}')
+
+        await self.dispatch([event_to_dict(evt) for evt in evt_resp.events])
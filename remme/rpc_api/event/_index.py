@@ -0,0 +1,74 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+from collections import defaultdict
+
+
+class SubscriptionIndex:
+    """Subscribers of events indexed by the event name and the key.
+
+    The key is what a subscription is filtered by, e.g. the address for
+    `transfer` events, subscribers with `None` key receive all events of
+    the name. So an event is matched to its subscribers with a few lookups
+    instead of checking every subscriber.
+    """
+
+    def __init__(self):
+        # Event name to key to subscribers
+        self._subscribers = defaultdict(dict)
+
+    def add(self, name, key, subscriber):
+        self._subscribers[name].setdefault(key, set()).add(subscriber)
+
+    def remove(self, name, key, subscriber):
+        keys = self._subscribers.get(name)
+        if keys is None or key not in keys:
+            return
+
+        keys[key].discard(subscriber)
+        if not keys[key]:
+            del keys[key]
+        if not keys:
+            del self._subscribers[name]
+
+    def has_subscribers(self, name):
+        return name in self._subscribers
+
+    @property
+    def names(self):
+        """Names of events having subscribers.
+        """
+        return set(self._subscribers)
+
+    def keys(self, name):
+        """Keys of subscriptions to the event.
+        """
+        return set(self._subscribers.get(name, ()))
+
+    def match(self, name, keys):
+        """Get subscribers of the event.
+
+        :param name: name of the event.
+        :param keys: keys of the event.
+        :return: set of subscribers with any of the keys or with `None` key.
+        """
+        subscribers_by_key = self._subscribers.get(name)
+        if not subscribers_by_key:
+            return set()
+
+        subscribers = set(subscribers_by_key.get(None, ()))
+        for key in keys:
+            subscribers.update(subscribers_by_key.get(key, ()))
+        return subscribers
@@ -0,0 +1,196 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+import logging
+import os
+import struct
+from collections import namedtuple
+
+from google.protobuf.message import DecodeError
+from sawtooth_sdk.protobuf.events_pb2 import EventList
+
+from remme.shared.constants import Events
+
+
+LOGGER = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct('>I')
+
+SEGMENT_SUFFIX = '.journal'
+
+JournalRecord = namedtuple('JournalRecord', ('block_num', 'block_id', 'segment', 'offset', 'length'))
+
+
+def _get_block(events):
+    """Get number and id of the block from its commit event.
+
+    :return: tuple of block number and id or `None` if there is no commit.
+    """
+    for event in events.events:
+        if event.event_type == Events.SAWTOOTH_BLOCK_COMMIT.value:
+            attributes = {attribute.key: attribute.value for attribute in event.attributes}
+            return int(attributes['block_num']), attributes['block_id']
+
+
+class EventJournal:
+    """Append-only journal of events of committed blocks.
+
+    Events of a block are written as a length-prefixed `EventList` with the
+    block commit event, to numbered segment files. Only the latest `max_segments` segments are kept. Blocks
+    are indexed in memory by id, the index is rebuilt from the files on the
+    start. When a fork replaces blocks, the replaced blocks are dropped from
+    the index, so blocks of the index always form the chain.
+    """
+
+    def __init__(self, path, event_types, segment_max_bytes=16 * 1024 * 1024, max_segments=8):
+        """
+        :param path: directory of the journal.
+        :param event_types: types of events to keep besides block commits.
+        :param segment_max_bytes: size of a segment to start the next one at.
+        :param max_segments: number of segments to keep.
+        """
+        self._path = path
+        self._event_types = set(event_types) | {Events.SAWTOOTH_BLOCK_COMMIT.value}
+        self._segment_max_bytes = segment_max_bytes
+        self._max_segments = max_segments
+        self._file = None
+        # Records ordered by the block number
+        self._records = []
+        self._positions = {}
+
+        os.makedirs(path, exist_ok=True)
+        for segment in self._get_segments():
+            self._load_segment(segment)
+
+    @property
+    def event_types(self):
+        return set(self._event_types)
+
+    @property
+    def last_block_num(self):
+        return self._records[-1].block_num if self._records else None
+
+    def has_block(self, block_id):
+        return block_id in self._positions
+
+    def append(self, events):
+        """Write events of the block.
+
+        :param events: `EventList` of the block received from the validator,
+            without a block commit event it is skipped.
+        """
+        block = _get_block(events)
+        if block is None:
+            LOGGER.debug('Skip events without block commit')
+            return
+
+        block_num, block_id = block
+        kept = EventList(events=[
+            event for event in events.events if event.event_type in self._event_types
+        ])
+        data = kept.SerializeToString()
+
+        if self._file is None or self._file.tell() >= self._segment_max_bytes:
+            self._start_segment()
+
+        offset = self._file.tell()
+        self._file.write(_LENGTH.pack(len(data)) + data)
+        self._file.flush()
+
+        self._add_record(JournalRecord(block_num, block_id, self._file.name, offset + _LENGTH.size, len(data)))
+
+    def get_records_after(self, block_id):
+        """Get records of blocks following the block.
+
+        :raises KeyError: if the block is not in the journal.
+        """
+        return self._records[self._positions[block_id] + 1:]
+
+    def read(self, record):
+        """Read events of the record.
+
+        :return: `EventList` or `None` if the segment was removed.
+        """
+        try:
+            with open(record.segment, 'rb') as file:
+                file.seek(record.offset)
+                data = file.read(record.length)
+        except FileNotFoundError:
+            return None
+
+        events = EventList()
+        events.ParseFromString(data)
+        return events
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _get_segments(self):
+        segments = [
+            name for name in os.listdir(self._path) if name.endswith(SEGMENT_SUFFIX)
+        ]
+        return [os.path.join(self._path, name) for name in sorted(segments)]
+
+    def _add_record(self, record):
+        # Blocks from the same number on were replaced by a fork
+        while self._records and self._records[-1].block_num >= record.block_num:
+            del self._positions[self._records.pop().block_id]
+
+        self._positions[record.block_id] = len(self._records)
+        self._records.append(record)
+
+    def _load_segment(self, segment):
+        with open(segment, 'r+b') as file:
+            offset = 0
+            while True:
+                header = file.read(_LENGTH.size)
+                if len(header) < _LENGTH.size:
+                    break
+                length, = _LENGTH.unpack(header)
+                data = file.read(length)
+                if len(data) < length:
+                    break
+
+                events = EventList()
+                try:
+                    events.ParseFromString(data)
+                except DecodeError:
+                    break
+                block_num, block_id = _get_block(events)
+                self._add_record(JournalRecord(block_num, block_id, segment, offset + _LENGTH.size, length))
+                offset += _LENGTH.size + length
+
+            if file.seek(0, os.SEEK_END) != offset:
+                # The process was stopped in the middle of a write
+                LOGGER.warning(f'Truncated incomplete record of {segment} at {offset}')
+                file.truncate(offset)
+
+    def _start_segment(self):
+        self.close()
+        segments = self._get_segments()
+        number = int(os.path.basename(segments[-1])[:-len(SEGMENT_SUFFIX)]) + 1 if segments else 0
+        segment = os.path.join(self._path, f'{number:010d}{SEGMENT_SUFFIX}')
+        self._file = open(segment, 'ab')
+
+        segments.append(segment)
+        removed = set(segments[:-self._max_segments])
+        for path in removed:
+            os.remove(path)
+
+        if removed:
+            self._records = [record for record in self._records if record.segment not in removed]
+            self._positions = {record.block_id: index for index, record in enumerate(self._records)}
@@ -0,0 +1,175 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+import asyncio
+import logging
+
+from sawtooth_sdk.protobuf.client_event_pb2 import (
+    ClientEventsSubscribeResponse,
+    ClientEventsUnsubscribeRequest,
+)
+from sawtooth_sdk.protobuf.validator_pb2 import Message
+
+from remme.settings import ZMQ_CONNECTION_TIMEOUT
+from remme.shared.exceptions import ClientException
+from remme.shared.messaging import Connection
+from remme.shared.router import Router
+
+from ._handlers import BaseEventHandler
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ValidatorSubscription:
+    """Subscription of a validator connection to events.
+
+    The connection is opened with the first subscribed event and released
+    with the last one. Its messages are received by the single consumer
+    task. The validator replaces the subscriptions of a connection with
+    every subscribe request, so a request is sent only if the subscribed
+    event types change or new keys are not covered by the subscribed ones.
+    """
+
+    def __init__(self, zmq_url, on_message, loop=None):
+        """
+        :param zmq_url: url of the validator.
+        :param on_message: coroutine function called with every message
+            received from the validator.
+        :param loop: Optional. Event loop to run the consumer task in.
+        """
+        self._zmq_url = zmq_url
+        self._on_message = on_message
+        self._loop = loop or asyncio.get_event_loop()
+        self._lock = asyncio.Lock()
+        self._consumer_task = None
+
+        self.stream = None
+        # Event names to subscription keys the connection is subscribed to
+        self.keys = {}
+
+    def covers(self, subscription_keys):
+        """Check if the connection is subscribed to the same event types and
+        receives events of all the subscription keys.
+        """
+        if subscription_keys.keys() != self.keys.keys():
+            return False
+
+        return all(
+            None in self.keys[name] or keys <= self.keys[name]
+            for name, keys in subscription_keys.items()
+        )
+
+    async def update(self, subscription_keys, last_known_block_id=None):
+        """Change the subscription to the events of the subscription keys,
+        release the connection if there are none.
+
+        :param subscription_keys: dict of event names to sets of
+            subscription keys, see `BaseEventHandler.create_subscriptions`.
+        :param last_known_block_id: Optional. Block to send events following
+            it, the head block by default. If set, the subscribe request is
+            always sent.
+        :raises ClientException: if the validator rejected the subscription.
+        """
+        async with self._lock:
+            if not subscription_keys:
+                await self._release()
+                return
+
+            if last_known_block_id is None and self.covers(subscription_keys):
+                return
+
+            if self.stream is None:
+                self.stream = Connection(self._zmq_url, loop=self._loop)
+                self.stream.router = Router(self.stream)
+                await self.stream.open()
+                self._consumer_task = self._loop.create_task(self._consume(self.stream))
+
+            try:
+                await self._subscribe(subscription_keys, last_known_block_id)
+            except Exception:
+                if not self.keys:
+                    await self._release()
+                raise
+
+    async def release(self):
+        """Unsubscribe from all events and close the connection.
+        """
+        async with self._lock:
+            await self._release()
+
+    async def _subscribe(self, subscription_keys, last_known_block_id):
+        if last_known_block_id is None:
+            last_known_block_id = (await self.stream.router.list_blocks(limit=1))['head']
+
+        req_msg = BaseEventHandler._create_subscribe_request(
+            subscription_keys, [last_known_block_id])
+
+        msg = await self.stream.send(
+            message_type=Message.CLIENT_EVENTS_SUBSCRIBE_REQUEST,
+            message_content=req_msg.SerializeToString(),
+            timeout=ZMQ_CONNECTION_TIMEOUT)
+
+        if msg.message_type != Message.CLIENT_EVENTS_SUBSCRIBE_RESPONSE:
+            raise ClientException(
+                message=f'Unexpected message type {msg.message_type}')
+
+        response = ClientEventsSubscribeResponse()
+        response.ParseFromString(msg.content)
+
+        if response.status != ClientEventsSubscribeResponse.OK:
+            if response.status == ClientEventsSubscribeResponse.UNKNOWN_BLOCK:
+                raise ClientException(
+                    message=f'Unknown block "{last_known_block_id}"')
+            raise ClientException(
+                message='Subscription failed: Couldn\'t '
+                        'send multipart')
+
+        LOGGER.debug(f'Subscribed to {subscription_keys}')
+        self.keys = subscription_keys
+
+    async def _release(self):
+        stream, self.stream = self.stream, None
+        self.keys = {}
+        if stream is None:
+            return
+
+        self._consumer_task.cancel()
+        self._consumer_task = None
+        try:
+            await stream.send(
+                message_type=Message.CLIENT_EVENTS_UNSUBSCRIBE_REQUEST,
+                message_content=ClientEventsUnsubscribeRequest().SerializeToString(),
+                timeout=ZMQ_CONNECTION_TIMEOUT)
+        except Exception as e:
+            LOGGER.debug(f'Failed to unsubscribe from events: {e}')
+        finally:
+            stream.close()
+
+        LOGGER.debug('Released validator events connection')
+
+    async def _consume(self, stream):
+        while True:
+            try:
+                msg = await stream.receive()
+            except asyncio.QueueEmpty:
+                continue
+
+            try:
+                await self._on_message(msg)
+            except asyncio.CancelledError:  # pylint: disable=try-except-raise
+                raise
+            except Exception:
+                LOGGER.exception('Failed to process events message')
@@ -32,8 +32,9 @@ from remme.clients.account import AccountClient
 from remme.clients.pub_key import PubKeyClient
 from remme.protos.transaction_pb2 import TransactionPayload
 from remme.shared.forms import ProtoForm, IdentifierForm, IdentifiersForm
+from remme.shared.tracing import TRACER
 
-from .utils import validate_params
+from .utils import immutable_result, validate_params
 
 
 __all__ = (
@@ -78,7 +79,7 @@ async def send_tokens(request):
     return result['data']
 
 
-def _get_proto_validator(current_handler, tr_payload_pb):
+def _get_proto_validation(current_handler, tr_payload_pb):
     processor = current_handler.get_state_processor()
     try:
         state_processor = processor[tr_payload_pb.method]
@@ -103,7 +104,8 @@ def _get_proto_validator(current_handler, tr_payload_pb):
                      f'with protobuf "{pb_class}"')
         return
 
-    return validator_class.load_proto(data_pb)
+    is_valid, errors = validator_class.validate_proto(data_pb)
+    return is_valid, errors, pb_class
 
 
 @validate_params(ProtoForm)
@@ -130,6 +132,9 @@ async def send_raw_transaction(request):
             message='Failed to parse transaction proto'
         )
 
+    # Transaction processors trace its execution with the same id
+    TRACER.set_trace_id(tr_pb.header_signature)
+
     try:
         tr_head_pb = TransactionHeader()
         tr_head_pb.ParseFromString(tr_pb.header)
@@ -164,21 +169,24 @@ async def send_raw_transaction(request):
             message='Validation handler not set for this method'
         )
 
-    validator = _get_proto_validator(handler, tr_payload_pb)
-    if validator and not validator.validate():
-        logger.debug('Form "send_raw_transaction" validator errors: '
-                     f'{validator.errors}')
-        raise RpcGenericServerDefinedError(
-            error_code=-32050,
-            message=f'Invalid "{validator.get_pb_class().__name__}" '
-                    'structure'
-        )
+    with TRACER.span('rpc_api.validate_payload'):
+        validation = _get_proto_validation(handler, tr_payload_pb)
+    if validation is not None:
+        is_valid, errors, pb_class = validation
+        if not is_valid:
+            logger.debug('Form "send_raw_transaction" validator errors: '
+                         f'{errors}')
+            raise RpcGenericServerDefinedError(
+                error_code=-32050,
+                message=f'Invalid "{pb_class.__name__}" structure'
+            )
 
     client = PubKeyClient()
     response = await client.send_raw_transaction(tr_pb)
     return response['data']
 
 
+@immutable_result
 @validate_params(IdentifiersForm)
 async def list_receipts(request):
     ids = request.params['ids']
@@ -202,6 +210,7 @@ async def list_batches(request):
     return await client.list_batches(ids, start, limit, head, reverse)
 
 
+@immutable_result
 @validate_params(IdentifierForm)
 async def fetch_batch(request):
     id = request.params['id']
@@ -234,6 +243,7 @@ async def list_transactions(request):
     return await client.list_transactions(ids, start, limit, head, reverse, family_name)
 
 
+@immutable_result
 @validate_params(IdentifierForm)
 async def fetch_transaction(request):
     id = request.params['id']
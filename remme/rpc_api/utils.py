@@ -12,13 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ------------------------------------------------------------------------
-import os
 import logging
 import importlib
 import functools
 
 from aiohttp_json_rpc import RpcInvalidParamsError
 
+from ._manifest import METHODS
+
 
 logger = logging.getLogger(__name__)
 
@@ -49,26 +50,57 @@ def validate_params(form_class, ignore_fields=None):
     return decorator
 
 
-def load_methods(prefix, modules="*"):
+def immutable_result(func):
+    """Mark the method as returning the same result for the same params, so
+    the result is cached and served with ETag, see `ResponseCache`.
+    """
+    func.immutable = True
+    return func
+
+
+def get_module_methods(modules='*'):
+    """Get names of methods of the modules from the manifest, without
+    importing the modules.
+
+    :param modules: comma separated names of modules, "*" for all modules.
+    :return: list of tuples of the module and the method names.
+    :raises ValueError: if a module is unknown.
+    """
     if modules == '*':
-        logger.info('Loading all modules')
-        _smodules = []
-        for i in os.listdir(os.path.dirname(__file__)):
-            filename = os.path.splitext(i)[0]
-            if not filename.startswith('__'):
-                if os.path.splitext(i)[1] == '.py':
-                    _smodules.append(filename)
-        modules = ','.join(_smodules)
-
-    logger.info(f'Got modules to load: {modules}')
-    lmodules = map(lambda m: importlib.import_module(m, '*'),
-                   (f'{prefix}.{module}' for module in modules.split(',')))
-    for module in lmodules:
-        _all = getattr(module, '__all__', [])
-        logger.info(f'Found available methods in {module}: {_all}')
-        for method in _all:
-            try:
-                yield getattr(module, method)
-                logger.info(f'Method {method} loaded')
-            except AttributeError:
-                logger.info(f'Method {method} not found')
+        modules = ','.join(METHODS)
+
+    result = []
+    for module in modules.split(','):
+        module = module.strip()
+        try:
+            names = METHODS[module]
+        except KeyError:
+            raise ValueError(f'Unknown RPC API module "{module}", '
+                             f'available: {", ".join(METHODS)}')
+        result.extend((module, name) for name in names)
+    return result
+
+
+def load_lazily(prefix, module, name):
+    """Get the method importing its module on the first call.
+
+    `load` of the returned method imports the module in advance, attributes
+    of the method, e.g. `immutable`, are set once it is loaded.
+    """
+    method = None
+
+    def load():
+        nonlocal method
+        if method is None:
+            loaded = getattr(importlib.import_module(f'{prefix}.{module}'), name)
+            functools.update_wrapper(lazy_method, loaded)
+            method = loaded
+            logger.debug(f'Method {name} loaded')
+        return method
+
+    async def lazy_method(request):
+        return await load()(request)
+
+    lazy_method.__name__ = name
+    lazy_method.load = load
+    return lazy_method
@@ -18,6 +18,10 @@ from enum import Enum, unique
 
 EMIT_EVENT = "emit_event"
 
+# Attributes of emitted events the validator filters event subscriptions by
+EVENT_ADDRESS_ATTRIBUTE = 'address'
+EVENT_SWAP_ID_ATTRIBUTE = 'swap_id'
+
 
 @unique
 class Events(Enum):
@@ -0,0 +1,122 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Binary format of the entities changed by a transaction.
+
+Transaction processors put it to the `data` field of emitted events instead
+of (or along with) the JSON `entities_changed` attribute.
+
+Version 1 layout is the version byte followed by the entities, in the order
+they were changed, each of them being:
+
+    type name length (2 bytes) | protobuf type name
+    address length (2 bytes)   | address as raw bytes
+    data length (4 bytes)      | serialized protobuf message
+
+All lengths are big-endian unsigned integers.
+"""
+
+import struct
+
+from google.protobuf.message import DecodeError
+
+from remme.protos.account_pb2 import Account
+from remme.protos.atomic_swap_pb2 import AtomicSwapInfo
+from remme.protos.pub_key_pb2 import PubKeyStorage
+
+
+EVENT_DATA_VERSION = 1
+
+JSON_EVENT_FORMAT = 'json'
+BINARY_EVENT_FORMAT = 'binary'
+BOTH_EVENT_FORMATS = 'both'
+EVENT_FORMATS = (JSON_EVENT_FORMAT, BINARY_EVENT_FORMAT, BOTH_EVENT_FORMATS)
+
+EVENT_DATA_TYPES = {
+    pb_class.DESCRIPTOR.full_name: pb_class
+    for pb_class in (Account, AtomicSwapInfo, PubKeyStorage)
+}
+
+_VERSION = struct.Struct('>B')
+_SHORT_LENGTH = struct.Struct('>H')
+_LONG_LENGTH = struct.Struct('>I')
+
+
+def encode_entities(updated_state):
+    """Encode changed entities to the binary event data.
+
+    :param updated_state: dict of address to protobuf message.
+    :return: bytes to put to the event `data` field.
+    """
+    parts = [_VERSION.pack(EVENT_DATA_VERSION)]
+    for address, pb in updated_state.items():
+        type_name = pb.DESCRIPTOR.full_name.encode()
+        raw_address = bytes.fromhex(address)
+        data = pb.SerializeToString()
+        parts.extend((
+            _SHORT_LENGTH.pack(len(type_name)), type_name,
+            _SHORT_LENGTH.pack(len(raw_address)), raw_address,
+            _LONG_LENGTH.pack(len(data)), data,
+        ))
+    return b''.join(parts)
+
+
+def decode_entities(data):
+    """Decode changed entities from the binary event data.
+
+    :param data: event `data` field content.
+    :return: list of (address, protobuf message) tuples.
+    :raises ValueError: on unsupported version, unknown type or truncated data.
+    """
+    view = memoryview(data)
+    try:
+        version, = _VERSION.unpack_from(view, 0)
+    except struct.error:
+        raise ValueError('Empty event data')
+
+    if version != EVENT_DATA_VERSION:
+        raise ValueError(f'Unsupported event data version {version}')
+
+    entities = []
+    offset = _VERSION.size
+    try:
+        while offset < len(view):
+            type_name, offset = _read(view, offset, _SHORT_LENGTH)
+            raw_address, offset = _read(view, offset, _SHORT_LENGTH)
+            pb_data, offset = _read(view, offset, _LONG_LENGTH)
+
+            try:
+                pb_class = EVENT_DATA_TYPES[bytes(type_name).decode()]
+            except KeyError:
+                raise ValueError(f'Unknown entity type "{bytes(type_name)}"')
+
+            pb = pb_class()
+            pb.ParseFromString(bytes(pb_data))
+            entities.append((bytes(raw_address).hex(), pb))
+    except struct.error:
+        raise ValueError('Truncated event data')
+    except DecodeError:
+        raise ValueError('Failed to deserialize event entity')
+
+    return entities
+
+
+def _read(view, offset, length_struct):
+    length, = length_struct.unpack_from(view, offset)
+    start = offset + length_struct.size
+    end = start + length
+    if end > len(view):
+        raise struct.error('Not enough data')
+    return view[start:end], end
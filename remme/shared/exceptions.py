@@ -53,3 +53,8 @@ class InvalidResourceId(RemmeRpcError):
 class CountInvalid(RemmeRpcError):
     MESSAGE = 'Invalid limit count'
     ERROR_CODE = -32005
+
+
+class RateLimitExceeded(RemmeRpcError):
+    MESSAGE = 'Too many requests'
+    ERROR_CODE = -32006
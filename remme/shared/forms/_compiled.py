@@ -0,0 +1,347 @@
+"""Validation plans compiled from `ProtoForm` subclasses.
+
+`ProtoForm.load_proto` converts a message with `MessageToDict`, builds a
+wtforms form and loads the data into it, which is expensive for a check
+performed on every transaction. A plan checks protobuf fields directly and
+reproduces the result and error messages of the form validation:
+
+- field values are the ones `MessageToDict` with default values gives,
+  coerced the way `ProtoForm._gen_load` does;
+- absent fields (unset messages and oneof members) get the form field
+  default data;
+- `DataRequired`, `Optional` and `Regexp` validators and `SelectField`
+  choices are checked like wtforms does.
+
+Forms using anything else (custom fields or validators, overridden
+validation, fields of unsupported types) can't be compiled, they are
+validated with wtforms.
+"""
+import base64
+import logging
+
+from google.protobuf.descriptor import FieldDescriptor
+from wtforms import fields, validators
+from wtforms.fields.core import Field
+
+
+logger = logging.getLogger(__name__)
+
+
+class NotCompilable(Exception):
+    """Form can't be compiled to the validation plan.
+    """
+
+
+# Names consumed by the form constructor instead of being loaded as fields
+_FORM_KWARGS = frozenset(('formdata', 'obj', 'prefix', 'data', 'meta', 'ignore_fields'))
+
+_DATA_REQUIRED = 'data_required'
+_OPTIONAL = 'optional'
+_REGEXP = 'regexp'
+
+_INT32_TYPES = frozenset((
+    FieldDescriptor.CPPTYPE_INT32,
+    FieldDescriptor.CPPTYPE_UINT32,
+    FieldDescriptor.CPPTYPE_BOOL,
+))
+_INT64_TYPES = frozenset((
+    FieldDescriptor.CPPTYPE_INT64,
+    FieldDescriptor.CPPTYPE_UINT64,
+))
+
+
+def _coerce(value):
+    # Mirrors `ProtoForm._gen_load`
+    return int(value) if str(value).isdigit() else value
+
+
+def _load_same(value):
+    return value
+
+
+def _load_int64(value):
+    # `MessageToDict` gives 64-bit integers as strings
+    return value if value >= 0 else str(value)
+
+
+def _load_bytes(value):
+    return _coerce(base64.b64encode(value).decode('utf-8'))
+
+
+def _make_enum_loader(enum_descriptor):
+    names = {number: value.name for number, value in enum_descriptor.values_by_number.items()}
+
+    def _load_enum(value):
+        # Unknown values of proto3 enums are given as numbers
+        return names.get(value, value)
+
+    return _load_enum
+
+
+def _get_loader(proto_field):
+    cpp_type = proto_field.cpp_type
+    if cpp_type in _INT32_TYPES:
+        return _load_same
+    if cpp_type in _INT64_TYPES:
+        return _load_int64
+    if cpp_type == FieldDescriptor.CPPTYPE_ENUM:
+        return _make_enum_loader(proto_field.enum_type)
+    if cpp_type == FieldDescriptor.CPPTYPE_STRING:
+        if proto_field.type == FieldDescriptor.TYPE_BYTES:
+            return _load_bytes
+        return _coerce
+    raise NotCompilable(f'Unsupported type of field "{proto_field.name}"')
+
+
+def _compile_validators(field):
+    compiled = []
+    for validator in field.validators:
+        validator_class = type(validator)
+        if validator_class in (validators.DataRequired, validators.Required):
+            message = validator.message
+            if message is None:
+                message = field.gettext('This field is required.')
+            compiled.append((_DATA_REQUIRED, None, message))
+        elif validator_class is validators.Optional:
+            compiled.append((_OPTIONAL, None, None))
+        elif validator_class is validators.Regexp:
+            message = validator.message
+            if message is None:
+                message = field.gettext('Invalid input.')
+            compiled.append((_REGEXP, validator.regex, message))
+        else:
+            raise NotCompilable(f'Unsupported validator {validator_class.__name__}')
+    return tuple(compiled)
+
+
+def _is_plain_field(field):
+    field_class = type(field)
+    if isinstance(field, fields.SelectField):
+        if field_class.pre_validate is not fields.SelectField.pre_validate:
+            return False
+    elif field_class.pre_validate is not Field.pre_validate:
+        return False
+
+    return (
+        isinstance(field, (fields.StringField, fields.IntegerField, fields.SelectField))
+        and field_class.process is Field.process
+        and field_class.validate is Field.validate
+        and field_class.post_validate is Field.post_validate
+        and not field.filters
+    )
+
+
+class _ValuePlan:
+
+    __slots__ = ('name', 'proto_field', 'loader', 'absent_data', 'choices',
+                 'choice_message', 'validators')
+
+    def __init__(self, name, proto_field, field):
+        if not _is_plain_field(field):
+            raise NotCompilable(f'Unsupported field "{name}"')
+
+        if proto_field is not None:
+            if proto_field.label == FieldDescriptor.LABEL_REPEATED:
+                raise NotCompilable(f'Unsupported repeated field "{name}"')
+            self.loader = _get_loader(proto_field)
+        else:
+            self.loader = None
+
+        self.name = name
+        self.proto_field = proto_field
+        # Data of the field processed without a value
+        self.absent_data = field.data
+        self.choices = tuple(value for value, _ in field.choices) \
+            if isinstance(field, fields.SelectField) else None
+        self.choice_message = field.gettext('Not a valid choice')
+        self.validators = _compile_validators(field)
+
+    def validate(self, data):
+        errors = []
+
+        if self.choices is not None:
+            for value in self.choices:
+                if data == value:
+                    break
+            else:
+                errors.append(self.choice_message)
+
+        for kind, regex, message in self.validators:
+            if kind is _DATA_REQUIRED:
+                if not data or isinstance(data, str) and not data.strip():
+                    errors[:] = [message]
+                    break
+            elif kind is _OPTIONAL:
+                # Loaded forms have no raw data, so the chain always stops
+                errors[:] = []
+                break
+            elif not regex.match(data or ''):
+                errors.append(message)
+
+        return errors
+
+
+class _FormPlan:
+
+    __slots__ = ('name', 'proto_field', 'plan')
+
+    def __init__(self, name, proto_field, plan):
+        self.name = name
+        self.proto_field = proto_field
+        self.plan = plan
+
+
+class CompiledProtoForm:
+    """Validation plan of a `ProtoForm` subclass for a protobuf message type.
+    """
+
+    def __init__(self, form_class, descriptor):
+        """
+        :param form_class: `ProtoForm` subclass.
+        :param descriptor: descriptor of the protobuf message to validate.
+        :raises NotCompilable: if the form can't be compiled.
+        """
+        from .base import ProtoForm
+
+        if form_class.validate is not ProtoForm.validate \
+                or form_class.process is not ProtoForm.process \
+                or form_class._gen_load.__func__ is not ProtoForm._gen_load.__func__:
+            raise NotCompilable(f'Form {form_class.__name__} overrides validation')
+
+        form = form_class()
+        if form.meta.csrf:
+            raise NotCompilable(f'Form {form_class.__name__} uses CSRF protection')
+
+        self._form_class = form_class
+
+        proto_fields = descriptor.fields_by_name if descriptor is not None else {}
+        self._plans = []
+
+        for name, field in form._fields.items():
+            if getattr(form_class, f'validate_{name}', None) is not None:
+                raise NotCompilable(f'Form {form_class.__name__} has inline validator of "{name}"')
+
+            proto_field = proto_fields.get(name)
+            is_message = proto_field is not None \
+                and proto_field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE
+
+            if isinstance(field, fields.FormField):
+                if proto_field is not None and (
+                    not is_message or proto_field.label == FieldDescriptor.LABEL_REPEATED
+                ):
+                    raise NotCompilable(f'Form field "{name}" is not a message')
+                nested_descriptor = proto_field.message_type if proto_field is not None else None
+                self._plans.append(_FormPlan(
+                    name, proto_field, CompiledProtoForm(field.form_class, nested_descriptor),
+                ))
+            elif is_message:
+                raise NotCompilable(f'Message field "{name}" is not a form field')
+            else:
+                self._plans.append(_ValuePlan(name, proto_field, field))
+
+        self._always_present = []
+        self._maybe_present = []
+        if descriptor is not None:
+            for proto_field in descriptor.fields:
+                name = proto_field.name
+                if name in _FORM_KWARGS or (
+                    name not in form._fields and hasattr(form, name)
+                ):
+                    raise NotCompilable(f'Field "{name}" clashes with form attributes')
+
+                # The same keys `MessageToDict` gives with default values
+                if proto_field.containing_oneof is not None or (
+                    proto_field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE
+                    and proto_field.label != FieldDescriptor.LABEL_REPEATED
+                ):
+                    self._maybe_present.append(name)
+                else:
+                    self._always_present.append(name)
+
+        field_names = set(form._fields)
+        self._static_wrong_fields = [
+            name for name in self._always_present if name not in field_names
+        ]
+        self._maybe_wrong_fields = [
+            name for name in self._maybe_present if name not in field_names
+        ]
+
+    def validate(self, pb):
+        """Validate protobuf message.
+
+        :return: tuple of validation result and errors dict the same as
+            `ProtoForm.errors`.
+        """
+        return self._validate(self._load(pb))
+
+    def _load(self, pb):
+        """Get fields data, the same as loaded to the form.
+        """
+        loaded = []
+        for plan in self._plans:
+            proto_field = plan.proto_field
+            if isinstance(plan, _FormPlan):
+                is_present = pb is not None and proto_field is not None \
+                    and pb.HasField(plan.name)
+                loaded.append(plan.plan._load(getattr(pb, plan.name) if is_present else None))
+            elif pb is None or proto_field is None or (
+                proto_field.containing_oneof is not None
+                and not pb.HasField(plan.name)
+            ):
+                loaded.append(plan.absent_data)
+            else:
+                loaded.append(plan.loader(getattr(pb, plan.name)))
+
+        return pb, loaded
+
+    def _get_wrong_fields(self, pb):
+        if pb is None:
+            return set()
+
+        if not self._static_wrong_fields and not any(
+            pb.HasField(name) for name in self._maybe_wrong_fields
+        ):
+            return set()
+
+        # Keys in the order `MessageToDict` gives them
+        keys = [field.name for field, _ in pb.ListFields()]
+        keys.extend(name for name in self._always_present if name not in keys)
+        # Built the same way as `ProtoForm.wrong_fields` to keep the iteration order
+        wrong_fields = set(keys).difference(plan.name for plan in self._plans)
+        return wrong_fields.difference(())
+
+    def _validate(self, loaded):
+        pb, data = loaded
+
+        wrong_fields = self._get_wrong_fields(pb)
+        if wrong_fields:
+            errors = {'error': [f"Wrong params keys: {list(wrong_fields)}"]}
+            is_valid = False
+        else:
+            errors = {}
+            is_valid = True
+            for plan, plan_data in zip(self._plans, data):
+                if isinstance(plan, _FormPlan):
+                    field_is_valid, field_errors = plan.plan._validate(plan_data)
+                else:
+                    field_errors = plan.validate(plan_data)
+                    field_is_valid = not field_errors
+
+                if not field_is_valid:
+                    is_valid = False
+                if field_errors:
+                    errors[plan.name] = field_errors
+
+        return self._form_class._validate_oneof(is_valid, errors), errors
+
+
+def compile_proto_form(form_class, descriptor):
+    """Get validation plan of the form for the protobuf message type.
+
+    :return: `CompiledProtoForm` or `None` if the form can't be compiled.
+    """
+    try:
+        return CompiledProtoForm(form_class, descriptor)
+    except NotCompilable as e:
+        logger.info(f'Form {form_class.__name__} is validated with wtforms: {e}')
+        return None
@@ -6,12 +6,22 @@ from wtforms import Form, fields
 from werkzeug.datastructures import MultiDict
 from remme.shared.utils import message_to_dict
 
+from ._compiled import compile_proto_form
+
 
 logger = logging.getLogger(__name__)
 
+# Validation plans by form class and protobuf message descriptor
+_COMPILED_FORMS = {}
+
 
 class ProtoForm(Form):
 
+    # Form fields of a protobuf oneof, exactly one of them is expected to be valid
+    _oneof_fields = ()
+    _oneof_error_key = 'configuration'
+    _oneof_message = None
+
     def __init__(self, formdata=None, obj=None, prefix='', data=None,
                  meta=None, **kwargs):
         self._wrong_fields = set()
@@ -31,6 +41,27 @@ class ProtoForm(Form):
         form._pb_class = pb.__class__
         return form
 
+    @classmethod
+    def validate_proto(cls, pb):
+        """Validate protobuf message without building the form.
+
+        The result is the same as of `load_proto(pb).validate()`, the form
+        is compiled to the validation plan on the first call.
+
+        :return: tuple of validation result and errors dict.
+        """
+        key = (cls, pb.DESCRIPTOR)
+        try:
+            plan = _COMPILED_FORMS[key]
+        except KeyError:
+            plan = _COMPILED_FORMS[key] = compile_proto_form(cls, pb.DESCRIPTOR)
+
+        if plan is None:
+            form = cls.load_proto(pb)
+            return form.validate(), form.errors
+
+        return plan.validate(pb)
+
     @classmethod
     def _gen_load(cls, form, data):
         for k, v in data.items():
@@ -63,5 +94,31 @@ class ProtoForm(Form):
     def validate(self):
         if self.wrong_fields:
             self.errors['error'] = [f"Wrong params keys: {list(self.wrong_fields)}"]
-            return False
-        return super().validate()
+            is_valid = False
+        else:
+            is_valid = super().validate()
+        return self._validate_oneof(is_valid, self.errors)
+
+    @classmethod
+    def _validate_oneof(cls, is_valid, errors):
+        if not cls._oneof_fields:
+            return is_valid
+
+        pt_error_keys = list(cls._oneof_fields)
+        if all((ek in errors for ek in pt_error_keys)):
+            errors[cls._oneof_error_key] = [cls._oneof_message]
+            for cfg in pt_error_keys:
+                del errors[cfg]
+            is_valid = False
+        else:
+            for ek in pt_error_keys:
+                if ek not in errors:
+                    cp_errs = pt_error_keys[:]
+                    cp_errs.remove(ek)
+                    for cfg in cp_errs:
+                        del errors[cfg]
+                    if not errors:
+                        is_valid = True
+                    break
+
+        return is_valid
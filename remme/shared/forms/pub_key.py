@@ -32,28 +32,9 @@ class NewPublicKeyPayloadForm(ProtoForm):
     ecdsa = fields.FormField(ECDSAConfigurationForm)
     ed25519 = fields.FormField(Ed25519ConfigurationForm)
 
-    def validate(self):
-        is_valid = super().validate()
-        pt_error_keys = ['rsa', 'ecdsa', 'ed25519']
-        if all((ek in self.errors for ek in pt_error_keys)):
-            msg = ['At least one of RSAConfiguration, ECDSAConfiguration or '
-                   'Ed25519Configuration must be set']
-            self._errors['configuration'] = msg
-            for cfg in pt_error_keys:
-                del self._errors[cfg]
-            is_valid = False
-        else:
-            for ek in pt_error_keys:
-                if ek not in self.errors:
-                    cp_errs = pt_error_keys[:]
-                    cp_errs.remove(ek)
-                    for cfg in cp_errs:
-                        del self._errors[cfg]
-                    if not self._errors:
-                        is_valid = True
-                    break
-            
-        return is_valid
+    _oneof_fields = ('rsa', 'ecdsa', 'ed25519')
+    _oneof_message = ('At least one of RSAConfiguration, ECDSAConfiguration or '
+                      'Ed25519Configuration must be set')
 
 
 class NewPubKeyStoreAndPayPayloadForm(ProtoForm):
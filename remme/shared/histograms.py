@@ -0,0 +1,175 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""In-process latency histograms.
+
+Histograms are log-linear, the same as HDR histograms: every power of two
+range of values is split into `SUB_BUCKETS` equal buckets, so a recorded
+value costs a few integer operations and percentiles are reported with
+relative error below 1 / `SUB_BUCKETS` whatever the range of values is.
+
+Values are recorded in microseconds and reported in seconds.
+"""
+
+import math
+import threading
+
+
+# Number of bits of recorded values kept exactly
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << (SUB_BUCKET_BITS - 1)
+# Values from 2 ** 36 microseconds (about 19 hours) are counted as the maximum one
+MAX_VALUE_BITS = 36
+
+_MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+_BUCKETS_COUNT = 2 * SUB_BUCKETS + (MAX_VALUE_BITS - SUB_BUCKET_BITS) * SUB_BUCKETS
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+# Quantiles are named like "p50" and "p999"
+QUANTILE_NAMES = tuple(f'p{quantile * 100:g}'.replace('.', '') for quantile in QUANTILES)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PROMETHEUS_METRIC = 'remme_latency_seconds'
+
+
+def _get_bucket(value):
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    if shift <= 0:
+        return value
+    return SUB_BUCKETS * shift + (value >> shift)
+
+
+def _get_bucket_value(bucket):
+    """Get the highest value counted in the bucket.
+    """
+    if bucket < 2 * SUB_BUCKETS:
+        return bucket
+    shift = bucket // SUB_BUCKETS - 1
+    return ((bucket - SUB_BUCKETS * shift + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Histogram of durations of an operation.
+    """
+
+    def __init__(self):
+        self._counts = [0] * _BUCKETS_COUNT
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Count the duration.
+
+        :param seconds: duration in seconds.
+        """
+        bucket = _get_bucket(min(max(int(seconds * 1e6), 0), _MAX_VALUE))
+        with self._lock:
+            self._counts[bucket] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def get_quantiles(self, quantiles=QUANTILES):
+        """Get values of the quantiles.
+
+        :param quantiles: sorted quantiles to get, from 0 to 1.
+        :return: list of values in seconds in the order of quantiles.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            count = self.count
+            max_value = self.max
+
+        ranks = [max(math.ceil(quantile * count), 1) for quantile in quantiles]
+        values = []
+        seen = 0
+        for bucket, bucket_count in enumerate(counts):
+            seen += bucket_count
+            while len(values) < len(ranks) and seen >= ranks[len(values)]:
+                values.append(min(_get_bucket_value(bucket) / 1e6, max_value))
+            if len(values) == len(ranks):
+                break
+
+        values.extend(0.0 for _ in range(len(quantiles) - len(values)))
+        return values
+
+
+class HistogramsRegistry:
+    """Latency histograms by the metric name.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def get(self, metric):
+        histogram = self._histograms.get(metric)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(metric, LatencyHistogram())
+        return histogram
+
+    def find(self, metric):
+        """Get histogram of the metric without creating it.
+
+        :return: `LatencyHistogram` or `None` if nothing was recorded.
+        """
+        return self._histograms.get(metric)
+
+    def record(self, metric, seconds):
+        """Count the duration of the metric.
+
+        :param metric: The name of the metric.
+        :param seconds: duration in seconds.
+        """
+        self.get(metric).record(seconds)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render_prometheus(self):
+        """Get all histograms as summaries in Prometheus text format.
+
+        Metrics are labels of the single `remme_latency_seconds` summary.
+        """
+        lines = [
+            f'# HELP {PROMETHEUS_METRIC} Execution time of REMME operations.',
+            f'# TYPE {PROMETHEUS_METRIC} summary',
+        ]
+
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+
+        for metric, histogram in histograms:
+            label = f'metric="{_escape_label(metric)}"'
+            for quantile, value in zip(QUANTILES, histogram.get_quantiles()):
+                lines.append(f'{PROMETHEUS_METRIC}{{{label},quantile="{quantile}"}} {value!r}')
+            lines.append(f'{PROMETHEUS_METRIC}_sum{{{label}}} {histogram.sum!r}')
+            lines.append(f'{PROMETHEUS_METRIC}_count{{{label}}} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+HISTOGRAMS = HistogramsRegistry()
+"""Global registry of histograms fed by the time measurements.
+"""
@@ -0,0 +1,156 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Event loop lag monitor and slow callbacks detector.
+
+A task wakes up every `interval` seconds and records how late it was woken
+up to the loop lag histogram. A watchdog thread checks that the task keeps
+waking up and, if the loop is blocked for longer than the threshold, takes
+the stack of the loop thread, so the blocking code is found without the
+expensive asyncio debug mode.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from remme.shared.histograms import HISTOGRAMS, QUANTILE_NAMES
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Number of the latest slow callbacks to keep
+SLOW_CALLBACKS_HISTORY = 20
+
+
+class LoopMonitor:
+    """Measures lag of the event loop and detects slow callbacks.
+    """
+
+    def __init__(self, loop, metric, interval=0.1, slow_callback_threshold=0.1):
+        """
+        :param loop: event loop to monitor.
+        :param metric: the name of the loop lag histogram.
+        :param interval: number of seconds between lag measurements.
+        :param slow_callback_threshold: number of seconds the loop may be
+            blocked for before the stack of the blocking callback is taken,
+            0 disables the detection.
+        """
+        self._loop = loop
+        self._metric = metric
+        self._interval = interval
+        self._threshold = slow_callback_threshold
+
+        self._lock = threading.Lock()
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = None
+        self._last_tick = None
+        self._stall = None
+
+        self.slow_callbacks = deque(maxlen=SLOW_CALLBACKS_HISTORY)
+        self.slow_callbacks_count = 0
+
+    def start(self):
+        self._last_tick = time.monotonic()
+        self._task = asyncio.ensure_future(self._measure_lag(), loop=self._loop)
+
+        if self._threshold > 0:
+            self._watchdog = threading.Thread(
+                target=self._watch, name='loop-monitor', daemon=True,
+            )
+            self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def get_stats(self):
+        """Get loop lag quantiles and the latest slow callbacks.
+        """
+        histogram = HISTOGRAMS.get(self._metric)
+        with self._lock:
+            slow_callbacks = [dict(record) for record in self.slow_callbacks]
+        return {
+            'lag': {
+                'count': histogram.count,
+                'max': histogram.max,
+                **dict(zip(QUANTILE_NAMES, histogram.get_quantiles())),
+            },
+            'slow_callbacks_count': self.slow_callbacks_count,
+            'slow_callbacks': slow_callbacks,
+        }
+
+    async def _measure_lag(self):
+        self._loop_thread_id = threading.get_ident()
+        while True:
+            await asyncio.sleep(self._interval)
+
+            now = time.monotonic()
+            with self._lock:
+                lag = max(now - self._last_tick - self._interval, 0)
+                self._last_tick = now
+                stall, self._stall = self._stall, None
+                if stall is not None:
+                    stall['duration'] = lag + self._interval
+
+            HISTOGRAMS.record(self._metric, lag)
+
+            if stall is not None:
+                LOGGER.warning(f'Event loop was blocked for {stall["duration"]:.3f} '
+                               f'seconds, blocking code:\n{stall["stack"]}')
+
+    def _watch(self):
+        while not self._stopped.wait(self._threshold / 2):
+            with self._lock:
+                if self._stall is not None or self._loop_thread_id is None:
+                    continue
+                blocked_for = time.monotonic() - self._last_tick - self._interval
+                if blocked_for < self._threshold:
+                    continue
+
+                frame = sys._current_frames().get(self._loop_thread_id)
+                self._stall = {
+                    'time': time.time() - blocked_for,
+                    'duration': blocked_for,
+                    'stack': ''.join(traceback.format_stack(frame)) if frame else '',
+                }
+                self.slow_callbacks.append(self._stall)
+                self.slow_callbacks_count += 1
+
+
+_loop_monitor = None
+
+
+def get_loop_monitor():
+    return _loop_monitor
+
+
+def start_loop_monitor(loop, metric, interval=0.1, slow_callback_threshold=0.1):
+    """Start monitoring of the loop, replacing the global monitor.
+    """
+    global _loop_monitor
+
+    if _loop_monitor is not None:
+        _loop_monitor.stop()
+    _loop_monitor = LoopMonitor(loop, metric, interval, slow_callback_threshold)
+    _loop_monitor.start()
+    return _loop_monitor
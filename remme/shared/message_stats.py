@@ -0,0 +1,138 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Statistics of requests to the validator by message type.
+
+Every request is split into stages, each of them having a latency histogram
+named `zmq.<MESSAGE_TYPE>.<stage>` in the histograms registry:
+
+- `send_wait`, from the request until the message is written to the socket,
+  including backoff of a full socket;
+- `round_trip`, from writing the message until the reply is received;
+- `parse`, parsing of the reply content;
+- `to_dict`, conversion of the parsed reply to a dict.
+
+Counters are updated from the event loop thread only.
+"""
+
+from collections import defaultdict
+from functools import lru_cache
+
+from sawtooth_sdk.protobuf.validator_pb2 import Message
+
+from remme.shared.histograms import HISTOGRAMS, QUANTILE_NAMES, LatencyHistogram
+
+
+SEND_WAIT = 'send_wait'
+ROUND_TRIP = 'round_trip'
+PARSE = 'parse'
+TO_DICT = 'to_dict'
+STAGES = (SEND_WAIT, ROUND_TRIP, PARSE, TO_DICT)
+
+_COUNTERS = (
+    ('remme_zmq_requests_total', 'counter', 'requests',
+     'Requests sent to the validator.'),
+    ('remme_zmq_in_flight', 'gauge', 'in_flight',
+     'Requests waiting for the validator reply.'),
+    ('remme_zmq_timeouts_total', 'counter', 'timeouts',
+     'Requests timed out waiting for the validator reply.'),
+)
+
+
+@lru_cache(maxsize=None)
+def get_message_type_name(message_type):
+    try:
+        return Message.MessageType.Name(message_type)
+    except ValueError:
+        return str(message_type)
+
+
+class MessageStats:
+    """Counters and latency histograms of validator requests.
+    """
+
+    def __init__(self, histograms=HISTOGRAMS):
+        """
+        :param histograms: `HistogramsRegistry` to record stages to.
+        """
+        self._histograms = histograms
+        self._names = {}
+        self._counters = defaultdict(lambda: {
+            'requests': 0,
+            'in_flight': 0,
+            'timeouts': 0,
+        })
+
+    def _get_name(self, message_type):
+        name = self._names.get(message_type)
+        if name is None:
+            name = self._names[message_type] = get_message_type_name(message_type)
+        return name
+
+    def record(self, message_type, stage, seconds):
+        """Count duration of the request stage.
+
+        :param message_type: `Message.MessageType` of the request.
+        :param stage: one of `STAGES`.
+        :param seconds: duration in seconds.
+        """
+        self._histograms.record(f'zmq.{self._get_name(message_type)}.{stage}', seconds)
+
+    def request_started(self, message_type):
+        counters = self._counters[self._get_name(message_type)]
+        counters['requests'] += 1
+        counters['in_flight'] += 1
+
+    def request_finished(self, message_type):
+        self._counters[self._get_name(message_type)]['in_flight'] -= 1
+
+    def request_timed_out(self, message_type):
+        self._counters[self._get_name(message_type)]['timeouts'] += 1
+
+    def get_stats(self):
+        """Get counters and stages quantiles by message type name.
+
+        :return: dict of message type name to counters and dicts of stage
+            name to its `count` and quantiles named like `p99`.
+        """
+        stats = {}
+        for name, counters in sorted(self._counters.items()):
+            stats[name] = dict(counters)
+            for stage in STAGES:
+                histogram = self._histograms.find(f'zmq.{name}.{stage}') \
+                    or LatencyHistogram()
+                stage_stats = {'count': histogram.count}
+                stage_stats.update(zip(QUANTILE_NAMES, histogram.get_quantiles()))
+                stats[name][stage] = stage_stats
+        return stats
+
+    def render_prometheus(self):
+        """Get counters in Prometheus text format.
+
+        Stages are rendered with the histograms registry.
+        """
+        lines = []
+        counters = sorted(self._counters.items())
+        for metric, metric_type, key, description in _COUNTERS:
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} {metric_type}')
+            for name, values in counters:
+                lines.append(f'{metric}{{message_type="{name}"}} {values[key]}')
+        return '\n'.join(lines) + '\n'
+
+
+MESSAGE_STATS = MessageStats()
+"""Global statistics of the validator requests.
+"""
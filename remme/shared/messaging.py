@@ -13,6 +13,7 @@
 # limitations under the License.
 # ------------------------------------------------------------------------
 
+import time
 import uuid
 import asyncio
 import logging
@@ -24,6 +25,11 @@ from aiozmq.stream import ZmqStream
 from google.protobuf.message import DecodeError
 from sawtooth_sdk.protobuf.validator_pb2 import Message
 
+from remme.shared.message_stats import (
+    MESSAGE_STATS, ROUND_TRIP, SEND_WAIT, get_message_type_name,
+)
+from remme.shared.tracing import TRACER
+
 
 LOGGER = logging.getLogger(__name__)
 
@@ -82,6 +88,7 @@ class _Sender:
         self._socket = socket
 
     async def send(self, message_type, message_content, timeout=None):
+        started = time.perf_counter()
         correlation_id = uuid.uuid4().hex
 
         self._msg_router.expect_reply(correlation_id)
@@ -98,17 +105,35 @@ class _Sender:
                            interval=200,
                            error=SendBackoffTimeoutError())
 
-        while True:
-            try:
-                self._socket.write([message.SerializeToString()])
-                break
-            except asyncio.CancelledError:  # pylint: disable=try-except-raise
-                raise
-            except zmq.error.Again as e:
-                await backoff.do_backoff(err_msg=repr(e))
-
-        return await self._msg_router.await_reply(correlation_id,
-                                                  timeout=timeout)
+        MESSAGE_STATS.request_started(message_type)
+        span = TRACER.span(f'zmq.{get_message_type_name(message_type)}',
+                           correlation_id=correlation_id)
+        try:
+            with span:
+                while True:
+                    try:
+                        self._socket.write([message.SerializeToString()])
+                        break
+                    except asyncio.CancelledError:  # pylint: disable=try-except-raise
+                        raise
+                    except zmq.error.Again as e:
+                        await backoff.do_backoff(err_msg=repr(e))
+
+                sent = time.perf_counter()
+                MESSAGE_STATS.record(message_type, SEND_WAIT, sent - started)
+                span.set_attribute(SEND_WAIT, sent - started)
+
+                try:
+                    reply = await self._msg_router.await_reply(correlation_id,
+                                                               timeout=timeout)
+                except asyncio.TimeoutError:
+                    MESSAGE_STATS.request_timed_out(message_type)
+                    raise
+
+                MESSAGE_STATS.record(message_type, ROUND_TRIP, time.perf_counter() - sent)
+                return reply
+        finally:
+            MESSAGE_STATS.request_finished(message_type)
 
 
 class _Receiver:
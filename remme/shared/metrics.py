@@ -17,17 +17,27 @@
 
 This module contains wrappers around metrics system to make metrics collection
 easy to use. The metric collection mechanism is based on InfluxDB.
+
+Points are not written on the caller's thread: they are appended to a bounded
+buffer and written to InfluxDB in batches by a background thread, so the
+latency of the metrics backend doesn't affect measured code. Points may also
+be written to local files (see `remme.shared.metrics_file`) to be analyzed
+without InfluxDB.
 """
 
+import atexit
 import logging
+import os
 import platform
+import threading
+from collections import deque
 from requests.exceptions import ConnectionError
-from concurrent.futures import ThreadPoolExecutor
 import time
-from datetime import datetime
 from influxdb import InfluxDBClient
 from influxdb.exceptions import InfluxDBClientError, InfluxDBServerError
 from remme.settings.default import load_toml_with_defaults
+from remme.shared.histograms import HISTOGRAMS
+from remme.shared.metrics_file import MetricsFileSink
 
 LOGGER = logging.getLogger(__name__)
 
@@ -59,6 +69,8 @@ class _TimeMeasurement:
     def done(self, noblock=False):
         """Sends the time metric to the collector.
 
+        The time is also counted in the in-process histogram of the metric.
+
         The metric format is
             {
                 'execution_time': stop_time - self._start_time
@@ -74,6 +86,7 @@ class _TimeMeasurement:
         values = {
             'execution_time': stop_time - self._start_time
         }
+        HISTOGRAMS.record(self._metric, values['execution_time'])
         self._metrics_sender.send_metric(self._metric, values, noblock)
 
 
@@ -83,12 +96,16 @@ class MetricsSender:
     This class performs the majority of routine related to metrics, such as
     connecting to InfluxDB and constructing requests.
     """
-    def __init__(self, address, port, user, password, db):
+    def __init__(self, address, port, user, password, db,
+                 buffer_size=10000, batch_size=500, flush_interval=1.0,
+                 reconnect_interval=10.0, file_sink=None):
         """Initialize metrics collection.
 
-        This wrapper tests the connection at the time of initialization. If the
-        connection was not successful no exception is thrown. Writing to such
-        connection with `send_metric` will have no effect.
+        No connection is made at the time of initialization, the background
+        worker connects on the first sent metric and reconnects after
+        failures, sent metrics are buffered until then.
+
+        Sending to InfluxDB is disabled if the address is empty.
 
         If the specified database does not exist this wrapper will try to create
         it.
@@ -98,52 +115,90 @@ class MetricsSender:
         :param user: InfluxDB user name.
         :param password: InfluxDB user password.
         :param db: The name of the database for metrics.
+        :param buffer_size: Optional. Maximum number of points waiting to be
+            sent, the oldest points are dropped on overflow.
+        :param batch_size: Optional. Maximum number of points in one write,
+            reaching it in the buffer triggers a write.
+        :param flush_interval: Optional. Maximum number of seconds points wait
+            in the buffer.
+        :param reconnect_interval: Optional. Number of seconds between
+            connection attempts.
+        :param file_sink: Optional. `MetricsFileSink` to write points to
+            along with InfluxDB.
         """
-        self._influxdb_client = InfluxDBClient(address, port, user, password)
-        self._thread_pool = ThreadPoolExecutor()
+        self._influxdb_client = InfluxDBClient(address, port, user, password) \
+            if address else None
+        self._file_sink = file_sink
+        self._address = address
+        self._port = port
+        self._db = db
         self._ready = False
+        self._connection_failures = 0
+
+        self._buffer_size = buffer_size
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._reconnect_interval = reconnect_interval
+        self._buffer = deque(maxlen=buffer_size)
+        self._file_buffer = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._worker = None
+        self._worker_pid = None
+        self._stats = {'sent': 0, 'written': 0, 'dropped': 0, 'failed': 0}
+
+    def _connect(self):
+        """Check the connection and create the database.
+
+        :return: `True` if metrics can be written.
+        """
+        address = f'{self._address}:{self._port}'
+        # Repeated failures are logged once until the connection is made
+        log_error = LOGGER.error if not self._connection_failures else LOGGER.debug
 
         try:
             self._influxdb_client.ping()
-            LOGGER.info(f'Successfully connected to the InfluxDB instance on '
-                        f'{address}:{port}.')
         except (InfluxDBClientError, InfluxDBServerError, ConnectionError):
-            LOGGER.error(f'Cannot connect to the InfluxDB instance on '
-                         f'{address}:{port}.')
-            return
+            log_error(f'Cannot connect to the InfluxDB instance on {address}, '
+                      f'retrying every {self._reconnect_interval} seconds.')
+            self._connection_failures += 1
+            return False
 
         try:
-            self._influxdb_client.create_database(db)
-            LOGGER.info(f'Created the `{db}` database in InfluxDB.')
+            self._influxdb_client.create_database(self._db)
+            LOGGER.info(f'Created the `{self._db}` database in InfluxDB.')
         except InfluxDBClientError:
             # The DB already exists
             pass
-        except InfluxDBServerError:
-            LOGGER.error(f'Caught server error while trying to create the '
-                         f'`{db}` database in InfluxDB.')
-            return
-
-        self._influxdb_client.switch_database(db)
+        except (InfluxDBServerError, ConnectionError):
+            log_error(f'Caught server error while trying to create the '
+                      f'`{self._db}` database in InfluxDB.')
+            self._connection_failures += 1
+            return False
+
+        self._influxdb_client.switch_database(self._db)
+        LOGGER.info(f'Successfully connected to the InfluxDB instance on {address}.')
+        self._connection_failures = 0
         self._ready = True
+        return True
 
     def send_metric(self, metric, values, noblock=False):
         """Send metrics to the database.
 
-        If the connection initialization was not successful, this method will do
-        nothing.
+        The point is buffered and written by the background worker, the call
+        never waits for the database. Points are kept in the buffer while
+        there is no connection.
 
         :param metric: The name of the metric (will be prefixed with "remme").
         :param values: The dict of values for the metric.
-        :param noblock: Optional. When set to `True` the call is non-blocking.
+        :param noblock: Optional. Kept for compatibility, the call is always
+            non-blocking.
 
         :Example:
 
         >>> metrics_sender = MetricsSender("localhost", 8086, "user", "password", "db")
         >>> metrics_sender.send_metric("processing_time", { "value": 100 })
         """
-        if not self._ready:
-            return
-
         if not isinstance(metric, str):
             raise ValueError(f'Metric name should be a string, got '
                              f'{type(metric)}.')
@@ -156,22 +211,136 @@ class MetricsSender:
             'tags': {
                 'hostname': platform.node()
             },
-            'time': datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            # Nanoseconds since the epoch
+            'time': int(time.time() * 1e9),
             'fields': values
         }
 
-        if noblock:
-            self._thread_pool.submit(self._write_point, data_point)
-        else:
-            self._write_point(data_point)
+        self._ensure_worker()
+
+        with self._lock:
+            for buffer, enabled in ((self._buffer, self._influxdb_client is not None),
+                                    (self._file_buffer, self._file_sink is not None)):
+                if not enabled:
+                    continue
+                if len(buffer) == self._buffer_size:
+                    self._stats['dropped'] += 1
+                buffer.append(data_point)
+
+            buffered = len(self._file_buffer)
+            if self._ready:
+                buffered = max(buffered, len(self._buffer))
+
+        if buffered >= self._batch_size:
+            self._flush_requested.set()
+
+    @property
+    def stats(self):
+        """Numbers of points sent to InfluxDB, written to the file, dropped on
+        overflow and failed to be written along with the number of points
+        buffered for InfluxDB.
+
+        Points dropped or failed to be written are counted once for every of
+        InfluxDB and the file.
+        """
+        with self._lock:
+            return {**self._stats, 'buffered': len(self._buffer)}
+
+    def flush(self):
+        """Write all buffered points on the caller's thread.
+
+        Points are kept in the buffer if there is no connection to InfluxDB.
+        """
+        if self._file_sink is not None:
+            self._write_file()
+
+        while self._ready and self._write_batch():
+            pass
+
+    def _ensure_worker(self):
+        # A worker thread doesn't survive fork, start a new one in the child
+        if self._worker_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._worker_pid == os.getpid():
+                return
+
+            if self._worker_pid is not None:
+                # Points inherited from the parent are sent by the parent
+                self._lock = threading.Lock()
+                self._flush_requested = threading.Event()
+                self._buffer.clear()
+                self._file_buffer.clear()
+
+            self._worker = threading.Thread(
+                target=self._run_worker, name='metrics-sender', daemon=True,
+            )
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def _run_worker(self):
+        next_connection = 0
+        while True:
+            if self._influxdb_client is not None and not self._ready \
+                    and time.monotonic() >= next_connection \
+                    and not self._connect():
+                next_connection = time.monotonic() + self._reconnect_interval
+
+            self._flush_requested.wait(self._flush_interval)
+            self._flush_requested.clear()
+            self.flush()
+
+    def _write_file(self):
+        with self._lock:
+            points = list(self._file_buffer)
+            self._file_buffer.clear()
+        if not points:
+            return
+
+        key = 'written' if self._file_sink.write(points) else 'failed'
+        with self._lock:
+            self._stats[key] += len(points)
+
+    def _write_batch(self):
+        """Write up to `batch_size` buffered points.
+
+        :return: `True` if there are more points to write.
+        """
+        with self._lock:
+            batch = [
+                self._buffer.popleft()
+                for _ in range(min(self._batch_size, len(self._buffer)))
+            ]
+        if not batch:
+            return False
 
-    def _write_point(self, data_point):
         try:
-            self._influxdb_client.write_points([data_point])
-        except InfluxDBClientError:
-            LOGGER.error(f'Failed to send metrics because of a client error.')
-        except InfluxDBServerError:
-            LOGGER.error(f'Failed to send metrics because of a server error.')
+            self._influxdb_client.write_points(batch)
+        except ConnectionError:
+            LOGGER.error(f'Lost connection to the InfluxDB instance on '
+                         f'{self._address}:{self._port}.')
+            self._ready = False
+            self._requeue(batch)
+            return False
+        except (InfluxDBClientError, InfluxDBServerError) as e:
+            LOGGER.error(f'Failed to send {len(batch)} metrics: {e}')
+            with self._lock:
+                self._stats['failed'] += len(batch)
+            return False
+
+        with self._lock:
+            self._stats['sent'] += len(batch)
+            return bool(self._buffer)
+
+    def _requeue(self, batch):
+        """Return not written points to the front of the buffer.
+        """
+        with self._lock:
+            # The oldest points are dropped the same way as on overflow
+            dropped = max(len(batch) - (self._buffer_size - len(self._buffer)), 0)
+            self._stats['dropped'] += dropped
+            self._buffer.extendleft(reversed(batch[dropped:]))
 
     def get_time_measurement(self, metric):
         """Used to measure execution times of different procedures.
@@ -197,7 +366,18 @@ METRICS_SENDER = MetricsSender(
     config['influxdb_port'],
     config['influxdb_user'],
     config['influxdb_password'],
-    config['influxdb_database']
+    config['influxdb_database'],
+    buffer_size=config['buffer_size'],
+    batch_size=config['batch_size'],
+    flush_interval=config['flush_interval'],
+    reconnect_interval=config['reconnect_interval'],
+    file_sink=MetricsFileSink(
+        config['file_path'],
+        max_bytes=config['file_max_bytes'],
+        backup_count=config['file_backup_count'],
+    ) if config['file_path'] else None,
 )
 """Global MetricsSender instance initialized from the configuration file.
 """
+
+atexit.register(METRICS_SENDER.flush)
@@ -0,0 +1,235 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Local files sink of metrics.
+
+Points are appended to a file in InfluxDB line protocol, so the files may
+be analyzed offline with `utils/execution_time_stats.py` or imported to
+InfluxDB later. When the file grows over the size limit it is rotated the
+same way `logging.handlers.RotatingFileHandler` does: `metrics.lp` becomes
+`metrics.lp.1`, `metrics.lp.1` becomes `metrics.lp.2` and so on.
+"""
+
+import logging
+import os
+import platform
+
+from influxdb.line_protocol import make_lines
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RotatingFile:
+    """File rotated by size.
+
+    The file is opened on the first write, so it may be created before the
+    process forks. The path may contain `{pid}` and `{hostname}` placeholders
+    to give every process its own file.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5):
+        """
+        :param path: path of the file, optionally with placeholders.
+        :param max_bytes: size of the file to rotate it at.
+        :param backup_count: number of rotated files to keep.
+        """
+        self._path_template = path
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._file = None
+        self._file_pid = None
+
+    @property
+    def path(self):
+        return self._path_template.format(pid=os.getpid(), hostname=platform.node())
+
+    def write(self, data):
+        """Append data to the file, rotating it if the size limit is reached.
+
+        :param data: bytes to write.
+        :raises OSError: if the file can't be written, it is closed then.
+        """
+        try:
+            file = self._get_file()
+            if file.tell() and file.tell() + len(data) > self._max_bytes:
+                file = self._rotate()
+            file.write(data)
+            file.flush()
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._file is not None and self._file_pid == os.getpid():
+            self._file.close()
+        self._file = None
+        self._file_pid = None
+
+    def _get_file(self):
+        # A file inherited by a forked process belongs to the parent
+        if self._file is None or self._file_pid != os.getpid():
+            path = self.path
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, 'ab')
+            self._file_pid = os.getpid()
+        return self._file
+
+    def _rotate(self):
+        path = self.path
+        self.close()
+
+        if self._backup_count > 0:
+            for index in range(self._backup_count - 1, 0, -1):
+                source = f'{path}.{index}'
+                if os.path.exists(source):
+                    os.replace(source, f'{path}.{index + 1}')
+            os.replace(path, f'{path}.1')
+        else:
+            os.remove(path)
+
+        return self._get_file()
+
+
+class MetricsFileSink:
+    """Writes points to rotated files, see `RotatingFile` for the path format.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5):
+        """
+        :param path: path of the file, optionally with placeholders.
+        :param max_bytes: size of the file to rotate it at.
+        :param backup_count: number of rotated files to keep.
+        """
+        self._file = RotatingFile(path, max_bytes, backup_count)
+
+    @property
+    def path(self):
+        return self._file.path
+
+    def write(self, points):
+        """Append points to the file.
+
+        :param points: list of points in the format of `write_points`.
+        :return: `True` if the points were written.
+        """
+        try:
+            self._file.write(make_lines({'points': points}).encode('utf-8'))
+        except OSError as e:
+            LOGGER.error(f'Failed to write {len(points)} metrics to the file: {e}')
+            return False
+        return True
+
+    def close(self):
+        self._file.close()
+
+
+def _split_escaped(text, separator, limit=-1):
+    """Split line protocol part by unescaped and unquoted separator.
+    """
+    parts = []
+    start = 0
+    index = 0
+    quoted = False
+    while index < len(text):
+        char = text[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif char == separator and not quoted and limit != len(parts):
+            parts.append(text[start:index])
+            start = index + 1
+        index += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _unescape(text):
+    result = []
+    index = 0
+    while index < len(text):
+        if text[index] == '\\' and index + 1 < len(text):
+            index += 1
+        result.append(text[index])
+        index += 1
+    return ''.join(result)
+
+
+def _parse_field_value(value):
+    if value.startswith('"'):
+        return _unescape(value[1:-1])
+    if value.endswith('i'):
+        return int(value[:-1])
+    if value in ('t', 'T', 'true', 'True', 'TRUE'):
+        return True
+    if value in ('f', 'F', 'false', 'False', 'FALSE'):
+        return False
+    return float(value)
+
+
+def parse_line(line):
+    """Parse a point in line protocol.
+
+    :return: tuple of measurement, tags dict, fields dict and timestamp
+        (in nanoseconds) or `None`.
+    :raises ValueError: if the line is malformed.
+    """
+    try:
+        key, fields, *timestamp = _split_escaped(line, ' ', limit=2)
+    except ValueError:
+        raise ValueError(f'Malformed metrics line: {line!r}')
+
+    measurement, *tags = _split_escaped(key, ',')
+    parsed_tags = {}
+    for tag in tags:
+        name, value = _split_escaped(tag, '=', limit=1)
+        parsed_tags[_unescape(name)] = _unescape(value)
+
+    parsed_fields = {}
+    for field in _split_escaped(fields, ','):
+        name, value = _split_escaped(field, '=', limit=1)
+        parsed_fields[_unescape(name)] = _parse_field_value(value)
+
+    return (
+        _unescape(measurement),
+        parsed_tags,
+        parsed_fields,
+        int(timestamp[0]) if timestamp and timestamp[0] else None,
+    )
+
+
+def read_points(paths):
+    """Read points from metrics files.
+
+    Malformed lines, which may be left by a process killed in the middle of
+    a write, are skipped.
+
+    :param paths: iterable of files paths.
+    :return: generator of tuples the same as `parse_line` returns.
+    """
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as file:
+            for line_number, line in enumerate(file, start=1):
+                line = line.rstrip('\n')
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    yield parse_line(line)
+                except ValueError:
+                    LOGGER.warning(f'Skipped malformed line {line_number} of {path}')
@@ -13,6 +13,7 @@
 # limitations under the License.
 # ------------------------------------------------------------------------
 
+import time
 import logging
 import asyncio
 from contextlib import suppress
@@ -55,6 +56,8 @@ from sawtooth_sdk.protobuf.client_block_pb2 import (
 from sawtooth_sdk.protobuf.validator_pb2 import Message
 
 from remme.settings import ZMQ_CONNECTION_TIMEOUT
+from remme.shared.message_stats import MESSAGE_STATS, PARSE, TO_DICT
+from remme.shared.tracing import TRACER
 from remme.shared.utils import (
     get_paging_controls,
     get_head_id,
@@ -88,8 +91,11 @@ class Router:
                 message_type=msg_type,
                 message_content=req.SerializeToString(),
                 timeout=ZMQ_CONNECTION_TIMEOUT)
-            resp = resp_proto()
-            resp.ParseFromString(msg.content)
+            started = time.perf_counter()
+            with TRACER.span(f'zmq.{PARSE}'):
+                resp = resp_proto()
+                resp.ParseFromString(msg.content)
+            MESSAGE_STATS.record(msg_type, PARSE, time.perf_counter() - started)
         except (DecodeError, AttributeError):
             raise ClientException(
                 'Failed to parse "content" string from validator')
@@ -102,7 +108,10 @@ class Router:
             LOGGER.exception(e)
             raise ClientException('Unexpected validator error')
 
-        data = message_to_dict(resp)
+        started = time.perf_counter()
+        with TRACER.span(f'zmq.{TO_DICT}'):
+            data = message_to_dict(resp)
+        MESSAGE_STATS.record(msg_type, TO_DICT, time.perf_counter() - started)
 
         with suppress(AttributeError):
             LOGGER.debug(f'The response parsed data: {data}')
@@ -364,6 +373,7 @@ class Router:
     #     )
 
     async def submit_batches(self, batches):
+        TRACER.set_attribute('batch_ids', [b.header_signature for b in batches])
         await self._handle_response(
             Message.CLIENT_BATCH_SUBMIT_REQUEST,
             ClientBatchSubmitResponse,
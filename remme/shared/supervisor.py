@@ -0,0 +1,153 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Supervisor of worker processes.
+
+Workers are started as separate processes, crashed ones are restarted with
+an exponential backoff, all of them are stopped with the supervisor.
+
+Workers are not daemonic, so they may start processes of their own, e.g. a
+process pool of signature verifications, and `stop` terminates and joins
+them explicitly.
+"""
+
+import logging
+import multiprocessing
+import signal
+import time
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Seconds between checks of the workers state
+POLL_INTERVAL = 1
+# Delay before restarting a crashed worker, doubled on every crash in a row
+RESTART_BACKOFF_MIN = 1
+RESTART_BACKOFF_MAX = 60
+# Worker that lived longer than this (in seconds) resets its restart backoff
+HEALTHY_UPTIME = 60
+# Seconds to wait for workers to stop gracefully before killing them
+STOP_TIMEOUT = 10
+
+
+class WorkerProcess:
+    """Worker process to run and restart.
+    """
+
+    def __init__(self, name, target, args=()):
+        """
+        :param name: name of the process.
+        :param target: function to run in the process.
+        :param args: arguments of the function.
+        """
+        self.name = name
+        self.target = target
+        self.args = args
+        self.process = None
+        self.started_at = None
+        self.restart_at = None
+        self.backoff = RESTART_BACKOFF_MIN
+        self.restarts = 0
+
+
+class ProcessSupervisor:
+    """Starts worker processes and restarts crashed ones.
+    """
+
+    def __init__(self, workers):
+        """
+        :param workers: list of `WorkerProcess`.
+        """
+        self._workers = list(workers)
+        self._running = False
+
+    @property
+    def workers(self):
+        return list(self._workers)
+
+    def _spawn(self, worker):
+        worker.process = multiprocessing.Process(
+            target=worker.target,
+            args=worker.args,
+            name=worker.name,
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+        LOGGER.info(f'Started worker {worker.name} with pid {worker.process.pid}')
+
+    def start(self):
+        self._running = True
+        for worker in self._workers:
+            self._spawn(worker)
+
+    def check(self):
+        """Check workers state, schedule and perform restarts of exited ones.
+        """
+        now = time.monotonic()
+        for worker in self._workers:
+            if worker.process.is_alive():
+                continue
+
+            if worker.restart_at is None:
+                if now - worker.started_at >= HEALTHY_UPTIME:
+                    worker.backoff = RESTART_BACKOFF_MIN
+
+                worker.restart_at = now + worker.backoff
+                LOGGER.error(f'Worker {worker.name} exited with code '
+                             f'{worker.process.exitcode}, restarting in '
+                             f'{worker.backoff} s')
+                worker.backoff = min(worker.backoff * 2, RESTART_BACKOFF_MAX)
+
+            elif now >= worker.restart_at:
+                worker.restarts += 1
+                self._spawn(worker)
+
+    def run(self):
+        """Start workers and supervise them until `stop` is called or
+        the supervisor process is interrupted.
+        """
+        self.start()
+
+        def _stop_handler(signum, frame):
+            self._running = False
+
+        signal.signal(signal.SIGTERM, _stop_handler)
+        try:
+            while self._running:
+                time.sleep(POLL_INTERVAL)
+                if self._running:
+                    self.check()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._running = False
+
+        for worker in self._workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            worker.process.join(max(deadline - time.monotonic(), 0))
+            if worker.process.is_alive():
+                LOGGER.warning(f'Worker {worker.name} did not stop in time, killing it')
+                worker.process.kill()
+                worker.process.join()
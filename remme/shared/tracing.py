@@ -0,0 +1,273 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Lightweight tracing of requests across REMME components.
+
+A trace is a tree of timed spans. The root span is started with
+`TRACER.trace()` and nested spans with `TRACER.span()`; the current span is
+tracked per asyncio task (per thread outside of the event loop), so nested
+spans don't need the parent to be passed to them.
+
+The validator doesn't propagate trace ids, so traces of transactions are
+identified by the transaction header signature: the RPC API sets it as the
+id of the request trace once the transaction is decoded, and transaction
+processors use it as the id of the execution trace. Whether a trace is
+sampled is decided by the hash of its id, so both parts of a transaction
+trace are either exported or not.
+
+Sampled traces are exported as JSON lines, one span per line:
+
+    {"trace_id": ..., "span_id": ..., "parent_id": ..., "name": ...,
+     "start": <seconds since the epoch>, "duration": <seconds>,
+     "hostname": ..., "pid": ..., "attributes": {...}}
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import platform
+import threading
+import time
+import uuid
+import weakref
+
+from remme.settings.default import load_toml_with_defaults
+from remme.shared.metrics_file import RotatingFile
+
+
+LOGGER = logging.getLogger(__name__)
+
+_current_task = getattr(asyncio, 'current_task', None) or asyncio.Task.current_task
+
+
+def _get_current_task():
+    try:
+        return _current_task()
+    except RuntimeError:
+        # No event loop in the thread
+        return None
+
+
+class _NoSpan:
+    """Span of not traced code, doing nothing.
+    """
+
+    trace_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+class _Trace:
+
+    __slots__ = ('id', 'spans')
+
+    def __init__(self, trace_id=None):
+        self.id = trace_id or uuid.uuid4().hex
+        self.spans = []
+
+
+class Span:
+    """Timed operation of a trace, used as a context manager.
+    """
+
+    __slots__ = ('_tracer', '_trace', '_previous', '_started', 'span_id',
+                 'parent_id', 'name', 'attributes', 'start', 'duration')
+
+    def __init__(self, tracer, trace, parent_id, name, attributes):
+        self._tracer = tracer
+        self._trace = trace
+        self._previous = None
+        self._started = None
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = None
+        self.duration = None
+
+    @property
+    def trace_id(self):
+        return self._trace.id
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self._previous = self._tracer.current_span()
+        self._tracer._set_current_span(self)
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self._started
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self._tracer._set_current_span(self._previous)
+
+        self._trace.spans.append(self)
+        if self.parent_id is None:
+            self._tracer._finish_trace(self._trace)
+        return False
+
+    def to_dict(self):
+        return {
+            'trace_id': self._trace.id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'duration': self.duration,
+            'attributes': self.attributes,
+        }
+
+
+class SpanFileExporter:
+    """Writes spans to rotated files in JSON lines.
+
+    See `remme.shared.metrics_file.RotatingFile` for the path format.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5):
+        self._file = RotatingFile(path, max_bytes, backup_count)
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        process = {'hostname': platform.node(), 'pid': os.getpid()}
+        data = ''.join(
+            json.dumps({**span.to_dict(), **process}, default=str) + '\n'
+            for span in spans
+        ).encode('utf-8')
+
+        with self._lock:
+            try:
+                self._file.write(data)
+            except OSError as e:
+                LOGGER.error(f'Failed to export {len(spans)} spans: {e}')
+
+
+class Tracer:
+    """Starts spans and exports sampled traces.
+    """
+
+    def __init__(self, sample_rate=0.0, exporter=None):
+        """
+        :param sample_rate: share of traces to export, from 0 to 1, tracing
+            is disabled if it is 0.
+        :param exporter: exporter of sampled traces, tracing is disabled if
+            it isn't set.
+        """
+        self._sample_rate = sample_rate
+        self._exporter = exporter
+        self._task_spans = weakref.WeakKeyDictionary()
+        self._thread_spans = threading.local()
+
+    @property
+    def enabled(self):
+        return self._sample_rate > 0 and self._exporter is not None
+
+    def is_sampled(self, trace_id):
+        digest = hashlib.sha256(trace_id.encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big') < self._sample_rate * 2 ** 64
+
+    def current_span(self):
+        """Get the innermost started span of the current task or thread.
+
+        :return: `Span` or `None` if nothing is traced.
+        """
+        if not self.enabled:
+            return None
+
+        task = _get_current_task()
+        if task is not None:
+            return self._task_spans.get(task)
+        return getattr(self._thread_spans, 'span', None)
+
+    def _set_current_span(self, span):
+        task = _get_current_task()
+        if task is not None:
+            if span is None:
+                self._task_spans.pop(task, None)
+            else:
+                self._task_spans[task] = span
+        else:
+            self._thread_spans.span = span
+
+    def trace(self, name, trace_id=None, **attributes):
+        """Start the root span of a trace.
+
+        :param name: name of the span.
+        :param trace_id: Optional. Id of the trace, if it is known beforehand
+            the trace isn't recorded at all when it isn't sampled.
+        :param attributes: attributes of the span.
+        :return: span context manager.
+        """
+        if not self.enabled or trace_id is not None and not self.is_sampled(trace_id):
+            return NO_SPAN
+        return Span(self, _Trace(trace_id), None, name, attributes)
+
+    def span(self, name, **attributes):
+        """Start a span nested to the current one.
+
+        :return: span context manager, doing nothing if nothing is traced.
+        """
+        parent = self.current_span()
+        if parent is None:
+            return NO_SPAN
+        return Span(self, parent._trace, parent.span_id, name, attributes)
+
+    def set_trace_id(self, trace_id):
+        """Change id of the current trace, e.g. to the transaction id.
+        """
+        span = self.current_span()
+        if span is not None:
+            span._trace.id = trace_id
+
+    def set_attribute(self, key, value):
+        """Set attribute of the current span.
+        """
+        span = self.current_span()
+        if span is not None:
+            span.set_attribute(key, value)
+
+    def _finish_trace(self, trace):
+        if self.is_sampled(trace.id):
+            self._exporter.export(trace.spans)
+
+
+config = load_toml_with_defaults('/config/remme-client-config.toml')['remme']['tracing']
+
+TRACER = Tracer(
+    sample_rate=config['sample_rate'],
+    exporter=SpanFileExporter(
+        config['file_path'],
+        max_bytes=config['file_max_bytes'],
+        backup_count=config['file_backup_count'],
+    ) if config['file_path'] else None,
+)
+"""Global Tracer instance initialized from the configuration file.
+"""
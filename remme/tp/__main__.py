@@ -17,13 +17,19 @@
 
 import argparse
 
-from sawtooth_sdk.processor.core import TransactionProcessor
-
 from remme.tp.atomic_swap import AtomicSwapHandler
 from remme.tp.pub_key import PubKeyHandler
 from remme.tp.account import AccountHandler
+from remme.tp.basic import set_event_format
 from remme.shared.logging_setup import setup_logging
 from remme.settings.default import load_toml_with_defaults
+from remme.shared.event_data import BINARY_EVENT_FORMAT, EVENT_FORMATS
+from remme.tp.verification import (
+    THREAD_EXECUTOR, VERIFICATION_EXECUTORS, set_verification_executor,
+)
+from remme.tp.workers import (
+    get_workers_families, parse_family_workers, run_processor, WorkersSupervisor,
+)
 
 
 TP_HANDLERS = {
@@ -35,16 +41,46 @@ if __name__ == '__main__':
     config = load_toml_with_defaults('/config/remme-client-config.toml')['remme']['client']
     parser = argparse.ArgumentParser(description='Transaction processor.')
     parser.add_argument('-v', '--verbosity', type=int, default=2)
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='number of processes serving all selected families')
+    parser.add_argument('--families', default=','.join(TP_HANDLERS),
+                        help='comma separated families served by --workers processes')
+    parser.add_argument('--family-workers', action='append', default=[], metavar='FAMILY=N',
+                        help='run N additional processes dedicated to FAMILY')
+    parser.add_argument('--verification-executor', choices=VERIFICATION_EXECUTORS,
+                        default=THREAD_EXECUTOR,
+                        help='where to run signature verifications')
+    parser.add_argument('--verification-workers', type=int, default=None,
+                        help='number of verification pool workers per process')
+    parser.add_argument('--event-format', choices=EVENT_FORMATS, default=BINARY_EVENT_FORMAT,
+                        help='format of changed entities in emitted events')
     args = parser.parse_args()
     setup_logging('remme-tp', args.verbosity)
 
-    processor = TransactionProcessor(url=f'tcp://{ config["validator_ip"] }:{ config["validator_port"] }')
+    set_event_format(args.event_format)
+
+    # Pools are created lazily, so every worker process gets its own one
+    set_verification_executor(args.verification_executor, args.verification_workers)
+
+    families = [family for family in args.families.split(',') if family]
+    unknown = set(families) - set(TP_HANDLERS)
+    if unknown:
+        parser.error(f'unknown families: {", ".join(sorted(unknown))}')
+    if args.workers < 0:
+        parser.error('number of workers should not be negative')
 
-    for handler in TP_HANDLERS.values():
-        processor.add_handler(handler)
     try:
-        processor.start()
-    except KeyboardInterrupt:
-        pass
-    finally:
-        processor.stop()
+        family_workers = parse_family_workers(args.family_workers, TP_HANDLERS)
+    except ValueError as e:
+        parser.error(str(e))
+
+    workers_families = get_workers_families(args.workers, families, family_workers)
+    if not workers_families:
+        parser.error('no workers to run')
+
+    url = f'tcp://{ config["validator_ip"] }:{ config["validator_port"] }'
+
+    if len(workers_families) == 1:
+        run_processor(url, [TP_HANDLERS[family] for family in workers_families[0]])
+    else:
+        WorkersSupervisor(url, TP_HANDLERS, workers_families).run()
@@ -135,7 +135,12 @@ class AccountHandler(BasicHandler):
             f'Transferred {transfer_payload.value} tokens from {address_from} to {transfer_payload.address_to}.',
         )
 
-        return {
+        transfer_state = {
             address_from: signer_account,
             transfer_payload.address_to: receiver_account,
         }
+
+        # make the transfer visible to the rest of the processor (e.g. store-and-pay or swap init)
+        context.set_cached_data(transfer_state)
+
+        return transfer_state
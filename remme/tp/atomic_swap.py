@@ -33,7 +33,7 @@ from remme.clients.account import AccountClient
 from remme.clients.block_info import BlockInfoClient, CONFIG_ADDRESS
 from remme.protos.block_info_pb2 import BlockInfo, BlockInfoConfig
 
-from remme.shared.constants import Events, EMIT_EVENT
+from remme.shared.constants import Events, EMIT_EVENT, EVENT_SWAP_ID_ATTRIBUTE
 from remme.shared.forms import (
     AtomicSwapInitPayloadForm,
     AtomicSwapApprovePayloadForm,
@@ -48,6 +48,7 @@ from .basic import (
     get_data,
     PROCESSOR,
     PB_CLASS,
+    PRELOAD,
     VALIDATOR,
 )
 
@@ -70,6 +71,15 @@ NON_INITIATOR_TIME_DELTA_LOCK = datetime.timedelta(hours=NON_INTIATOR_TIME_LOCK)
 NOT_PERMITTED_TO_CHANGE_SWAP_STATUSES = (AtomicSwapInfo.CLOSED, AtomicSwapInfo.EXPIRED)
 
 
+def get_latest_block_info_address(context):
+    """
+    Get address of the latest block information, the block info config should be already loaded.
+    """
+    block_info_config = get_data(context, BlockInfoConfig, CONFIG_ADDRESS)
+    if block_info_config:
+        yield BlockInfoClient.create_block_address(block_info_config.latest_block)
+
+
 class AtomicSwapHandler(BasicHandler):
 
     """Atomic swap implementation.
@@ -81,6 +91,14 @@ class AtomicSwapHandler(BasicHandler):
     def __init__(self):
         super().__init__(FAMILY_NAME, FAMILY_VERSIONS)
 
+    def get_event_filter_attributes(self, updated_state):
+        attributes = super().get_event_filter_attributes(updated_state)
+        attributes += [
+            (EVENT_SWAP_ID_ATTRIBUTE, entity.swap_id)
+            for entity in updated_state.values() if isinstance(entity, AtomicSwapInfo)
+        ]
+        return attributes
+
     def get_state_processor(self):
         return {
             AtomicSwapMethod.INIT: {
@@ -88,6 +106,10 @@ class AtomicSwapHandler(BasicHandler):
                 PROCESSOR: self._swap_init,
                 EMIT_EVENT: Events.SWAP_INIT.value,
                 VALIDATOR: AtomicSwapInitPayloadForm,
+                PRELOAD: (
+                    (CONFIG_ADDRESS, _make_settings_key(SETTINGS_SWAP_COMMISSION)),
+                    (get_latest_block_info_address,),
+                ),
             },
             AtomicSwapMethod.APPROVE: {
                 PB_CLASS: AtomicSwapApprovePayload,
@@ -100,6 +122,10 @@ class AtomicSwapHandler(BasicHandler):
                 PROCESSOR: self._swap_expire,
                 EMIT_EVENT: Events.SWAP_EXPIRE.value,
                 VALIDATOR: AtomicSwapExpirePayloadForm,
+                PRELOAD: (
+                    (CONFIG_ADDRESS,),
+                    (get_latest_block_info_address,),
+                ),
             },
             AtomicSwapMethod.SET_SECRET_LOCK: {
                 PB_CLASS: AtomicSwapSetSecretLockPayload,
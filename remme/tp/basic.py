@@ -23,8 +23,13 @@ from sawtooth_sdk.processor.exceptions import InternalError, InvalidTransaction
 from sawtooth_sdk.protobuf.transaction_pb2 import TransactionHeader
 
 from remme.protos.transaction_pb2 import TransactionPayload
+from remme.shared.event_data import (
+    BINARY_EVENT_FORMAT, EVENT_FORMATS, JSON_EVENT_FORMAT, encode_entities,
+)
+from remme.shared.constants import EVENT_ADDRESS_ATTRIBUTE
 from remme.shared.utils import hash512, Singleton, from_proto_to_dict
 from remme.shared.metrics import METRICS_SENDER
+from remme.shared.tracing import TRACER
 
 from .context import CacheContextService
 
@@ -36,6 +41,8 @@ EMIT_EVENT = 'emit_event'
 PB_CLASS = 'pb_class'
 PROCESSOR = 'processor'
 VALIDATOR = 'validator'
+# Stages of derived addresses to preload before the processor is called
+PRELOAD = 'preload'
 
 
 def is_address(address):
@@ -48,10 +55,28 @@ def is_address(address):
         return False
 
 
-def add_event(context, event_type, attributes):
+_event_format = BINARY_EVENT_FORMAT
+
+
+def set_event_format(event_format):
+    """Set format of changed entities in emitted events.
+
+    :param event_format: "binary" to put them to the event data, "json" to
+        put them to the `entities_changed` attribute, or "both".
+    """
+    global _event_format
+
+    if event_format not in EVENT_FORMATS:
+        raise ValueError(f'Unknown event format "{event_format}", '
+                         f'expected one of: {", ".join(EVENT_FORMATS)}')
+    _event_format = event_format
+
+
+def add_event(context, event_type, attributes, data=None):
     context.add_event(
         event_type=event_type,
-        attributes=attributes)
+        attributes=attributes,
+        data=data)
 
 
 def get_event_attributes(updated_state, header_signature):
@@ -105,6 +130,12 @@ class BasicHandler(metaclass=Singleton):
     def get_state_processor(self):
         raise InternalError('No implementation for `get_state_processor`')
 
+    def get_event_filter_attributes(self, updated_state):
+        """Attributes of the emitted event to filter event subscriptions by
+        in the validator, the address of every changed entity by default.
+        """
+        return [(EVENT_ADDRESS_ATTRIBUTE, address) for address in updated_state]
+
     def get_message_factory(self, signer=None):
         return MessageFactory(
             family_name=self.family_name,
@@ -137,6 +168,11 @@ class BasicHandler(metaclass=Singleton):
                 protos/processor.proto#L81
             - https://github.com/hyperledger/sawtooth-core/blob/master/sdk/python/sawtooth_sdk/processor/context.py
         """
+        # The RPC API traces the transaction submission with the same id
+        with TRACER.trace(f'tp.{self._family_name}', trace_id=transaction.signature):
+            self._apply(transaction, context)
+
+    def _apply(self, transaction, context):
         try:
             transaction_payload = TransactionPayload()
             transaction_payload.ParseFromString(transaction.payload)
@@ -152,27 +188,46 @@ class BasicHandler(metaclass=Singleton):
         except KeyError:
             raise InvalidTransaction(f'Invalid account method value ({transaction_payload.method}) has been set.')
 
-        validator = validator_class.load_proto(data_pb)
-        if not validator.validate():
+        TRACER.set_attribute('method', transaction_payload.method)
+
+        with TRACER.span('tp.validate'):
+            is_valid, errors = validator_class.validate_proto(data_pb)
+        if not is_valid:
             raise InvalidTransaction(f'Invalid protobuf data of '
-                                     f'"{validator._pb_class.__name__}", '
-                                     f'detailed: {validator.errors}')
+                                     f'"{data_pb.__class__.__name__}", '
+                                     f'detailed: {errors}')
 
         measurement = METRICS_SENDER.get_time_measurement(
             f'tp.{self._family_name}.{transaction_payload.method}'
         )
 
         context_service = CacheContextService(context=context)
-        context_service.preload_state(transaction.header.inputs)
-        updated_state = processor(context_service, transaction.header.signer_public_key, data_pb)
-
-        context_service.set_state({k: v.SerializeToString() for k, v in updated_state.items()})
+        with TRACER.span('tp.preload_state'):
+            context_service.preload_state(
+                transaction.header.inputs,
+                state_processor[transaction_payload.method].get(PRELOAD, ()),
+            )
+        with TRACER.span('tp.process'):
+            updated_state = processor(context_service, transaction.header.signer_public_key, data_pb)
+
+        with TRACER.span('tp.flush_state'):
+            context_service.set_cached_data(updated_state)
+            context_service.flush()
 
         event_name = state_processor[transaction_payload.method].get(EMIT_EVENT, None)
 
         if event_name:
-            event_attributes = get_event_attributes(updated_state, transaction.signature)
-            add_event(context_service, event_name, event_attributes)
+            event_attributes = [('header_signature', transaction.signature)]
+            event_data = None
+
+            if _event_format != BINARY_EVENT_FORMAT:
+                event_attributes = get_event_attributes(updated_state, transaction.signature)
+            if _event_format != JSON_EVENT_FORMAT:
+                event_data = encode_entities(updated_state)
+            event_attributes += self.get_event_filter_attributes(updated_state)
+
+            with TRACER.span('tp.emit_event'):
+                add_event(context_service, event_name, event_attributes, event_data)
 
         measurement.done()
 
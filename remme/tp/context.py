@@ -10,22 +10,95 @@ from remme.settings import STATE_TIMEOUT_SEC
 logger = logging.getLogger(__name__)
 
 
+def _is_authorized(address, inputs):
+    return any(address.startswith(prefix) for prefix in inputs)
+
+
 class CacheContextService:
+    """Transaction context wrapper with a per-transaction state cache.
+
+    Raw state entries are kept as they come from the validator and are
+    parsed at most once per (address, protobuf class). Parsed messages are
+    shared between lookups, so changes made to them by one processor step are
+    seen by the next one.
+
+    Entries written with `set_cached_data` form a read-your-writes overlay:
+    later reads of the same address return the written message, and only
+    those dirty entries are serialized and sent on `flush`.
+    """
 
     def __init__(self, context):
         self._storage = {}
+        self._parsed = {}
+        self._dirty = {}
         self._context = context
 
-    def preload_state(self, addresses):
-        addresses = list(filter(lambda a: len(a) == 70, addresses))
-        entries = self.get_state(addresses)
-        for i, entry in enumerate(entries):
-            self._storage[entry.address] = entry.data
+    def preload_state(self, addresses, dependencies=()):
+        """Load transaction inputs and derived addresses into the cache.
+
+        Only full addresses are requested from the inputs, namespace inputs
+        are used to authorize derived addresses. Dependencies are resolved
+        stage by stage with one `get_state` request per stage, so addresses
+        of a stage may be computed from the data loaded on previous ones.
+
+        :param addresses: list of transaction inputs.
+        :param dependencies: sequence of stages, where each stage is a
+            sequence of addresses or callables that get this context service
+            and return an iterable of addresses.
+        """
+        inputs = list(addresses)
+        to_load = [a for a in inputs if len(a) == 70]
+
+        for stage in (tuple(dependencies) or ((),)):
+            for dependency in stage:
+                to_load.extend(self._resolve_dependency(dependency))
+
+            to_load = [
+                address for address in dict.fromkeys(to_load)
+                if address not in self._storage
+                and _is_authorized(address, inputs)
+            ]
+            if to_load:
+                entries = self.get_state(to_load)
+                for entry in entries:
+                    self._storage[entry.address] = entry.data
+                # The validator omits empty addresses, remember them as well
+                for address in to_load:
+                    self._storage.setdefault(address, None)
+            to_load = []
 
         logger.debug(f'Stored data for addresses: {self._storage}')
 
+    def _resolve_dependency(self, dependency):
+        if isinstance(dependency, str):
+            return [dependency]
+
+        try:
+            return list(dependency(self))
+        except Exception as e:
+            # The processor will request the data itself and fail properly
+            logger.debug(f'Failed to resolve dependency {dependency}: {e}')
+            return []
+
     def get_cached_data(self, resolvers, timeout=STATE_TIMEOUT_SEC):
         for address, pb_class in resolvers:
+            try:
+                pb = self._dirty[address]
+            except KeyError:
+                pass
+            else:
+                if isinstance(pb, pb_class):
+                    logger.debug(f'Got written data for address "{address}"')
+                    yield pb
+                    continue
+                self._storage[address] = pb.SerializeToString()
+
+            try:
+                yield self._parsed[(address, pb_class)]
+                continue
+            except KeyError:
+                pass
+
             try:
                 data = self._storage[address]
                 logger.debug('Got loaded data for address '
@@ -51,12 +124,42 @@ class CacheContextService:
             try:
                 pb = pb_class()
                 pb.ParseFromString(data)
-                yield pb
             except ParseError:
                 raise InternalError('Failed to deserialize data')
             except Exception as e:
                 logger.exception(e)
                 yield None
+            else:
+                self._parsed[(address, pb_class)] = pb
+                yield pb
+
+    def set_cached_data(self, entries):
+        """Put messages to the write overlay and mark them as dirty.
+
+        :param entries: dict of address to protobuf message.
+        """
+        for address, pb in entries.items():
+            stale_keys = [key for key in self._parsed if key[0] == address]
+            for key in stale_keys:
+                del self._parsed[key]
+
+            self._dirty[address] = pb
+            self._parsed[(address, pb.__class__)] = pb
+
+    def flush(self, timeout=STATE_TIMEOUT_SEC):
+        """Serialize dirty entries and write them to the state.
+        """
+        if not self._dirty:
+            return []
+
+        entries = {address: pb.SerializeToString()
+                   for address, pb in self._dirty.items()}
+        self._dirty = {}
+
+        for address, data in entries.items():
+            self._storage[address] = data
+
+        return self.set_state(entries, timeout)
 
     def get_state(self, addresses, timeout=STATE_TIMEOUT_SEC):
         return self._context.get_state(addresses, timeout)
@@ -14,6 +14,7 @@
 # ------------------------------------------------------------------------
 
 import copy
+import functools
 import logging
 import hashlib
 import abc
@@ -42,16 +43,17 @@ from remme.protos.pub_key_pb2 import (
     RevokePubKeyPayload,
     PubKeyMethod,
 )
-from remme.settings.helper import _get_setting_value
+from remme.settings.helper import _get_setting_value, _make_settings_key
 from remme.shared.forms import (
     NewPublicKeyPayloadForm,
     RevokePubKeyPayloadForm,
     NewPubKeyStoreAndPayPayloadForm,
 )
 from .basic import (
-    BasicHandler, PB_CLASS, VALIDATOR, PROCESSOR, get_multiple_data, get_data
+    BasicHandler, PB_CLASS, VALIDATOR, PROCESSOR, PRELOAD, get_multiple_data, get_data
 )
 from .account import AccountHandler
+from .verification import VerificationCache, get_verification_executor
 
 LOGGER = logging.getLogger(__name__)
 
@@ -62,8 +64,116 @@ PUB_KEY_ORGANIZATION = 'REMME'
 PUB_KEY_MAX_VALIDITY = timedelta(365)
 PUB_KEY_STORE_PRICE = 10
 
+ECONOMY_IS_ENABLED_KEY = 'remme.economy_enabled'
 ECONOMY_IS_ENABLED_VALUE = 'true'
 
+VERIFICATION_CACHE = VerificationCache(metric='tp.pub_key.verification_cache')
+
+# Number of deserialized public keys to keep for repeated verifications
+PUBLIC_KEYS_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=PUBLIC_KEYS_CACHE_SIZE)
+def _load_rsa_public_key(key):
+    return load_der_public_key(key, default_backend())
+
+
+@functools.lru_cache(maxsize=PUBLIC_KEYS_CACHE_SIZE)
+def _load_ecdsa_public_key(key):
+    pub_key = secp256k1.PublicKey()
+    pub_key.deserialize(key)
+    return pub_key
+
+
+@functools.lru_cache(maxsize=PUBLIC_KEYS_CACHE_SIZE)
+def _load_ed25519_public_key(key):
+    return ed25519.VerifyingKey(key)
+
+
+@functools.lru_cache(maxsize=PUBLIC_KEYS_CACHE_SIZE)
+def _load_secp256k1_public_key(key_hex):
+    return Secp256k1PublicKey.from_hex(key_hex)
+
+
+def _get_hashes_algorithm(hashing_algorithm):
+    alg_name = NewPubKeyPayload.HashingAlgorithm.Name(hashing_algorithm)
+    return getattr(hashes, alg_name)
+
+
+def _get_hashlib_algorithm(hashing_algorithm):
+    alg_name = NewPubKeyPayload.HashingAlgorithm.Name(hashing_algorithm).lower()
+    return getattr(hashlib, alg_name)
+
+
+def _get_rsa_padding(rsa_padding, hashing_algorithm):
+    Padding = NewPubKeyPayload.RSAConfiguration.Padding
+    if rsa_padding == Padding.Value('PSS'):
+        return padding.PSS(mgf=padding.MGF1(_get_hashes_algorithm(hashing_algorithm)()),
+                           salt_length=padding.PSS.MAX_LENGTH)
+    elif rsa_padding == Padding.Value('PKCS1v15'):
+        return padding.PKCS1v15()
+    else:
+        raise NotImplementedError('Unsupported RSA padding')
+
+
+# Verification functions get only picklable arguments to be run in processes pool
+
+def verify_rsa_signature(key, rsa_padding, hashing_algorithm, message, signature):
+    try:
+        verifier = _load_rsa_public_key(key)
+    except ValueError:
+        raise InvalidTransaction(
+            'Cannot deserialize the provided public key. '
+            'Check if it is in DER format.')
+
+    try:
+        verifier.verify(signature, message,
+                        _get_rsa_padding(rsa_padding, hashing_algorithm),
+                        _get_hashes_algorithm(hashing_algorithm)())
+        return True
+    except Exception:
+        return False
+
+
+def verify_ecdsa_signature(key, hashing_algorithm, message, signature):
+    try:
+        pub_key = _load_ecdsa_public_key(key)
+
+        assert pub_key.public_key, "No public key defined"
+
+        if pub_key.flags & lib.SECP256K1_CONTEXT_VERIFY != \
+           lib.SECP256K1_CONTEXT_VERIFY:
+            raise Exception("instance not configured for sig verification")
+
+        msg_digest = _get_hashlib_algorithm(hashing_algorithm)(message).digest()
+        raw_sig = pub_key.ecdsa_deserialize_compact(signature)
+
+        verified = lib.secp256k1_ecdsa_verify(
+            pub_key.ctx, raw_sig, msg_digest, pub_key.public_key)
+    except Exception as e:
+        LOGGER.exception(e)
+        return False
+    else:
+        return bool(verified)
+
+
+def verify_ed25519_signature(key, hashing_algorithm, message, signature):
+    try:
+        verifier = _load_ed25519_public_key(key)
+        msg_digest = _get_hashlib_algorithm(hashing_algorithm)(message).digest()
+        verifier.verify(signature, msg_digest)
+        return True
+    except Exception:
+        return False
+
+
+def verify_secp256k1_signature(key_hex, message, signature):
+    return Secp256k1Context().verify(
+        signature=signature.hex(),
+        message=message,
+        public_key=_load_secp256k1_public_key(key_hex),
+    )
+
 
 def detect_processor_cls(config):
     if isinstance(config, NewPubKeyPayload.RSAConfiguration):
@@ -97,75 +207,67 @@ class BasePubKeyProcessor(metaclass=abc.ABCMeta):
         return self._config.key
 
     @abc.abstractmethod
+    def get_verification_call(self):
+        """Return verification function and its arguments
+        """
+
+    def verify_async(self, executor=None):
+        """Schedule signature verification with the verification executor.
+
+        Results are cached by the algorithm, configuration (key with its
+        parameters), entity hash and signature.
+
+        :return: `concurrent.futures.Future` with the verification result.
+        """
+        verification_function, *args = self.get_verification_call()
+        return VERIFICATION_CACHE.submit(
+            executor or get_verification_executor(),
+            f'{self.__class__.__name__}:{self._hashing_algorithm}',
+            self._config.SerializeToString(),
+            self._entity_hash,
+            self._entity_hash_signature,
+            verification_function,
+            *args,
+        )
+
     def verify(self):
         """Verify if signature was successfull
         """
+        return self.verify_async().result()
 
 
 class RSAProcessor(BasePubKeyProcessor):
 
-    def verify(self):
-        try:
-            verifier = load_der_public_key(self.get_public_key(),
-                                           default_backend())
-        except ValueError:
-            raise InvalidTransaction(
-                'Cannot deserialize the provided public key. '
-                'Check if it is in DER format.')
-
-        try:
-            verifier.verify(self._entity_hash_signature, self._entity_hash,
-                            self._get_padding(), self.get_hashing_algorithm()())
-            return True
-        except Exception:
-            return False
+    def get_verification_call(self):
+        return (
+            verify_rsa_signature,
+            self.get_public_key(),
+            self._config.padding,
+            self._hashing_algorithm,
+            self._entity_hash,
+            self._entity_hash_signature,
+        )
 
     def get_hashing_algorithm(self):
-        alg_name = NewPubKeyPayload.HashingAlgorithm \
-            .Name(self._hashing_algorithm)
-        return getattr(hashes, alg_name)
+        return _get_hashes_algorithm(self._hashing_algorithm)
 
     def _get_padding(self):
-        Padding = NewPubKeyPayload.RSAConfiguration.Padding
-        if self._config.padding == Padding.Value('PSS'):
-            return padding.PSS(mgf=padding.MGF1(self.get_hashing_algorithm()()),
-                               salt_length=padding.PSS.MAX_LENGTH)
-        elif self._config.padding == Padding.Value('PKCS1v15'):
-            return padding.PKCS1v15()
-        else:
-            raise NotImplementedError('Unsupported RSA padding')
+        return _get_rsa_padding(self._config.padding, self._hashing_algorithm)
 
 
 class ECDSAProcessor(BasePubKeyProcessor):
 
-    def verify(self):
-        try:
-            pub_key = secp256k1.PublicKey()
-            pub_key.deserialize(self.get_public_key())
-
-            assert pub_key.public_key, "No public key defined"
-
-            if pub_key.flags & lib.SECP256K1_CONTEXT_VERIFY != \
-               lib.SECP256K1_CONTEXT_VERIFY:
-                raise Exception("instance not configured for sig verification")
-
-            msg_digest = self.get_hashing_algorithm()(
-                self._entity_hash).digest()
-            raw_sig = pub_key.ecdsa_deserialize_compact(
-                self._entity_hash_signature)
-
-            verified = lib.secp256k1_ecdsa_verify(
-                pub_key.ctx, raw_sig, msg_digest, pub_key.public_key)
-        except Exception as e:
-            LOGGER.exception(e)
-            return False
-        else:
-            return bool(verified)
+    def get_verification_call(self):
+        return (
+            verify_ecdsa_signature,
+            self.get_public_key(),
+            self._hashing_algorithm,
+            self._entity_hash,
+            self._entity_hash_signature,
+        )
 
     def get_hashing_algorithm(self):
-        alg_name = NewPubKeyPayload.HashingAlgorithm \
-            .Name(self._hashing_algorithm).lower()
-        return getattr(hashlib, alg_name)
+        return _get_hashlib_algorithm(self._hashing_algorithm)
 
     def get_curve_type(self):
         raise NotImplementedError
@@ -173,19 +275,17 @@ class ECDSAProcessor(BasePubKeyProcessor):
 
 class Ed25519Processor(BasePubKeyProcessor):
 
-    def verify(self):
-        try:
-            verifier = ed25519.VerifyingKey(self.get_public_key())
-            msg_digest = self.get_hashing_algorithm()(self._entity_hash).digest()
-            verifier.verify(self._entity_hash_signature, msg_digest)
-            return True
-        except Exception:
-            return False
+    def get_verification_call(self):
+        return (
+            verify_ed25519_signature,
+            self.get_public_key(),
+            self._hashing_algorithm,
+            self._entity_hash,
+            self._entity_hash_signature,
+        )
 
     def get_hashing_algorithm(self):
-        alg_name = NewPubKeyPayload.HashingAlgorithm \
-            .Name(self._hashing_algorithm).lower()
-        return getattr(hashlib, alg_name)
+        return _get_hashlib_algorithm(self._hashing_algorithm)
 
 
 class PubKeyHandler(BasicHandler):
@@ -199,6 +299,9 @@ class PubKeyHandler(BasicHandler):
                 PB_CLASS: NewPubKeyPayload,
                 PROCESSOR: self._store_pub_key,
                 VALIDATOR: NewPublicKeyPayloadForm,
+                PRELOAD: (
+                    (_make_settings_key(ECONOMY_IS_ENABLED_KEY),),
+                ),
             },
             PubKeyMethod.REVOKE: {
                 PB_CLASS: RevokePubKeyPayload,
@@ -209,6 +312,9 @@ class PubKeyHandler(BasicHandler):
                 PB_CLASS: NewPubKeyStoreAndPayPayload,
                 PROCESSOR: self._store_public_key_for_other,
                 VALIDATOR: NewPubKeyStoreAndPayPayloadForm,
+                PRELOAD: (
+                    (_make_settings_key(ECONOMY_IS_ENABLED_KEY),),
+                ),
             }
         }
 
@@ -361,19 +467,31 @@ class PubKeyHandler(BasicHandler):
         owner_public_key_as_bytes = transaction_payload.owner_public_key
         owner_public_key_as_hex = owner_public_key_as_bytes.hex()
 
-        owner_secp256k1_public_key = Secp256k1PublicKey.from_hex(owner_public_key_as_hex)
-
-        is_owner_public_key_payload_signature_valid = Secp256k1Context().verify(
-            signature=transaction_payload.signature_by_owner.hex(),
-            message=new_public_key_payload.SerializeToString(),
-            public_key=owner_secp256k1_public_key,
+        # Fails early on malformed key, the parsed key is reused by the verification
+        _load_secp256k1_public_key(owner_public_key_as_hex)
+
+        new_public_key_payload_as_bytes = new_public_key_payload.SerializeToString()
+
+        # Both signatures are checked concurrently when executor has a pool
+        owner_signature_verification = VERIFICATION_CACHE.submit(
+            get_verification_executor(),
+            'secp256k1',
+            owner_public_key_as_bytes,
+            new_public_key_payload_as_bytes,
+            transaction_payload.signature_by_owner,
+            verify_secp256k1_signature,
+            owner_public_key_as_hex,
+            new_public_key_payload_as_bytes,
+            transaction_payload.signature_by_owner,
         )
-        if not is_owner_public_key_payload_signature_valid:
-            raise InvalidTransaction('Public key owner\'s signature is invalid.')
 
         processor = self._get_public_key_processor(transaction_payload=transaction_payload.pub_key_payload)
+        public_key_signature_verification = processor.verify_async()
 
-        if not processor.verify():
+        if not owner_signature_verification.result():
+            raise InvalidTransaction('Public key owner\'s signature is invalid.')
+
+        if not public_key_signature_verification.result():
             raise InvalidTransaction('Payed public key has invalid signature.')
 
         public_key = processor.get_public_key()
@@ -433,8 +551,8 @@ class PubKeyHandler(BasicHandler):
         """
         Send fixed tokens value from address to zero address.
         """
-        is_economy_enabled = _get_setting_value(context, 'remme.economy_enabled', 'true').lower()
-        if is_economy_enabled == 'true':
+        is_economy_enabled = _get_setting_value(context, ECONOMY_IS_ENABLED_KEY, ECONOMY_IS_ENABLED_VALUE).lower()
+        if is_economy_enabled == ECONOMY_IS_ENABLED_VALUE:
 
             transfer_state = self._charge_tokens_for_storing(
                 context=context, address_from=address_from, address_to=ZERO_ADDRESS,
@@ -0,0 +1,259 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Signature verification helpers for transaction processors.
+
+The validator executes the same transaction several times (when a block is
+published, when it is validated by peers and on replays after forks), so the
+results of signature verifications are cached between executions.
+
+Verifications themselves are run by a `VerificationExecutor`, either inline
+or in a dedicated thread or process pool, so several signatures of one
+transaction are checked concurrently and OpenSSL work releasing the GIL
+doesn't block the processor thread.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from remme.shared.metrics import METRICS_SENDER
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Maximum number of verification results to keep
+VERIFICATION_CACHE_SIZE = 10000
+# Number of lookups between sending of cache statistics
+VERIFICATION_CACHE_REPORT_EVERY = 100
+
+INLINE_EXECUTOR = 'inline'
+THREAD_EXECUTOR = 'thread'
+PROCESS_EXECUTOR = 'process'
+VERIFICATION_EXECUTORS = (INLINE_EXECUTOR, THREAD_EXECUTOR, PROCESS_EXECUTOR)
+
+
+class VerificationExecutor:
+    """Runs verification functions inline or in a dedicated pool.
+
+    The pool is created on the first submission, so the executor may be
+    configured before the transaction processor workers are forked.
+    """
+
+    def __init__(self, kind=INLINE_EXECUTOR, max_workers=None):
+        """
+        :param kind: one of "inline", "thread" or "process".
+        :param max_workers: Optional. Number of pool workers.
+        """
+        if kind not in VERIFICATION_EXECUTORS:
+            raise ValueError(f'Unknown verification executor "{kind}", '
+                             f'expected one of: {", ".join(VERIFICATION_EXECUTORS)}')
+
+        self._kind = kind
+        self._max_workers = max_workers
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def kind(self):
+        return self._kind
+
+    def _get_pool(self):
+        with self._lock:
+            # A pool inherited by a forked process has no running workers
+            if self._pool is None or self._pool_pid != os.getpid():
+                if self._kind == THREAD_EXECUTOR:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self._max_workers,
+                        thread_name_prefix='verification',
+                    )
+                else:
+                    self._pool = ProcessPoolExecutor(max_workers=self._max_workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def submit(self, fn, *args):
+        """Schedule `fn(*args)` and return `concurrent.futures.Future`.
+
+        Process executor requires `fn` and `args` to be picklable.
+        """
+        if self._kind != INLINE_EXECUTOR:
+            return self._get_pool().submit(fn, *args)
+
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=wait)
+            self._pool = None
+            self._pool_pid = None
+
+
+_verification_executor = VerificationExecutor()
+
+
+def get_verification_executor():
+    return _verification_executor
+
+
+def set_verification_executor(kind, max_workers=None):
+    """Replace global verification executor used by transaction processors.
+    """
+    global _verification_executor
+
+    previous, _verification_executor = \
+        _verification_executor, VerificationExecutor(kind, max_workers)
+    previous.shutdown(wait=False)
+    return _verification_executor
+
+
+class VerificationCache:
+    """Bounded LRU cache of signature verification results.
+
+    Only a digest of the verification input and its boolean result are
+    stored, so memory usage doesn't depend on keys and signatures sizes.
+    """
+
+    def __init__(self, maxsize=VERIFICATION_CACHE_SIZE, metric=None,
+                 report_every=VERIFICATION_CACHE_REPORT_EVERY):
+        """
+        :param maxsize: maximum number of results to keep.
+        :param metric: Optional. The name of the metric to send hits
+            statistics to.
+        :param report_every: number of lookups between statistics reports.
+        """
+        self._maxsize = maxsize
+        self._metric = metric
+        self._report_every = report_every
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(algorithm, key, message, signature):
+        """Get digest of the verification input.
+
+        Every part is length-prefixed, so different splits of the same bytes
+        produce different digests.
+        """
+        digest = hashlib.sha256()
+        for part in (algorithm, key, message, signature):
+            if isinstance(part, str):
+                part = part.encode()
+            digest.update(len(part).to_bytes(8, 'big'))
+            digest.update(part)
+        return digest.digest()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self._results)
+
+    def get(self, cache_key):
+        """Get cached result by the key from `make_key`, `None` on a miss.
+        """
+        with self._lock:
+            result = self._results.get(cache_key)
+            if result is not None:
+                self._results.move_to_end(cache_key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._maybe_report()
+        return result
+
+    def put(self, cache_key, result):
+        with self._lock:
+            self._results[cache_key] = bool(result)
+            self._results.move_to_end(cache_key)
+            while len(self._results) > self._maxsize:
+                self._results.popitem(last=False)
+
+    def verify(self, algorithm, key, message, signature, verifier):
+        """Get cached verification result or verify and cache it.
+
+        Exceptions raised by `verifier` are propagated and not cached.
+
+        :param algorithm: name of the algorithm with its parameters.
+        :param key: serialized public key.
+        :param message: signed message.
+        :param signature: signature to verify.
+        :param verifier: callable without arguments performing the verification.
+        :return: `True` if the signature is valid.
+        """
+        cache_key = self.make_key(algorithm, key, message, signature)
+
+        result = self.get(cache_key)
+        if result is None:
+            result = bool(verifier())
+            self.put(cache_key, result)
+
+        return result
+
+    def submit(self, executor, algorithm, key, message, signature, fn, *args):
+        """Same as `verify`, but runs `fn(*args)` with the executor.
+
+        :param executor: `VerificationExecutor` to run the verification with.
+        :return: `concurrent.futures.Future` with the verification result.
+        """
+        cache_key = self.make_key(algorithm, key, message, signature)
+
+        result = self.get(cache_key)
+        if result is not None:
+            future = Future()
+            future.set_result(result)
+            return future
+
+        def _store_result(future):
+            if not future.cancelled() and future.exception() is None:
+                self.put(cache_key, future.result())
+
+        future = executor.submit(fn, *args)
+        future.add_done_callback(_store_result)
+        return future
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _maybe_report(self):
+        lookups = self.hits + self.misses
+        if self._metric is None or lookups % self._report_every:
+            return
+
+        LOGGER.debug(f'Verification cache hit rate: {self.hit_rate:.2%} '
+                     f'of {lookups} lookups')
+        METRICS_SENDER.send_metric(self._metric, {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'size': len(self._results),
+        }, noblock=True)
@@ -0,0 +1,117 @@
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Multi-process runner for the transaction processor.
+
+Every worker is a separate process with its own `TransactionProcessor`
+registered in the validator for a set of transaction families. The validator
+balances transactions of a family between all processors registered for it,
+so CPU-bound work (signatures verification, protobuf parsing and validation)
+scales with the number of cores instead of being limited by the GIL.
+"""
+
+import signal
+
+from remme.shared.supervisor import ProcessSupervisor, WorkerProcess
+
+
+def parse_family_workers(values, families):
+    """Parse per-family process assignment in the "family=count" format.
+
+    :param values: list of assignment strings, e.g. ["pub_key=2"].
+    :param families: names of known transaction families.
+    :return: dict of family name to number of dedicated processes.
+    """
+    assignment = {}
+    for value in values or []:
+        family, sep, count = value.partition('=')
+        if not sep:
+            raise ValueError(f'Expected "family=count", got "{value}"')
+
+        if family not in families:
+            raise ValueError(f'Unknown transaction family "{family}", '
+                             f'available: {", ".join(families)}')
+
+        try:
+            count = int(count)
+        except ValueError:
+            raise ValueError(f'Invalid processes count for "{family}": {count}')
+
+        if count < 1:
+            raise ValueError(f'Processes count for "{family}" should be positive')
+
+        assignment[family] = assignment.get(family, 0) + count
+
+    return assignment
+
+
+def get_workers_families(workers, families, family_workers=None):
+    """Get list of families sets, one per worker process.
+
+    :param workers: number of processes serving all of `families`.
+    :param families: families to register in shared workers.
+    :param family_workers: dict of family name to number of processes
+        dedicated to this family only.
+    """
+    result = [tuple(families) for _ in range(workers)] if families else []
+    for family, count in (family_workers or {}).items():
+        result.extend((family,) for _ in range(count))
+    return result
+
+
+def run_processor(url, handlers):
+    """Run transaction processor with given handlers until it is interrupted.
+    """
+    # Imported here to not set up ZMQ machinery in the supervisor before forking
+    from sawtooth_sdk.processor.core import TransactionProcessor
+
+    processor = TransactionProcessor(url=url)
+
+    for handler in handlers:
+        processor.add_handler(handler)
+    try:
+        processor.start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        processor.stop()
+
+
+def _worker_main(url, handlers):
+    # Parent sends SIGTERM on shutdown, stop the processor the same way as on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    # Ctrl+C in a terminal is delivered to the whole group, let the supervisor handle it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_processor(url, handlers)
+
+
+class WorkersSupervisor(ProcessSupervisor):
+    """Starts transaction processor workers and restarts crashed ones.
+    """
+
+    def __init__(self, url, handlers, workers_families):
+        """
+        :param url: validator url to connect workers to.
+        :param handlers: dict of family name to transaction handler.
+        :param workers_families: list of families sets, one per worker.
+        """
+        super().__init__([
+            WorkerProcess(
+                f'remme-tp-{index}[{",".join(families)}]',
+                _worker_main,
+                (url, [handlers[family] for family in families]),
+            )
+            for index, families in enumerate(workers_families)
+        ])
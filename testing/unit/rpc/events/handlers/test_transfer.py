@@ -4,7 +4,10 @@ Provide tests for transfer event handler implementation.
 import pytest
 from aiohttp_json_rpc.exceptions import RpcInvalidParamsError
 
+from sawtooth_sdk.protobuf.events_pb2 import EventFilter, EventSubscription
+
 from remme.rpc_api.event._handlers import TransferEventHandler
+from remme.shared.constants import Events
 
 VALID_ADDRESS = '112007' + 'db8a00c010402e2e3a7d03491323e761e0ea612481c518605648ceeb5ed454f7'
 
@@ -59,3 +62,26 @@ def test_validate_invalid_id(invalid_transfer_address):
         })
 
     assert 'Invalid params' == str(error.value)
+
+
+def test_create_filtered_subscriptions():
+    """
+    Case: create validator subscriptions for transfer subscribers of the address.
+    Expect: transfer events subscription is filtered by the address attribute.
+    """
+    expected_result = [EventSubscription(
+        event_type=Events.ACCOUNT_TRANSFER.value,
+        filters=[EventFilter(key='address', match_string=VALID_ADDRESS, filter_type=EventFilter.SIMPLE_ANY)],
+    )]
+
+    assert expected_result == transfer_event_handler.create_subscriptions({VALID_ADDRESS})
+
+
+def test_create_not_filtered_subscriptions():
+    """
+    Case: create validator subscriptions for subscribers of all transfers.
+    Expect: transfer events subscription is not filtered.
+    """
+    expected_result = [EventSubscription(event_type=Events.ACCOUNT_TRANSFER.value)]
+
+    assert expected_result == transfer_event_handler.create_subscriptions({VALID_ADDRESS, None})
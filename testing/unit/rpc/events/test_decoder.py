@@ -0,0 +1,87 @@
+"""
+Provide tests for event entities decoder implementation.
+"""
+import pytest
+
+from remme.protos.account_pb2 import Account
+from remme.protos.atomic_swap_pb2 import AtomicSwapInfo
+from remme.rpc_api.event import decode_entities_changed
+from remme.shared.event_data import decode_entities, encode_entities
+from remme.tp.basic import get_event_attributes
+
+SENDER_ADDRESS = '112007d71fa7e120c60fb392a64fd69de891a60c667d9ea9e5d9d9d617263be6c20202'
+SWAP_ADDRESS = '78173cbd1d8be2fb4eb43b4c44ed8d3ee8a5bc1c28e7d0f0e5b2e9e33a8e2b1fa8df5c'
+
+SWAP_ID = '033102e41346242476b15a3a7966eb5249271025fc7fb0b37ed3fdb4bcce3884'
+
+
+def create_updated_state():
+    """
+    Create updated state with an account and an atomic swap.
+    """
+    account = Account(balance=100)
+    swap_info = AtomicSwapInfo(swap_id=SWAP_ID, amount=10, sender_address=SENDER_ADDRESS)
+
+    return {
+        SENDER_ADDRESS: account,
+        SWAP_ADDRESS: swap_info,
+    }
+
+
+def test_decode_binary_entities_changed():
+    """
+    Case: decode entities from the binary event data.
+    Expect: entities are the same as decoded from the JSON attribute, in the same order.
+    """
+    updated_state = create_updated_state()
+
+    binary_entities = decode_entities_changed({
+        'attributes': [{'key': 'header_signature', 'value': 'signature'}],
+        'data': encode_entities(updated_state),
+    })
+    json_entities = decode_entities_changed({
+        'attributes': [
+            {'key': key, 'value': value}
+            for key, value in get_event_attributes(updated_state, 'signature')
+        ],
+        'data': b'',
+    })
+
+    assert json_entities == binary_entities
+    assert [SENDER_ADDRESS, SWAP_ADDRESS] == [entity['address'] for entity in binary_entities]
+    assert ['Account', 'AtomicSwapInfo'] == [entity['type'] for entity in binary_entities]
+
+
+def test_decode_entities_roundtrip():
+    """
+    Case: encode and decode updated state.
+    Expect: the same addresses and messages are decoded.
+    """
+    updated_state = create_updated_state()
+
+    assert list(updated_state.items()) == decode_entities(encode_entities(updated_state))
+
+
+@pytest.mark.parametrize('data', [
+    pytest.param(b'\x02', id='unsupported version'),
+    pytest.param(encode_entities(create_updated_state())[:-1], id='truncated data'),
+    pytest.param(b'\x01\x00\x03Foo\x00\x00\x00\x00\x00\x00', id='unknown type'),
+])
+def test_decode_invalid_entities(data):
+    """
+    Case: decode invalid binary event data.
+    Expect: ValueError is raised.
+    """
+    with pytest.raises(ValueError):
+        decode_entities(data)
+
+
+def test_decode_entities_changed_without_entities():
+    """
+    Case: decode event without data and entities changed attribute.
+    Expect: None is returned.
+    """
+    assert decode_entities_changed({
+        'attributes': [{'key': 'header_signature', 'value': 'signature'}],
+        'data': b'',
+    }) is None
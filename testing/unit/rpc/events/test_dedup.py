@@ -0,0 +1,56 @@
+"""
+Provide tests for storage of hashes of sent notifications.
+"""
+from unittest import mock
+
+from remme.rpc_api.event._dedup import RecentHashes
+
+
+def test_recent_hashes_contain_added():
+    """
+    Case: add hashes of notifications.
+    Expect: added hashes are contained, others are not.
+    """
+    hashes = RecentHashes(capacity=10, ttl=60)
+
+    hashes.add('a')
+    hashes.add('b')
+
+    assert 'a' in hashes
+    assert 'b' in hashes
+    assert 'c' not in hashes
+    assert 2 == len(hashes)
+
+
+def test_recent_hashes_bounded_by_capacity():
+    """
+    Case: add more hashes than the capacity.
+    Expect: only the latest hashes are kept.
+    """
+    hashes = RecentHashes(capacity=100, ttl=60)
+
+    for index in range(1000):
+        hashes.add(str(index))
+
+    assert 100 == len(hashes)
+    assert '899' not in hashes
+    assert '900' in hashes
+    assert '999' in hashes
+
+
+def test_recent_hashes_expire():
+    """
+    Case: check hashes after their ttl has passed.
+    Expect: expired hashes are forgotten, re-added hash is kept.
+    """
+    hashes = RecentHashes(capacity=10, ttl=60)
+
+    with mock.patch('time.monotonic', return_value=1000):
+        hashes.add('a')
+        hashes.add('b')
+    with mock.patch('time.monotonic', return_value=1030):
+        hashes.add('a')
+    with mock.patch('time.monotonic', return_value=1070):
+        assert 'a' in hashes
+        assert 'b' not in hashes
+        assert 1 == len(hashes)
@@ -0,0 +1,187 @@
+"""
+Provide tests for the validator events hub shared by websockets.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from aiohttp_json_rpc.protocol import encode_result
+from sawtooth_sdk.protobuf.events_pb2 import Event, EventList
+
+from remme.protos.account_pb2 import Account
+from remme.protos.atomic_swap_pb2 import AtomicSwapInfo
+from remme.protos.block_info_pb2 import BlockInfo
+from remme.rpc_api.event._dedup import RecentHashes
+from remme.rpc_api.event._decoder import event_to_dict
+from remme.rpc_api.event._handlers import EVENT_HANDLERS, REPLAYABLE_EVENT_TYPES
+from remme.rpc_api.event._hub import EventHub
+from remme.rpc_api.event._journal import EventJournal
+from remme.shared.constants import Events
+from remme.shared.event_data import encode_entities
+from testing.utils._async import return_async_value
+
+SENDER_ADDRESS = '112007' + 'a' * 64
+RECEIVER_ADDRESS = '112007' + 'b' * 64
+OTHER_ADDRESS = '112007' + 'c' * 64
+BLOCK_ID = 'd' * 128
+SWAP_ADDRESS = '78173c' + 'e' * 64
+SWAP_ID = 'f' * 64
+
+
+class RpcStub:
+
+    def __init__(self):
+        self._evthashes = {}
+        self.sent = []
+        self.loop = asyncio.get_event_loop()
+
+    async def _ws_send_str(self, client, string, **kwargs):
+        self.sent.append((client, json.loads(string)))
+
+
+def create_transfer_event():
+    return {
+        'event_type': Events.ACCOUNT_TRANSFER.value,
+        'attributes': [],
+        'data': encode_entities({
+            SENDER_ADDRESS: Account(balance=90),
+            RECEIVER_ADDRESS: Account(balance=10),
+        }),
+    }
+
+
+async def create_client(hub, rpc, msg_id, address):
+    client = SimpleNamespace(ws=object())
+    rpc._evthashes[client.ws] = RecentHashes()
+    await hub.subscribe(client, 'transfer', msg_id, {'address': address})
+    return client
+
+
+@pytest.mark.asyncio
+async def test_dispatch_to_matching_subscribers(mocker):
+    """
+    Case: dispatch transfer event to websockets subscribed to different addresses.
+    Expect: the event is parsed once and delivered only to subscribers of its addresses.
+    """
+    rpc = RpcStub()
+    hub = EventHub(rpc, zmq_url=None)
+    mocker.patch.object(hub, '_update_validator_subscription')
+    parse_evt = mocker.spy(EVENT_HANDLERS['transfer'], 'parse_evt')
+
+    sender = await create_client(hub, rpc, 1, SENDER_ADDRESS)
+    receiver = await create_client(hub, rpc, 2, RECEIVER_ADDRESS)
+    await create_client(hub, rpc, 3, OTHER_ADDRESS)
+
+    await hub.dispatch([create_transfer_event()])
+
+    assert 1 == parse_evt.call_count
+    assert 2 == len(rpc.sent)
+    for client, message in rpc.sent:
+        assert {1: sender, 2: receiver}[message['id']] is client
+        assert SENDER_ADDRESS == message['result']['attributes']['from']['address']
+
+
+@pytest.mark.asyncio
+async def test_dispatch_skips_removed_subscribers(mocker):
+    """
+    Case: dispatch transfer event after the subscriber unsubscribed and the other was closed.
+    Expect: no notifications are sent.
+    """
+    rpc = RpcStub()
+    hub = EventHub(rpc, zmq_url=None)
+    mocker.patch.object(hub, '_update_validator_subscription')
+
+    sender = await create_client(hub, rpc, 1, SENDER_ADDRESS)
+    receiver = await create_client(hub, rpc, 2, RECEIVER_ADDRESS)
+    hub.unsubscribe(sender.ws, 'transfer')
+    hub.remove(receiver.ws)
+
+    await hub.dispatch([create_transfer_event()])
+
+    assert [] == rpc.sent
+
+
+@pytest.mark.asyncio
+async def test_block_notification_prepared_once(mocker):
+    """
+    Case: dispatch block commit event to several websockets subscribed to blocks.
+    Expect: block info is fetched once, every subscriber receives the same notification with its id.
+    """
+    block_info = BlockInfo(timestamp=1546962851)
+    block_info_client = mocker.patch('remme.rpc_api.event._handlers.BlockInfoClient')
+    block_info_client.return_value.get_block_info = mocker.Mock(
+        side_effect=lambda block_num: return_async_value(block_info),
+    )
+    mocker.patch.object(EVENT_HANDLERS['blocks'], '_block_information_client', None)
+
+    rpc = RpcStub()
+    hub = EventHub(rpc, zmq_url=None)
+    mocker.patch.object(hub, '_update_validator_subscription')
+    for msg_id in range(3):
+        client = SimpleNamespace(ws=object())
+        rpc._evthashes[client.ws] = RecentHashes()
+        await hub.subscribe(client, 'blocks', msg_id, {})
+
+    await hub.dispatch([{
+        'event_type': Events.SAWTOOTH_BLOCK_COMMIT.value,
+        'attributes': [
+            {'key': 'block_id', 'value': BLOCK_ID},
+            {'key': 'block_num', 'value': '5'},
+        ],
+        'data': b'',
+    }])
+
+    assert 1 == block_info_client.call_count
+    block_info_client.return_value.get_block_info.assert_called_once_with(block_num=4)
+    assert [0, 1, 2] == sorted(message['id'] for _, message in rpc.sent)
+    for _, message in rpc.sent:
+        assert json.loads(encode_result(message['id'], {
+            'event_type': 'blocks',
+            'attributes': {'id': BLOCK_ID, 'timestamp': 1546962851},
+        })) == message
+
+
+def create_swap_block_events(block_num, state):
+    swap_info = AtomicSwapInfo(swap_id=SWAP_ID, state=state)
+    return EventList(events=[
+        Event(
+            event_type=Events.SAWTOOTH_BLOCK_COMMIT.value,
+            attributes=[
+                Event.Attribute(key='block_id', value=f'block-{block_num}'),
+                Event.Attribute(key='block_num', value=str(block_num)),
+            ],
+        ),
+        Event(event_type=Events.SWAP_INIT.value, data=encode_entities({SWAP_ADDRESS: swap_info})),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_catch_up_from_journal(mocker, tmpdir):
+    """
+    Case: subscribe to atomic swap from a journaled block while live events are received.
+    Expect: events following the block are replayed from the journal, then live events are delivered.
+    """
+    journal = EventJournal(str(tmpdir), event_types=REPLAYABLE_EVENT_TYPES)
+    journal.append(create_swap_block_events(0, AtomicSwapInfo.OPENED))
+    journal.append(create_swap_block_events(1, AtomicSwapInfo.SECRET_LOCK_PROVIDED))
+    journal.append(create_swap_block_events(2, AtomicSwapInfo.APPROVED))
+
+    rpc = RpcStub()
+    hub = EventHub(rpc, zmq_url=None, journal=journal)
+    mocker.patch.object(hub, '_update_validator_subscription')
+
+    client = SimpleNamespace(ws=object())
+    rpc._evthashes[client.ws] = RecentHashes()
+    assert hub.can_replay('block-0')
+    await hub.subscribe(client, 'atomic_swap', 1, {'id': SWAP_ID, 'from_block': 'block-0'})
+
+    live_events = create_swap_block_events(3, AtomicSwapInfo.CLOSED)
+    await hub.dispatch([event_to_dict(event) for event in live_events.events])
+
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    assert ['SECRET_LOCK_PROVIDED', 'APPROVED', 'CLOSED'] == [
+        message['result']['attributes']['state'] for _, message in rpc.sent
+    ]
@@ -0,0 +1,38 @@
+"""
+Provide tests for the index of events subscribers.
+"""
+from remme.rpc_api.event._index import SubscriptionIndex
+
+
+def test_match_subscribers_by_key():
+    """
+    Case: match event keys to subscribers indexed by key and wildcard subscribers.
+    Expect: subscribers with the event keys and wildcard subscribers are matched.
+    """
+    index = SubscriptionIndex()
+    index.add('transfer', 'address-1', 'ws-1')
+    index.add('transfer', 'address-2', 'ws-2')
+    index.add('transfer', 'address-3', 'ws-3')
+    index.add('atomic_swap', None, 'ws-4')
+
+    assert {'ws-1', 'ws-2'} == index.match('transfer', ['address-1', 'address-2'])
+    assert {'ws-4'} == index.match('atomic_swap', ['swap-id'])
+    assert set() == index.match('blocks', [])
+
+
+def test_remove_subscribers():
+    """
+    Case: remove all subscribers of the event.
+    Expect: the event has no subscribers.
+    """
+    index = SubscriptionIndex()
+    index.add('transfer', 'address-1', 'ws-1')
+    index.add('transfer', 'address-1', 'ws-2')
+
+    index.remove('transfer', 'address-1', 'ws-1')
+    assert {'ws-2'} == index.match('transfer', ['address-1'])
+
+    index.remove('transfer', 'address-1', 'ws-2')
+    index.remove('transfer', 'address-1', 'ws-2')
+    assert not index.has_subscribers('transfer')
+    assert set() == index.names
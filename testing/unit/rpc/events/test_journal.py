@@ -0,0 +1,98 @@
+"""
+Provide tests for the journal of events to replay.
+"""
+import os
+
+from sawtooth_sdk.protobuf.events_pb2 import Event, EventList
+
+from remme.rpc_api.event._journal import EventJournal
+from remme.shared.constants import Events
+
+TRANSFER = Events.ACCOUNT_TRANSFER.value
+SWAP_INIT = Events.SWAP_INIT.value
+
+
+def create_block_events(block_num, block_id=None, event_type=SWAP_INIT):
+    block_id = block_id or f'block-{block_num}'
+    return EventList(events=[
+        Event(
+            event_type=Events.SAWTOOTH_BLOCK_COMMIT.value,
+            attributes=[
+                Event.Attribute(key='block_id', value=block_id),
+                Event.Attribute(key='block_num', value=str(block_num)),
+            ],
+        ),
+        Event(event_type=event_type, data=block_id.encode()),
+    ])
+
+
+def get_journaled_data(journal, block_id):
+    return [
+        [event.data for event in journal.read(record).events if event.data]
+        for record in journal.get_records_after(block_id)
+    ]
+
+
+def test_replay_after_block(tmpdir):
+    """
+    Case: append events of blocks and get events following a block.
+    Expect: events of the following blocks are read, events of not journaled types are dropped.
+    """
+    journal = EventJournal(str(tmpdir), event_types=[SWAP_INIT])
+    for block_num in range(5):
+        journal.append(create_block_events(block_num))
+    journal.append(create_block_events(5, event_type=TRANSFER))
+
+    assert journal.has_block('block-1')
+    assert not journal.has_block('block-6')
+    assert 5 == journal.last_block_num
+    assert [[b'block-2'], [b'block-3'], [b'block-4'], []] == get_journaled_data(journal, 'block-1')
+
+
+def test_fork_replaces_blocks(tmpdir):
+    """
+    Case: append blocks of a fork with the same numbers as journaled ones.
+    Expect: replaced blocks are dropped, blocks of the fork follow the common block.
+    """
+    journal = EventJournal(str(tmpdir), event_types=[SWAP_INIT])
+    for block_num in range(4):
+        journal.append(create_block_events(block_num))
+    journal.append(create_block_events(2, block_id='fork-2'))
+
+    assert not journal.has_block('block-2')
+    assert not journal.has_block('block-3')
+    assert [[b'fork-2']] == get_journaled_data(journal, 'block-1')
+
+
+def test_index_loaded_from_files(tmpdir):
+    """
+    Case: open the journal with a record truncated by a stopped process.
+    Expect: journaled blocks are indexed, the truncated record is dropped and overwritten.
+    """
+    journal = EventJournal(str(tmpdir), event_types=[SWAP_INIT], segment_max_bytes=100)
+    for block_num in range(4):
+        journal.append(create_block_events(block_num))
+    journal.close()
+
+    last_segment = os.path.join(str(tmpdir), sorted(os.listdir(str(tmpdir)))[-1])
+    with open(last_segment, 'ab') as file:
+        file.write(b'\x00\x00\x01\x00truncated')
+
+    journal = EventJournal(str(tmpdir), event_types=[SWAP_INIT])
+    journal.append(create_block_events(4))
+
+    assert [[b'block-2'], [b'block-3'], [b'block-4']] == get_journaled_data(journal, 'block-1')
+
+
+def test_old_segments_removed(tmpdir):
+    """
+    Case: append more blocks than fit into the kept segments.
+    Expect: the oldest segments and their blocks are removed.
+    """
+    journal = EventJournal(str(tmpdir), event_types=[SWAP_INIT], segment_max_bytes=1, max_segments=2)
+    for block_num in range(5):
+        journal.append(create_block_events(block_num))
+
+    assert 2 == len(os.listdir(str(tmpdir)))
+    assert not journal.has_block('block-2')
+    assert [[b'block-4']] == get_journaled_data(journal, 'block-3')
@@ -0,0 +1,140 @@
+"""
+Provide tests for subscriptions of validator connections to events.
+"""
+import asyncio
+
+import pytest
+from sawtooth_sdk.protobuf.client_event_pb2 import (
+    ClientEventsSubscribeRequest,
+    ClientEventsSubscribeResponse,
+)
+from sawtooth_sdk.protobuf.validator_pb2 import Message
+
+from remme.rpc_api.event._subscription import ValidatorSubscription
+from remme.shared.exceptions import ClientException
+from testing.utils._async import return_async_value
+
+HEAD_BLOCK_ID = 'a' * 128
+ADDRESS = '112007' + 'b' * 64
+OTHER_ADDRESS = '112007' + 'c' * 64
+
+
+class ConnectionStub:
+
+    status = ClientEventsSubscribeResponse.OK
+
+    def __init__(self, url, loop=None):
+        self.sent = []
+        self.closed = False
+        self.messages = asyncio.Queue()
+
+    async def open(self):
+        pass
+
+    async def send(self, message_type, message_content, timeout=None):
+        self.sent.append(message_type)
+        if message_type == Message.CLIENT_EVENTS_SUBSCRIBE_REQUEST:
+            request = ClientEventsSubscribeRequest()
+            request.ParseFromString(message_content)
+            assert [HEAD_BLOCK_ID] == list(request.last_known_block_ids)
+            return Message(
+                message_type=Message.CLIENT_EVENTS_SUBSCRIBE_RESPONSE,
+                content=ClientEventsSubscribeResponse(status=self.status).SerializeToString(),
+            )
+        return Message(message_type=Message.CLIENT_EVENTS_UNSUBSCRIBE_RESPONSE)
+
+    async def receive(self):
+        return await self.messages.get()
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connections(mocker):
+    created = []
+
+    def create_connection(*args, **kwargs):
+        connection = ConnectionStub(*args, **kwargs)
+        created.append(connection)
+        return connection
+
+    mocker.patch('remme.rpc_api.event._subscription.Connection', side_effect=create_connection)
+    router = mocker.patch('remme.rpc_api.event._subscription.Router')
+    router.return_value.list_blocks = mocker.Mock(
+        side_effect=lambda limit: return_async_value({'head': HEAD_BLOCK_ID}),
+    )
+    return created
+
+
+@pytest.mark.asyncio
+async def test_subscription_changed_only_when_needed(connections):
+    """
+    Case: subscribe to events, then to the same and covered keys, then to another event type.
+    Expect: one connection is opened, subscribe requests are sent only for new event types and keys.
+    """
+    received = []
+
+    async def on_message(msg):
+        received.append(msg)
+
+    subscription = ValidatorSubscription('tcp://validator:4004', on_message)
+
+    await subscription.update({'transfer': {ADDRESS}})
+    await subscription.update({'transfer': {ADDRESS}})
+    await subscription.update({'transfer': {ADDRESS, OTHER_ADDRESS}})
+    await subscription.update({'transfer': {None}})
+    await subscription.update({'transfer': {ADDRESS}})
+    await subscription.update({'transfer': {ADDRESS}, 'blocks': {None}})
+
+    assert 1 == len(connections)
+    assert [Message.CLIENT_EVENTS_SUBSCRIBE_REQUEST] * 4 == connections[0].sent
+    assert {'transfer': {ADDRESS}, 'blocks': {None}} == subscription.keys
+
+    message = Message(message_type=Message.CLIENT_EVENTS)
+    await connections[0].messages.put(message)
+    await asyncio.sleep(0)
+    assert [message] == received
+
+    await subscription.release()
+
+
+@pytest.mark.asyncio
+async def test_subscription_released_with_last_event(connections):
+    """
+    Case: unsubscribe from the last event type.
+    Expect: the validator is told to unsubscribe, the connection is closed and reopened with the next event type.
+    """
+    subscription = ValidatorSubscription('tcp://validator:4004', return_async_value)
+
+    await subscription.update({'transfer': {ADDRESS}})
+    await subscription.update({})
+
+    assert [
+        Message.CLIENT_EVENTS_SUBSCRIBE_REQUEST,
+        Message.CLIENT_EVENTS_UNSUBSCRIBE_REQUEST,
+    ] == connections[0].sent
+    assert connections[0].closed
+    assert subscription.stream is None
+    assert {} == subscription.keys
+
+    await subscription.update({'blocks': {None}})
+
+    assert 2 == len(connections)
+    await subscription.release()
+
+
+@pytest.mark.asyncio
+async def test_failed_first_subscription_released(connections, mocker):
+    """
+    Case: the validator rejects the first subscription.
+    Expect: client exception is raised, the connection is closed.
+    """
+    mocker.patch.object(ConnectionStub, 'status', ClientEventsSubscribeResponse.UNKNOWN_BLOCK)
+    subscription = ValidatorSubscription('tcp://validator:4004', return_async_value)
+
+    with pytest.raises(ClientException):
+        await subscription.update({'transfer': {ADDRESS}})
+
+    assert connections[0].closed
+    assert subscription.stream is None
@@ -0,0 +1,86 @@
+"""
+Provide tests for the cache of immutable results of methods.
+"""
+import json
+
+import pytest
+
+from remme.rpc_api._cache import (
+    CachedResult,
+    ResponseCache,
+    etag_matches,
+    get_cache_key,
+)
+
+BLOCK = {'data': {'header_signature': 'a' * 128, 'batches': []}}
+
+
+def test_cache_key_ignores_params_order():
+    """
+    Case: get cache keys of the same params in different order.
+    Expect: keys are equal, keys of other method or params differ.
+    """
+    key = get_cache_key('list_receipts', {'ids': ['a'], 'head': 'b'})
+
+    assert key == get_cache_key('list_receipts', {'head': 'b', 'ids': ['a']})
+    assert key != get_cache_key('list_batches', {'ids': ['a'], 'head': 'b'})
+    assert key != get_cache_key('list_receipts', {'ids': ['b'], 'head': 'b'})
+
+
+def test_cached_result_encoded_with_request_id():
+    """
+    Case: encode cached result for requests with different ids.
+    Expect: JSON-RPC responses with the ids and the same result and ETag.
+    """
+    cached = CachedResult(BLOCK)
+
+    assert {'jsonrpc': '2.0', 'id': 1, 'result': BLOCK} == json.loads(cached.encode(1))
+    assert {'jsonrpc': '2.0', 'id': 'two', 'result': BLOCK} == json.loads(cached.encode('two'))
+    assert cached.etag == CachedResult(json.loads(json.dumps(BLOCK))).etag
+    assert cached.etag != CachedResult({'data': {}}).etag
+
+
+def test_response_cache_evicts_least_recently_used():
+    """
+    Case: put more results than the capacity, getting the first one in between.
+    Expect: the least recently used result is evicted.
+    """
+    cache = ResponseCache(capacity=2)
+
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') is not None
+    cache.put('c', 3)
+
+    assert 2 == len(cache)
+    assert cache.get('b') is None
+    assert '1' == cache.get('a').result
+    assert '3' == cache.get('c').result
+
+
+def test_response_cache_disabled():
+    """
+    Case: put result to the cache with zero capacity.
+    Expect: result is encoded with ETag, but not cached.
+    """
+    cache = ResponseCache(capacity=0)
+
+    assert cache.put('a', BLOCK).etag
+    assert cache.get('a') is None
+    assert 0 == len(cache)
+
+
+@pytest.mark.parametrize('if_none_match, matches', [
+    (None, False),
+    ('"a"', True),
+    ('W/"a"', True),
+    ('"b", "a"', True),
+    ('*', True),
+    ('"b"', False),
+])
+def test_etag_matches(if_none_match, matches):
+    """
+    Case: check "If-None-Match" header values against the ETag.
+    Expect: the ETag matches the same, weak, listed or any tag only.
+    """
+    assert matches == etag_matches(if_none_match, '"a"')
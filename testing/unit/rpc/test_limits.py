@@ -0,0 +1,79 @@
+"""
+Provide tests for rate limiting of requests.
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from remme.rpc_api._limits import RateLimiter
+from remme.shared.exceptions import RateLimitExceeded
+
+CLASSES = {
+    'default': {'rate': 10, 'burst': 2},
+    'heavy': {'rate': 1, 'burst': 1, 'methods': ['list_blocks']},
+}
+
+
+def test_rate_limiter_rejects_over_burst():
+    """
+    Case: send more requests than the burst at once, then after the bucket is refilled.
+    Expect: requests over the burst are rejected and counted, refilled bucket admits requests.
+    """
+    limiter = RateLimiter(CLASSES)
+
+    with mock.patch('time.monotonic', return_value=100):
+        limiter.acquire('1.1.1.1', 'get_balance')
+        limiter.acquire('1.1.1.1', 'get_balance')
+        with pytest.raises(RateLimitExceeded):
+            limiter.acquire('1.1.1.1', 'get_balance')
+
+    with mock.patch('time.monotonic', return_value=100.15):
+        limiter.acquire('1.1.1.1', 'get_balance')
+        with pytest.raises(RateLimitExceeded):
+            limiter.acquire('1.1.1.1', 'get_balance')
+
+    assert {'get_balance': 2} == limiter.rejected
+    assert 'remme_rpc_rate_limited_total{method="get_balance"} 2' in limiter.render_prometheus()
+
+
+def test_rate_limiter_buckets_by_client_and_class():
+    """
+    Case: exhaust the bucket of the heavy class.
+    Expect: other classes of the client and the same class of other clients are not limited.
+    """
+    limiter = RateLimiter(CLASSES)
+
+    with mock.patch('time.monotonic', return_value=100):
+        limiter.acquire('1.1.1.1', 'list_blocks')
+        with pytest.raises(RateLimitExceeded):
+            limiter.acquire('1.1.1.1', 'list_blocks')
+
+        limiter.acquire('1.1.1.1', 'get_balance')
+        limiter.acquire('2.2.2.2', 'list_blocks')
+
+
+def test_rate_limiter_disabled_class():
+    """
+    Case: send many requests of the class with zero rate.
+    Expect: requests are not limited.
+    """
+    limiter = RateLimiter({'default': {'rate': 0, 'burst': 1}})
+
+    for _ in range(100):
+        limiter.acquire('1.1.1.1', 'get_balance')
+
+
+def test_rate_limiter_client_key():
+    """
+    Case: get client keys of requests with known, unknown and no API key.
+    Expect: known API key identifies the client, otherwise the IP address does.
+    """
+    limiter = RateLimiter(CLASSES, api_key_header='X-API-Key', api_keys=['secret'])
+
+    def create_request(headers):
+        return SimpleNamespace(headers=headers, remote='1.1.1.1')
+
+    assert 'key:secret' == limiter.get_client_key(create_request({'X-API-Key': 'secret'}))
+    assert '1.1.1.1' == limiter.get_client_key(create_request({'X-API-Key': 'other'}))
+    assert '1.1.1.1' == limiter.get_client_key(create_request({}))
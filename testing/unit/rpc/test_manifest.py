@@ -0,0 +1,68 @@
+"""
+Provide tests for the manifest of RPC API methods.
+"""
+import importlib
+
+import pytest
+
+from remme.rpc_api._manifest import METHODS
+from remme.rpc_api.utils import get_module_methods, load_lazily
+
+
+@pytest.mark.parametrize('module', sorted(METHODS))
+def test_manifest_matches_module(module):
+    """
+    Case: compare methods of the module in the manifest with its `__all__`.
+    Expect: the methods are the same.
+    """
+    imported = importlib.import_module(f'remme.rpc_api.{module}')
+
+    assert tuple(imported.__all__) == METHODS[module]
+
+
+def test_get_module_methods():
+    """
+    Case: get methods of the listed modules.
+    Expect: module and method names from the manifest.
+    """
+    assert [
+        ('account', 'get_balance'),
+        ('account', 'get_public_keys_list'),
+        ('state', 'list_state'),
+        ('state', 'fetch_state'),
+    ] == get_module_methods('account, state')
+
+
+def test_get_module_methods_unknown_module():
+    """
+    Case: get methods of an unknown module.
+    Expect: value error is raised.
+    """
+    with pytest.raises(ValueError):
+        get_module_methods('account,unknown')
+
+
+def test_load_lazily():
+    """
+    Case: create the lazy method and load it.
+    Expect: attributes of the method are copied on load.
+    """
+    method = load_lazily('remme.rpc_api', 'transaction', 'fetch_batch')
+
+    assert not getattr(method, 'immutable', False)
+
+    method.load()
+
+    assert method.immutable
+    assert 'fetch_batch' == method.__name__
+
+
+def test_load_lazily_defers_import():
+    """
+    Case: create the lazy method of a module that can't be imported.
+    Expect: the module is imported on load only.
+    """
+    method = load_lazily('remme.rpc_api', 'missing', 'get_nothing')
+
+    with pytest.raises(ImportError):
+        method.load()
@@ -0,0 +1,119 @@
+"""
+Provide tests for outbound queues of websockets.
+"""
+import asyncio
+
+import pytest
+from aiohttp import WSCloseCode
+
+from remme.rpc_api._outbound import (
+    CONFLATE,
+    DISCONNECT,
+    DROP_OLDEST,
+    OutboundQueue,
+)
+
+
+class WebsocketStub:
+
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+
+    async def send_str(self, string):
+        self.sent.append(string)
+
+    async def close(self, code=None, message=b''):
+        self.close_code = code
+
+
+async def wait_sent(queue):
+    while len(queue):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_outbound_queue_sends_in_order():
+    """
+    Case: put frames to the queue.
+    Expect: the writer sends all frames in order.
+    """
+    ws = WebsocketStub()
+    queue = OutboundQueue(ws, max_size=10)
+
+    for index in range(5):
+        queue.put(str(index))
+    await wait_sent(queue)
+
+    assert ['0', '1', '2', '3', '4'] == ws.sent
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_outbound_queue_drop_oldest():
+    """
+    Case: put more notifications than the queue size before the writer runs.
+    Expect: the oldest notifications are dropped, responses are kept.
+    """
+    ws = WebsocketStub()
+    queue = OutboundQueue(ws, max_size=3, policy=DROP_OLDEST)
+
+    queue.put('response')
+    for index in range(4):
+        queue.put(f'notification-{index}', droppable=True)
+    queue.put('another response')
+    await wait_sent(queue)
+
+    assert [
+        'response', 'notification-2', 'notification-3', 'another response',
+    ] == ws.sent
+    assert 2 == queue.dropped
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_outbound_queue_conflate():
+    """
+    Case: put notifications of the same entity to the full queue.
+    Expect: the queued notification of the entity is replaced by the latest.
+    """
+    ws = WebsocketStub()
+    queue = OutboundQueue(ws, max_size=2, policy=CONFLATE)
+
+    queue.put('swap-a-1', droppable=True, conflation_key='a')
+    queue.put('swap-b-1', droppable=True, conflation_key='b')
+    queue.put('swap-a-2', droppable=True, conflation_key='a')
+    queue.put('swap-a-3', droppable=True, conflation_key='a')
+    await wait_sent(queue)
+
+    assert ['swap-a-3', 'swap-b-1'] == ws.sent
+    assert 2 == queue.conflated
+    assert 0 == queue.dropped
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_outbound_queue_disconnect():
+    """
+    Case: put more notifications than the queue size with the disconnect policy.
+    Expect: the websocket is closed, nothing is sent.
+    """
+    ws = WebsocketStub()
+    queue = OutboundQueue(ws, max_size=2, policy=DISCONNECT)
+
+    for index in range(3):
+        queue.put(f'notification-{index}', droppable=True)
+    queue.put('response')
+    await asyncio.sleep(0)
+
+    assert WSCloseCode.TRY_AGAIN_LATER == ws.close_code
+    assert [] == ws.sent
+
+
+def test_outbound_queue_unknown_policy():
+    """
+    Case: create the queue with an unknown overflow policy.
+    Expect: value error is raised.
+    """
+    with pytest.raises(ValueError):
+        OutboundQueue(WebsocketStub(), policy='block')
@@ -0,0 +1,57 @@
+"""
+Provide tests for in-process latency histograms.
+"""
+import random
+
+import pytest
+
+from remme.shared.histograms import HistogramsRegistry, LatencyHistogram
+
+
+def test_get_quantiles():
+    """
+    Case: get quantiles of durations spread over several orders of magnitude.
+    Expect: quantiles are within the histogram precision from the exact ones.
+    """
+    durations = sorted(random.lognormvariate(-7, 2) for _ in range(10000))
+    histogram = LatencyHistogram()
+    for duration in durations:
+        histogram.record(duration)
+
+    for quantile, value in zip((0.5, 0.9, 0.99), histogram.get_quantiles((0.5, 0.9, 0.99))):
+        expected = durations[int(quantile * len(durations)) - 1]
+        assert expected == pytest.approx(value, rel=1 / 64, abs=1e-6)
+
+    assert len(durations) == histogram.count
+    assert sum(durations) == pytest.approx(histogram.sum)
+    assert durations[-1] == histogram.max
+
+
+def test_get_quantiles_empty():
+    """
+    Case: get quantiles of the histogram without recorded durations.
+    Expect: all quantiles are zero.
+    """
+    assert [0.0, 0.0] == LatencyHistogram().get_quantiles((0.5, 0.99))
+
+
+def test_render_prometheus():
+    """
+    Case: render histograms in Prometheus text format.
+    Expect: every metric is a label of the summary with quantiles, sum and count.
+    """
+    registry = HistogramsRegistry()
+    # Durations below 128 microseconds are counted exactly
+    registry.record('rpc_api.get_balance', 0.0001)
+    registry.record('rpc_api.get_balance', 0.0001)
+    registry.record('rpc_api.get_balance', 0.0005)
+    registry.record('rpc_api."quoted"', 0.0001)
+
+    lines = registry.render_prometheus().splitlines()
+
+    assert '# TYPE remme_latency_seconds summary' in lines
+    assert 'remme_latency_seconds{metric="rpc_api.get_balance",quantile="0.5"} 0.0001' in lines
+    assert 'remme_latency_seconds{metric="rpc_api.get_balance",quantile="0.99"} 0.0005' in lines
+    assert 'remme_latency_seconds_sum{metric="rpc_api.get_balance"} 0.0007' in lines
+    assert 'remme_latency_seconds_count{metric="rpc_api.get_balance"} 3' in lines
+    assert 'remme_latency_seconds_count{metric="rpc_api.\\"quoted\\""} 1' in lines
@@ -0,0 +1,59 @@
+"""
+Provide tests for the event loop lag monitor.
+"""
+import asyncio
+import time
+
+import pytest
+
+from remme.shared.histograms import HISTOGRAMS
+from remme.shared.loop_monitor import LoopMonitor
+
+
+def block_event_loop():
+    time.sleep(0.2)
+
+
+@pytest.mark.asyncio
+async def test_slow_callback_detected():
+    """
+    Case: block the event loop for longer than the slow callback threshold.
+    Expect: loop lag is measured, the stall is recorded with the stack of the blocking code.
+    """
+    HISTOGRAMS.clear()
+    monitor = LoopMonitor(
+        asyncio.get_event_loop(), 'test.loop_lag', interval=0.01, slow_callback_threshold=0.05,
+    )
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        block_event_loop()
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+    stats = monitor.get_stats()
+
+    assert stats['lag']['count'] > 0
+    assert stats['lag']['max'] >= 0.1
+    assert 1 == stats['slow_callbacks_count']
+    assert 'block_event_loop' in stats['slow_callbacks'][0]['stack']
+    assert stats['slow_callbacks'][0]['duration'] >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_not_blocked_loop():
+    """
+    Case: keep the event loop responsive.
+    Expect: no slow callbacks are recorded.
+    """
+    monitor = LoopMonitor(
+        asyncio.get_event_loop(), 'test.loop_lag', interval=0.01, slow_callback_threshold=0.5,
+    )
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        monitor.stop()
+
+    assert 0 == monitor.get_stats()['slow_callbacks_count']
@@ -0,0 +1,96 @@
+"""
+Provide tests for statistics of requests to the validator.
+"""
+import asyncio
+
+import pytest
+from sawtooth_sdk.protobuf.validator_pb2 import Message
+
+from remme.shared.histograms import HistogramsRegistry
+from remme.shared.message_stats import MESSAGE_STATS, MessageStats
+from remme.shared.messaging import _MessageRouter, _Sender
+
+
+class SocketStub:
+
+    def __init__(self, msg_router, reply=True):
+        self.msg_router = msg_router
+        self.reply = reply
+
+    def write(self, frames):
+        if not self.reply:
+            return
+
+        request = Message()
+        request.ParseFromString(frames[-1])
+        reply = Message(
+            correlation_id=request.correlation_id,
+            message_type=Message.CLIENT_PEERS_GET_RESPONSE,
+        )
+        asyncio.get_event_loop().call_soon(
+            asyncio.ensure_future, self.msg_router.route_msg(reply),
+        )
+
+
+def get_counters(message_type_name):
+    stats = MESSAGE_STATS.get_stats().get(message_type_name, {})
+    return (
+        stats.get('requests', 0),
+        stats.get('in_flight', 0),
+        stats.get('timeouts', 0),
+        stats.get('round_trip', {}).get('count', 0),
+    )
+
+
+@pytest.mark.asyncio
+async def test_send_request():
+    """
+    Case: send request to the validator and receive the reply.
+    Expect: request is counted, its send wait and round trip are measured.
+    """
+    msg_router = _MessageRouter()
+    sender = _Sender(SocketStub(msg_router), msg_router)
+    requests, _, timeouts, round_trips = get_counters('CLIENT_PEERS_GET_REQUEST')
+
+    reply = await sender.send(Message.CLIENT_PEERS_GET_REQUEST, b'', timeout=1)
+
+    assert Message.CLIENT_PEERS_GET_RESPONSE == reply.message_type
+    assert (requests + 1, 0, timeouts, round_trips + 1) == \
+        get_counters('CLIENT_PEERS_GET_REQUEST')
+
+
+@pytest.mark.asyncio
+async def test_send_request_timeout():
+    """
+    Case: send request to the validator which doesn't reply.
+    Expect: request is counted as timed out and isn't in flight anymore.
+    """
+    msg_router = _MessageRouter()
+    sender = _Sender(SocketStub(msg_router, reply=False), msg_router)
+    requests, _, timeouts, round_trips = get_counters('CLIENT_BLOCK_LIST_REQUEST')
+
+    with pytest.raises(asyncio.TimeoutError):
+        await sender.send(Message.CLIENT_BLOCK_LIST_REQUEST, b'', timeout=0.01)
+
+    assert (requests + 1, 0, timeouts + 1, round_trips) == \
+        get_counters('CLIENT_BLOCK_LIST_REQUEST')
+
+
+def test_get_stats():
+    """
+    Case: get statistics of requests with measured stages.
+    Expect: counters and quantiles of measured and not measured stages by message type name.
+    """
+    message_stats = MessageStats(HistogramsRegistry())
+    message_stats.request_started(Message.CLIENT_STATE_GET_REQUEST)
+    message_stats.record(Message.CLIENT_STATE_GET_REQUEST, 'parse', 0.0001)
+
+    stats = message_stats.get_stats()
+
+    assert ['CLIENT_STATE_GET_REQUEST'] == list(stats)
+    assert 1 == stats['CLIENT_STATE_GET_REQUEST']['in_flight']
+    assert {'count': 1, 'p50': 0.0001, 'p90': 0.0001, 'p99': 0.0001, 'p999': 0.0001} == \
+        stats['CLIENT_STATE_GET_REQUEST']['parse']
+    assert 0 == stats['CLIENT_STATE_GET_REQUEST']['round_trip']['count']
+    assert 'remme_zmq_in_flight{message_type="CLIENT_STATE_GET_REQUEST"} 1' in \
+        message_stats.render_prometheus().splitlines()
@@ -0,0 +1,176 @@
+"""
+Provide tests for batched metrics sending.
+"""
+import time
+
+from requests.exceptions import ConnectionError
+
+from remme.shared.metrics import MetricsSender
+from remme.shared.metrics_file import MetricsFileSink, read_points
+
+
+class InfluxDBClientStub:
+
+    def __init__(self, failed_pings=0):
+        self.failed_pings = failed_pings
+        self.pings = 0
+        self.database = None
+        self.writes = []
+
+    def ping(self):
+        self.pings += 1
+        if self.pings <= self.failed_pings:
+            raise ConnectionError()
+
+    def create_database(self, db):
+        pass
+
+    def switch_database(self, db):
+        self.database = db
+
+    def write_points(self, points):
+        self.writes.append(points)
+
+
+def create_metrics_sender(ready=True, failed_pings=0, **kwargs):
+    metrics_sender = MetricsSender('localhost', 8086, 'user', 'password', 'db', **kwargs)
+    metrics_sender._influxdb_client = InfluxDBClientStub(failed_pings)
+    metrics_sender._ready = ready
+    return metrics_sender
+
+
+def wait_for(condition, timeout=1):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_send_metric_batches():
+    """
+    Case: send more metrics than fit to one batch and flush them.
+    Expect: metrics are written with a write per batch in the order they were sent.
+    """
+    metrics_sender = create_metrics_sender(batch_size=3, flush_interval=60)
+    client = metrics_sender._influxdb_client
+
+    for index in range(3):
+        metrics_sender.send_metric('test', {'index': index})
+
+    wait_for(lambda: client.writes)
+
+    for index in range(3, 5):
+        metrics_sender.send_metric('test', {'index': index})
+    metrics_sender.flush()
+
+    assert [3, 2] == [len(points) for points in client.writes]
+    assert list(range(5)) == [
+        point['fields']['index'] for points in client.writes for point in points
+    ]
+    assert 'remme.test' == client.writes[0][0]['measurement']
+    assert {'sent': 5, 'written': 0, 'dropped': 0, 'failed': 0, 'buffered': 0} == metrics_sender.stats
+
+
+def test_send_metric_overflow():
+    """
+    Case: send more metrics than fit to the buffer before it is flushed.
+    Expect: the oldest metrics are dropped and counted, the call doesn't block.
+    """
+    metrics_sender = create_metrics_sender(buffer_size=3, batch_size=10, flush_interval=60)
+
+    for index in range(5):
+        metrics_sender.send_metric('test', {'index': index})
+
+    assert {'sent': 0, 'written': 0, 'dropped': 2, 'failed': 0, 'buffered': 3} == metrics_sender.stats
+
+    metrics_sender.flush()
+
+    assert [[2, 3, 4]] == [
+        [point['fields']['index'] for point in points]
+        for points in metrics_sender._influxdb_client.writes
+    ]
+
+
+def test_initialization_doesnt_connect():
+    """
+    Case: create metrics sender for unreachable InfluxDB.
+    Expect: no connection is made until a metric is sent.
+    """
+    metrics_sender = create_metrics_sender(ready=False)
+
+    assert 0 == metrics_sender._influxdb_client.pings
+    assert metrics_sender._worker is None
+
+
+def test_send_metric_before_connection():
+    """
+    Case: send metrics while InfluxDB is unreachable and becomes reachable later.
+    Expect: metrics are buffered and written after the connection is made.
+    """
+    metrics_sender = create_metrics_sender(
+        ready=False, failed_pings=2, flush_interval=0.01, reconnect_interval=0.01,
+    )
+    client = metrics_sender._influxdb_client
+
+    for index in range(3):
+        metrics_sender.send_metric('test', {'index': index})
+
+    wait_for(lambda: client.writes)
+
+    assert 3 == client.pings
+    assert 'db' == client.database
+    assert [[0, 1, 2]] == [
+        [point['fields']['index'] for point in points] for points in client.writes
+    ]
+
+
+def test_connection_lost():
+    """
+    Case: lose connection to InfluxDB while writing metrics.
+    Expect: not written metrics are returned to the buffer and written after reconnection.
+    """
+    metrics_sender = create_metrics_sender(batch_size=10, flush_interval=60)
+    client = metrics_sender._influxdb_client
+    write_points = client.write_points
+
+    def write_points_lost(points):
+        client.write_points = write_points
+        raise ConnectionError()
+
+    client.write_points = write_points_lost
+
+    for index in range(3):
+        metrics_sender.send_metric('test', {'index': index})
+    metrics_sender.flush()
+
+    assert not metrics_sender._ready
+    assert {'sent': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'buffered': 3} == metrics_sender.stats
+
+    assert metrics_sender._connect()
+    metrics_sender.flush()
+
+    assert [[0, 1, 2]] == [
+        [point['fields']['index'] for point in points] for points in client.writes
+    ]
+
+
+def test_send_metric_to_file(tmpdir):
+    """
+    Case: send metrics with file sink and without InfluxDB.
+    Expect: metrics are written to the file in line protocol.
+    """
+    path = str(tmpdir.join('metrics.lp'))
+    metrics_sender = MetricsSender(
+        '', 8086, 'user', 'password', 'db', flush_interval=60, file_sink=MetricsFileSink(path),
+    )
+
+    metrics_sender.send_metric('tp.account.0', {'execution_time': 0.5})
+    metrics_sender.flush()
+
+    (measurement, tags, fields, timestamp), = read_points([path])
+
+    assert 'remme.tp.account.0' == measurement
+    assert {'execution_time': 0.5} == fields
+    assert 'hostname' in tags
+    assert timestamp > 0
+    assert {'sent': 0, 'written': 1, 'dropped': 0, 'failed': 0, 'buffered': 0} == \
+        metrics_sender.stats
@@ -0,0 +1,79 @@
+"""
+Provide tests for local files sink of metrics.
+"""
+import os
+
+import pytest
+
+from remme.shared.metrics_file import MetricsFileSink, parse_line, read_points
+
+
+def make_point(index, measurement='remme.rpc_api.get_balance'):
+    return {
+        'measurement': measurement,
+        'tags': {'hostname': 'node-1'},
+        'fields': {'execution_time': index / 1000},
+        'time': 1546300800000000000 + index,
+    }
+
+
+def test_write_and_read(tmpdir):
+    """
+    Case: write points with special characters in names and values and read them back.
+    Expect: read points are the same as written.
+    """
+    path = str(tmpdir.join('metrics.lp'))
+    sink = MetricsFileSink(path)
+
+    assert sink.write([
+        make_point(1, measurement='remme.tp,family 1=x'),
+        {
+            'measurement': 'remme.test',
+            'tags': {'hostname': 'node 2,a=b'},
+            'fields': {'count': 10, 'name': 'quoted "value" ,x=y', 'flag': True},
+            'time': 1,
+        },
+    ])
+
+    assert [
+        ('remme.tp,family 1=x', {'hostname': 'node-1'}, {'execution_time': 0.001},
+         1546300800000000001),
+        ('remme.test', {'hostname': 'node 2,a=b'},
+         {'count': 10, 'flag': True, 'name': 'quoted "value" ,x=y'}, 1),
+    ] == list(read_points([path]))
+
+
+def test_rotation(tmpdir):
+    """
+    Case: write more points than fit to the file size limit.
+    Expect: the file is rotated keeping the configured number of backups with the newest points.
+    """
+    path = str(tmpdir.join('metrics-{pid}.lp'))
+    sink = MetricsFileSink(path, max_bytes=200, backup_count=2)
+
+    for index in range(20):
+        sink.write([make_point(index)])
+
+    path = sink.path
+    assert str(os.getpid()) in path
+    assert sorted(os.listdir(str(tmpdir))) == sorted(
+        os.path.basename(name) for name in (path, f'{path}.1', f'{path}.2')
+    )
+    assert all(os.path.getsize(name) <= 200 for name in (path, f'{path}.1', f'{path}.2'))
+
+    timestamps = [point[3] for point in read_points([f'{path}.2', f'{path}.1', path])]
+    assert list(range(20 - len(timestamps), 20)) == [value - 1546300800000000000 for value in timestamps]
+
+
+@pytest.mark.parametrize('line', [
+    'remme.test',
+    'remme.test,hostname execution_time=1',
+    'remme.test execution_time=abc 1',
+])
+def test_parse_malformed_line(line):
+    """
+    Case: parse malformed line.
+    Expect: ValueError is raised.
+    """
+    with pytest.raises(ValueError):
+        parse_line(line)
@@ -0,0 +1,128 @@
+"""
+Provide tests for requests tracing.
+"""
+import asyncio
+
+import pytest
+
+from remme.shared.tracing import NO_SPAN, Tracer
+
+
+class SpansExporterStub:
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(span.to_dict() for span in spans)
+
+
+def test_trace_nested_spans():
+    """
+    Case: trace spans nested to each other in a thread.
+    Expect: spans are exported with the trace root when it is finished, linked to their parents.
+    """
+    exporter = SpansExporterStub()
+    tracer = Tracer(sample_rate=1, exporter=exporter)
+
+    with tracer.trace('root', attribute='value'):
+        with tracer.span('child'):
+            with tracer.span('grandchild'):
+                pass
+        assert [] == exporter.spans
+        tracer.set_attribute('method', 0)
+
+    grandchild, child, root = exporter.spans
+    assert ['grandchild', 'child', 'root'] == [span['name'] for span in exporter.spans]
+    assert None is root['parent_id']
+    assert root['span_id'] == child['parent_id']
+    assert child['span_id'] == grandchild['parent_id']
+    assert {'attribute': 'value', 'method': 0} == root['attributes']
+    assert 1 == len({span['trace_id'] for span in exporter.spans})
+    assert root['duration'] >= child['duration'] >= grandchild['duration']
+    assert None is tracer.current_span()
+
+
+def test_span_without_trace():
+    """
+    Case: start span without a started trace.
+    Expect: nothing is traced.
+    """
+    exporter = SpansExporterStub()
+    tracer = Tracer(sample_rate=1, exporter=exporter)
+
+    with tracer.span('child') as span:
+        assert NO_SPAN is span
+
+    assert [] == exporter.spans
+
+
+def test_trace_error():
+    """
+    Case: raise an exception in the traced span.
+    Expect: span is exported with the error attribute.
+    """
+    exporter = SpansExporterStub()
+    tracer = Tracer(sample_rate=1, exporter=exporter)
+
+    with pytest.raises(KeyError):
+        with tracer.trace('root'):
+            raise KeyError()
+
+    assert {'error': 'KeyError'} == exporter.spans[0]['attributes']
+
+
+def test_sampling():
+    """
+    Case: trace with partial sample rate and ids known beforehand or set later.
+    Expect: traces are exported by their ids the same way whenever ids are set.
+    """
+    exporter = SpansExporterStub()
+    tracer = Tracer(sample_rate=0.5, exporter=exporter)
+    trace_ids = [f'{index:0128x}' for index in range(200)]
+
+    for trace_id in trace_ids:
+        with tracer.trace('tp', trace_id=trace_id):
+            pass
+        with tracer.trace('rpc_api'):
+            tracer.set_trace_id(trace_id)
+
+    sampled = [trace_id for trace_id in trace_ids if tracer.is_sampled(trace_id)]
+    assert 50 < len(sampled) < 150
+    assert [trace_id for trace_id in sampled for _ in range(2)] == \
+        [span['trace_id'] for span in exporter.spans]
+
+
+def test_tracing_disabled():
+    """
+    Case: trace with zero sample rate.
+    Expect: no spans are recorded.
+    """
+    tracer = Tracer(sample_rate=0, exporter=SpansExporterStub())
+
+    with tracer.trace('root') as span:
+        assert NO_SPAN is span
+        assert None is tracer.current_span()
+
+
+@pytest.mark.asyncio
+async def test_trace_concurrent_tasks():
+    """
+    Case: trace concurrent asyncio tasks.
+    Expect: spans of every task are nested to the root span of the task.
+    """
+    exporter = SpansExporterStub()
+    tracer = Tracer(sample_rate=1, exporter=exporter)
+
+    async def handle(name):
+        with tracer.trace(name):
+            await asyncio.sleep(0.01)
+            with tracer.span(f'{name}.child'):
+                await asyncio.sleep(0.01)
+
+    await asyncio.gather(handle('first'), handle('second'))
+
+    spans = {span['name']: span for span in exporter.spans}
+    assert spans['first']['span_id'] == spans['first.child']['parent_id']
+    assert spans['second']['span_id'] == spans['second.child']['parent_id']
+    assert spans['first']['trace_id'] != spans['second']['trace_id']
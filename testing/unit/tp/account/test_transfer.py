@@ -19,6 +19,7 @@ from remme.protos.account_pb2 import (
 )
 from remme.protos.transaction_pb2 import TransactionPayload
 from remme.settings import ZERO_ADDRESS
+from remme.shared.constants import Events, EVENT_ADDRESS_ATTRIBUTE
 from remme.shared.utils import hash512
 from remme.tp.account import AccountHandler
 from testing.conftest import create_signer
@@ -318,6 +319,52 @@ def test_account_transfer_from_address():
     assert state_as_dict.get(ACCOUNT_ADDRESS_TO, Account()).balance == expected_account_to_balance
 
 
+def test_account_transfer_event_filter_attributes():
+    """
+    Case: transfer tokens from address to address.
+    Expect: emitted transfer event has addresses of both accounts to filter subscriptions by.
+    """
+    transfer_payload = TransferPayload()
+    transfer_payload.address_to = ACCOUNT_ADDRESS_TO
+    transfer_payload.value = TOKENS_AMOUNT_TO_SEND
+
+    transaction_payload = TransactionPayload()
+    transaction_payload.method = AccountMethod.TRANSFER
+    transaction_payload.data = transfer_payload.SerializeToString()
+
+    serialized_transaction_payload = transaction_payload.SerializeToString()
+
+    transaction_header = TransactionHeader(
+        signer_public_key=RANDOM_NODE_PUBLIC_KEY,
+        family_name=TRANSACTION_REQUEST_ACCOUNT_HANDLER_PARAMS.get('family_name'),
+        family_version=TRANSACTION_REQUEST_ACCOUNT_HANDLER_PARAMS.get('family_version'),
+        inputs=INPUTS,
+        outputs=OUTPUTS,
+        dependencies=[],
+        payload_sha512=hash512(data=serialized_transaction_payload),
+        batcher_public_key=RANDOM_NODE_PUBLIC_KEY,
+        nonce=time.time().hex().encode(),
+    )
+
+    serialized_header = transaction_header.SerializeToString()
+
+    transaction_request = TpProcessRequest(
+        header=transaction_header,
+        payload=serialized_transaction_payload,
+        signature=create_signer(private_key=ACCOUNT_FROM_PRIVATE_KEY).sign(serialized_header),
+    )
+
+    mock_context = create_context(account_from_balance=ACCOUNT_FROM_BALANCE, account_to_balance=ACCOUNT_TO_BALANCE)
+
+    AccountHandler().apply(transaction=transaction_request, context=mock_context)
+
+    event, = mock_context._events
+
+    assert Events.ACCOUNT_TRANSFER.value == event._event_type
+    assert (EVENT_ADDRESS_ATTRIBUTE, ACCOUNT_ADDRESS_FROM) in event._attributes
+    assert (EVENT_ADDRESS_ATTRIBUTE, ACCOUNT_ADDRESS_TO) in event._attributes
+
+
 def test_account_transfer_from_address_zero_amount():
     """
     Case: transfer zero tokens from address to address.
@@ -0,0 +1,99 @@
+"""
+Provide tests for signature verification results cache.
+"""
+from remme.tp.pub_key import PubKeyHandler, VERIFICATION_CACHE
+from remme.tp.verification import VerificationCache
+from testing.utils.client import generate_rsa_signature
+
+from .base import (
+    CERTIFICATE_PRIVATE_KEY,
+    generate_rsa_payload,
+)
+
+
+class CountingVerifier:
+    """
+    Verifier that counts its calls.
+    """
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def test_verification_cache_hit():
+    """
+    Case: verify the same input twice.
+    Expect: verifier is called once, the second lookup is a cache hit.
+    """
+    cache = VerificationCache()
+    verifier = CountingVerifier(True)
+
+    assert cache.verify('alg', b'key', b'message', b'signature', verifier)
+    assert cache.verify('alg', b'key', b'message', b'signature', verifier)
+
+    assert 1 == verifier.calls
+    assert 1 == cache.hits
+    assert 1 == cache.misses
+    assert 0.5 == cache.hit_rate
+
+
+def test_verification_cache_caches_invalid_result():
+    """
+    Case: verify the same invalid input twice and then input with another signature.
+    Expect: negative result is cached and another signature is verified separately.
+    """
+    cache = VerificationCache()
+    verifier = CountingVerifier(False)
+
+    assert not cache.verify('alg', b'key', b'message', b'signature', verifier)
+    assert not cache.verify('alg', b'key', b'message', b'signature', verifier)
+    assert not cache.verify('alg', b'key', b'message', b'another-signature', verifier)
+
+    assert 2 == verifier.calls
+
+
+def test_verification_cache_is_bounded():
+    """
+    Case: verify more inputs than the cache size.
+    Expect: the least recently used result is evicted.
+    """
+    cache = VerificationCache(maxsize=2)
+    verifier = CountingVerifier(True)
+
+    cache.verify('alg', b'key', b'message-1', b'signature', verifier)
+    cache.verify('alg', b'key', b'message-2', b'signature', verifier)
+    cache.verify('alg', b'key', b'message-1', b'signature', verifier)
+    cache.verify('alg', b'key', b'message-3', b'signature', verifier)
+
+    assert 2 == len(cache)
+
+    cache.verify('alg', b'key', b'message-2', b'signature', verifier)
+
+    assert 4 == verifier.calls
+
+
+def test_public_key_processor_verification_is_cached():
+    """
+    Case: verify the same RSA public key payload signature with two processors.
+    Expect: the second verification is a cache hit.
+    """
+    entity_hash = b'entity-hash-to-verify-with-cache'
+    payload = generate_rsa_payload(
+        entity_hash=entity_hash,
+        entity_hash_signature=generate_rsa_signature(entity_hash, CERTIFICATE_PRIVATE_KEY),
+    )
+
+    first_processor = PubKeyHandler._get_public_key_processor(transaction_payload=payload)
+    second_processor = PubKeyHandler._get_public_key_processor(transaction_payload=payload)
+
+    assert first_processor.verify()
+
+    hits = VERIFICATION_CACHE.hits
+
+    assert second_processor.verify()
+    assert hits + 1 == VERIFICATION_CACHE.hits
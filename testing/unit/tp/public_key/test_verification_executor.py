@@ -0,0 +1,134 @@
+"""
+Provide tests for signature verification executors.
+"""
+import multiprocessing
+
+import pytest
+from sawtooth_sdk.processor.exceptions import InvalidTransaction
+
+from remme.shared.supervisor import ProcessSupervisor, WorkerProcess
+from remme.tp.pub_key import (
+    PubKeyHandler,
+    _load_rsa_public_key,
+    verify_ed25519_signature,
+    verify_rsa_signature,
+)
+from remme.tp.verification import (
+    INLINE_EXECUTOR,
+    PROCESS_EXECUTOR,
+    THREAD_EXECUTOR,
+    VerificationExecutor,
+)
+from testing.utils.client import generate_ed25519_signature
+
+from .base import (
+    ED25519_PRIVATE_KEY,
+    ED25519_PUBLIC_KEY,
+    generate_ed25519_payload,
+    generate_rsa_payload,
+)
+
+
+@pytest.mark.parametrize('kind', [INLINE_EXECUTOR, THREAD_EXECUTOR, PROCESS_EXECUTOR])
+def test_verification_executor(kind):
+    """
+    Case: verify valid and invalid Ed25519 signatures with an executor of each kind.
+    Expect: verification results are returned by futures.
+    """
+    executor = VerificationExecutor(kind, max_workers=1)
+
+    message = b'entity-hash'
+    signature = generate_ed25519_signature(message, ED25519_PRIVATE_KEY)
+    hashing_algorithm = generate_ed25519_payload().hashing_algorithm
+
+    try:
+        valid = executor.submit(
+            verify_ed25519_signature, ED25519_PUBLIC_KEY, hashing_algorithm, message, signature,
+        )
+        invalid = executor.submit(
+            verify_ed25519_signature, ED25519_PUBLIC_KEY, hashing_algorithm, b'another', signature,
+        )
+
+        assert valid.result()
+        assert not invalid.result()
+    finally:
+        executor.shutdown()
+
+
+def _verify_in_worker(results):
+    executor = VerificationExecutor(PROCESS_EXECUTOR, max_workers=1)
+
+    message = b'entity-hash'
+    signature = generate_ed25519_signature(message, ED25519_PRIVATE_KEY)
+    hashing_algorithm = generate_ed25519_payload().hashing_algorithm
+
+    try:
+        results.put(executor.submit(
+            verify_ed25519_signature, ED25519_PUBLIC_KEY, hashing_algorithm, message, signature,
+        ).result())
+    except Exception as e:
+        results.put(repr(e))
+    finally:
+        executor.shutdown()
+
+
+def test_process_verification_executor_in_supervised_worker():
+    """
+    Case: verify Ed25519 signature with the process executor inside a worker of the supervisor.
+    Expect: the worker starts its verification pool and gets the verification result.
+    """
+    results = multiprocessing.Queue()
+    supervisor = ProcessSupervisor([WorkerProcess('verification', _verify_in_worker, (results,))])
+
+    supervisor.start()
+    try:
+        assert results.get(timeout=30) is True
+    finally:
+        supervisor.stop()
+
+
+def test_verification_executor_propagates_errors():
+    """
+    Case: verify RSA signature with public key not in DER format.
+    Expect: invalid transaction error is raised from the future result.
+    """
+    executor = VerificationExecutor(THREAD_EXECUTOR, max_workers=1)
+
+    payload = generate_rsa_payload()
+
+    try:
+        future = executor.submit(
+            verify_rsa_signature, b'not-a-key', payload.rsa.padding, payload.hashing_algorithm,
+            payload.entity_hash, payload.entity_hash_signature,
+        )
+
+        with pytest.raises(InvalidTransaction):
+            future.result()
+    finally:
+        executor.shutdown()
+
+
+def test_verification_executor_unknown_kind():
+    """
+    Case: create verification executor of unknown kind.
+    Expect: ValueError is raised.
+    """
+    with pytest.raises(ValueError):
+        VerificationExecutor('gpu')
+
+
+def test_public_key_deserialized_once():
+    """
+    Case: verify signatures of two payloads with the same RSA public key.
+    Expect: the public key deserialized on the first verification is reused.
+    """
+    first_payload = generate_rsa_payload(entity_hash=b'first-entity-hash')
+    second_payload = generate_rsa_payload(entity_hash=b'second-entity-hash')
+
+    PubKeyHandler._get_public_key_processor(transaction_payload=first_payload).verify()
+
+    hits = _load_rsa_public_key.cache_info().hits
+
+    PubKeyHandler._get_public_key_processor(transaction_payload=second_payload).verify()
+
+    assert hits + 1 == _load_rsa_public_key.cache_info().hits
@@ -0,0 +1,157 @@
+"""
+Provide tests for cache context service implementation.
+"""
+from remme.clients.block_info import BLOCK_INFO_NAMESPACE, BlockInfoClient, CONFIG_ADDRESS
+from remme.protos.account_pb2 import Account
+from remme.protos.block_info_pb2 import BlockInfo, BlockInfoConfig
+from remme.tp.atomic_swap import get_latest_block_info_address
+from remme.tp.context import CacheContextService
+from testing.mocks.stub import StubContext
+
+ACCOUNT_ADDRESS = '112007d71fa7e120c60fb392a64fd69de891a60c667d9ea9e5d9d9d617263be6c20202'
+ANOTHER_ACCOUNT_ADDRESS = '1120071db7c02f5731d06df194dc95465e9b277c19e905ce642664a9a0d504a3909e31'
+
+BLOCK_INFO_ADDRESS = BlockInfoClient.create_block_address(1000)
+
+INPUTS = OUTPUTS = [
+    ACCOUNT_ADDRESS,
+    ANOTHER_ACCOUNT_ADDRESS,
+]
+
+
+class CountingStubContext(StubContext):
+    """
+    Stub context that counts get state requests.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.get_state_calls = 0
+
+    def get_state(self, addresses, timeout=None):
+        self.get_state_calls += 1
+        return super().get_state(addresses, timeout)
+
+
+def create_context():
+    """
+    Create stub context with an account with balance.
+    """
+    account = Account()
+    account.balance = 1000
+
+    initial_state = {
+        ACCOUNT_ADDRESS: account.SerializeToString(),
+    }
+
+    return CountingStubContext(inputs=INPUTS, outputs=OUTPUTS, initial_state=initial_state)
+
+
+def test_get_cached_data_parses_once():
+    """
+    Case: get the same address data with the same protobuf class twice.
+    Expect: the same parsed message is returned and state is requested once.
+    """
+    context = create_context()
+    context_service = CacheContextService(context=context)
+
+    first_account, = context_service.get_cached_data([(ACCOUNT_ADDRESS, Account)])
+    second_account, = context_service.get_cached_data([(ACCOUNT_ADDRESS, Account)])
+
+    assert 1000 == first_account.balance
+    assert first_account is second_account
+    assert 1 == context.get_state_calls
+
+
+def test_get_cached_data_read_your_writes():
+    """
+    Case: write a message to the overlay for an address without data and read it back.
+    Expect: written message is returned instead of an empty data.
+    """
+    context = create_context()
+    context_service = CacheContextService(context=context)
+
+    account = Account()
+    account.balance = 10
+
+    context_service.set_cached_data({
+        ANOTHER_ACCOUNT_ADDRESS: account,
+    })
+
+    cached_account, = context_service.get_cached_data([(ANOTHER_ACCOUNT_ADDRESS, Account)])
+
+    assert account is cached_account
+    assert 0 == context.get_state_calls
+
+
+def test_flush_writes_only_dirty_entries():
+    """
+    Case: read two addresses, write one of them to the overlay and flush.
+    Expect: only written address is serialized and stored to the state.
+    """
+    context = create_context()
+    context_service = CacheContextService(context=context)
+
+    account, another_account = context_service.get_cached_data([
+        (ACCOUNT_ADDRESS, Account),
+        (ANOTHER_ACCOUNT_ADDRESS, Account),
+    ])
+
+    assert another_account is None
+
+    account.balance = 500
+    context_service.set_cached_data({
+        ACCOUNT_ADDRESS: account,
+    })
+
+    assert [ACCOUNT_ADDRESS] == context_service.flush()
+    assert account.SerializeToString() == context.state[ACCOUNT_ADDRESS]
+    assert ANOTHER_ACCOUNT_ADDRESS not in context.state
+    assert [] == context_service.flush()
+
+
+def test_preload_state_with_dependencies():
+    """
+    Case: preload transaction inputs with block info namespace along with block info config
+          and the latest block derived from it.
+    Expect: the latest block information is loaded with two state requests and read from the cache.
+    """
+    block_info_config = BlockInfoConfig()
+    block_info_config.latest_block = 1000
+
+    block_info = BlockInfo()
+    block_info.block_num = 1000
+
+    inputs = [ACCOUNT_ADDRESS, CONFIG_ADDRESS, BLOCK_INFO_NAMESPACE]
+
+    # stub context does not authorize namespaces, so list the block address explicitly
+    context = CountingStubContext(inputs=inputs + [BLOCK_INFO_ADDRESS], outputs=[], initial_state={
+        CONFIG_ADDRESS: block_info_config.SerializeToString(),
+        BLOCK_INFO_ADDRESS: block_info.SerializeToString(),
+    })
+    context_service = CacheContextService(context=context)
+
+    context_service.preload_state(inputs, (
+        (CONFIG_ADDRESS,),
+        (get_latest_block_info_address,),
+    ))
+
+    cached_block_info, = context_service.get_cached_data([(BLOCK_INFO_ADDRESS, BlockInfo)])
+
+    assert 1000 == cached_block_info.block_num
+    assert 2 == context.get_state_calls
+
+
+def test_preload_state_skips_unauthorized_dependencies():
+    """
+    Case: preload dependency address that isn't covered by transaction inputs.
+    Expect: only transaction inputs are requested from the state.
+    """
+    context = create_context()
+    context_service = CacheContextService(context=context)
+
+    context_service.preload_state(INPUTS, (
+        (CONFIG_ADDRESS,),
+    ))
+
+    assert 1 == context.get_state_calls
@@ -0,0 +1,107 @@
+"""
+Provide tests for compiled protobuf forms validation.
+"""
+import random
+
+import pytest
+from google.protobuf.descriptor import FieldDescriptor
+
+from remme.protos.atomic_swap_pb2 import AtomicSwapInitPayload
+from remme.shared.forms import AtomicSwapForm
+from remme.tp.account import AccountHandler
+from remme.tp.atomic_swap import AtomicSwapHandler
+from remme.tp.basic import PB_CLASS, VALIDATOR
+from remme.tp.pub_key import PubKeyHandler
+
+STRING_VALUES = ['', ' ', '0' * 70, '1' * 64, 'a' * 64, 'f' * 70, 'f' * 128, 'not-hex', '-1']
+BYTES_VALUES = [b'', b'\x00', b'\xd7m', b'key', b'\xff' * 70]
+INTEGER_VALUES = [0, 1, 10, 2 ** 31 - 1]
+
+FORMS = [
+    (processor[PB_CLASS], processor[VALIDATOR])
+    for handler in (AccountHandler(), PubKeyHandler(), AtomicSwapHandler())
+    for processor in handler.get_state_processor().values()
+]
+
+
+def fill_randomly(pb, rnd, depth=0):
+    """
+    Set random values to message fields, leave some of them unset.
+    """
+    oneofs = {}
+    for field in pb.DESCRIPTOR.fields:
+        if field.containing_oneof is not None:
+            oneofs.setdefault(field.containing_oneof.name, []).append(field)
+            continue
+        set_randomly(pb, field, rnd, depth)
+
+    for fields in oneofs.values():
+        field = rnd.choice(fields + [None])
+        if field is not None:
+            set_randomly(pb, field, rnd, depth)
+
+
+def set_randomly(pb, field, rnd, depth):
+    if field.label == FieldDescriptor.LABEL_REPEATED or rnd.random() < 0.2:
+        return
+
+    if field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE:
+        if depth < 3:
+            fill_randomly(getattr(pb, field.name), rnd, depth + 1)
+            getattr(pb, field.name).SetInParent()
+    elif field.cpp_type == FieldDescriptor.CPPTYPE_ENUM:
+        values = [value.number for value in field.enum_type.values]
+        setattr(pb, field.name, rnd.choice(values + [99]))
+    elif field.type == FieldDescriptor.TYPE_BYTES:
+        setattr(pb, field.name, rnd.choice(BYTES_VALUES))
+    elif field.cpp_type == FieldDescriptor.CPPTYPE_STRING:
+        setattr(pb, field.name, rnd.choice(STRING_VALUES))
+    elif field.cpp_type == FieldDescriptor.CPPTYPE_BOOL:
+        setattr(pb, field.name, rnd.choice([True, False]))
+    else:
+        setattr(pb, field.name, rnd.choice(INTEGER_VALUES))
+
+
+def get_outcome(validate):
+    """
+    Get validation result or type of the raised error.
+    """
+    try:
+        return validate()
+    except Exception as error:
+        return type(error)
+
+
+def validate_with_form(form_class, pb):
+    form = form_class.load_proto(pb)
+    return form.validate(), form.errors
+
+
+@pytest.mark.parametrize('pb_class, form_class', FORMS)
+def test_validate_proto_as_form(pb_class, form_class):
+    """
+    Case: validate randomly filled protobuf messages with compiled form and with wtforms form.
+    Expect: validation results and errors, or raised errors types, are the same.
+    """
+    rnd = random.Random(pb_class.__name__)
+
+    for _ in range(200):
+        pb = pb_class()
+        fill_randomly(pb, rnd)
+
+        expected = get_outcome(lambda: validate_with_form(form_class, pb))
+
+        assert expected == get_outcome(lambda: form_class.validate_proto(pb)), pb
+
+
+def test_validate_proto_wrong_fields():
+    """
+    Case: validate protobuf message having fields the form doesn't declare.
+    Expect: validation fails with the same wrong params keys error as of wtforms form.
+    """
+    pb = AtomicSwapInitPayload(swap_id='a' * 64, amount=10)
+
+    is_valid, errors = AtomicSwapForm.validate_proto(pb)
+
+    assert not is_valid
+    assert validate_with_form(AtomicSwapForm, pb) == (is_valid, errors)
@@ -0,0 +1,49 @@
+"""
+Provide tests for transaction processor workers assignment.
+"""
+import pytest
+
+from remme.tp.workers import get_workers_families, parse_family_workers
+
+FAMILIES = ['account', 'pub_key', 'AtomicSwap']
+
+
+def test_parse_family_workers():
+    """
+    Case: parse per-family processes assignment with repeated family.
+    Expect: processes count of repeated family is summed up.
+    """
+    assert {'pub_key': 3, 'account': 1} == parse_family_workers(
+        ['pub_key=2', 'account=1', 'pub_key=1'], FAMILIES,
+    )
+
+
+@pytest.mark.parametrize('value', ['pub_key', 'unknown=1', 'pub_key=two', 'pub_key=0'])
+def test_parse_family_workers_invalid(value):
+    """
+    Case: parse malformed, unknown family or non-positive processes assignment.
+    Expect: ValueError is raised.
+    """
+    with pytest.raises(ValueError):
+        parse_family_workers([value], FAMILIES)
+
+
+def test_get_workers_families():
+    """
+    Case: get families of shared workers along with dedicated per-family ones.
+    Expect: shared workers serve all families and dedicated workers serve one family each.
+    """
+    assert [
+        ('account', 'AtomicSwap'),
+        ('account', 'AtomicSwap'),
+        ('pub_key',),
+        ('pub_key',),
+    ] == get_workers_families(2, ['account', 'AtomicSwap'], {'pub_key': 2})
+
+
+def test_get_workers_families_dedicated_only():
+    """
+    Case: get families without shared workers.
+    Expect: only dedicated workers are returned.
+    """
+    assert [('pub_key',)] == get_workers_families(0, FAMILIES, {'pub_key': 1})
@@ -15,62 +15,140 @@
 # limitations under the License.
 # ------------------------------------------------------------------------
 
-"""Statistics for metrics collected in InfluxDB.
+"""Statistics for metrics collected to local files.
 
-Usage:
-    influxdb_stats.py <influx_host> <port> <user> <password> <db> <node> <metric>
+Reads files written by the metrics file sink (InfluxDB line protocol, see
+`file_path` of the `[remme.metrics]` configuration) and prints percentiles
+of the field for every metric, comparing nodes with each other. Files of
+several nodes may be given at once, points are grouped by their hostname.
 
-Options:
-    influx_host    InfluxDB host that we should work with.
-    port           InfluxDB port.
-    user           InfluxDB user.
-    password       InfluxDB password.
-    db             The exact database that stores the metrics.
-    node           Node that was sending the metrics.
-    metric         The exact metric that we are collecting.
+Optionally saves CDF (with a curve per node) and histogram of every metric to
+PNG files, which requires matplotlib.
+
+Usage:
+    execution_time_stats.py <path>... [--metric=<pattern>] [--field=<name>] [--plot=<dir>]
 
 Options:
-    -h --help    Show this screen.
-    --version    Show version.
+    -h --help            Show this screen.
+    <path>               Metrics file or directory with metrics files, rotated
+                         files included.
+    --metric=<pattern>   Shell-style pattern of metrics to report, "remme."
+                         prefix is optional [default: *].
+    --field=<name>       Field of the points to report [default: execution_time].
+    --plot=<dir>         Directory to save plots to.
 """
-from datetime import datetime
+import fnmatch
+import math
+import os
+import sys
+from collections import defaultdict
+
 from docopt import docopt
-from influxdb import DataFrameClient
-import seaborn
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from remme.shared.metrics_file import read_points  # noqa: E402
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def get_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                file_path = os.path.join(path, name)
+                if os.path.isfile(file_path):
+                    yield file_path
+        else:
+            yield path
+
+
+def load_values(paths, pattern, field):
+    """Get values of the field by metric and node.
+
+    :return: dict of metric to dict of node to sorted list of values.
+    """
+    if not pattern.startswith('remme.'):
+        pattern = f'remme.{pattern}'
+
+    values = defaultdict(lambda: defaultdict(list))
+    for measurement, tags, fields, _ in read_points(get_files(paths)):
+        if field in fields and fnmatch.fnmatchcase(measurement, pattern):
+            values[measurement][tags.get('hostname', '')].append(fields[field])
+
+    for nodes in values.values():
+        for node_values in nodes.values():
+            node_values.sort()
+    return values
+
+
+def get_percentile(sorted_values, percentile):
+    rank = max(math.ceil(percentile / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def print_stats(metric, nodes):
+    print(metric)
+    header = f'    {"node":<24}{"count":>9}{"mean":>12}'
+    header += ''.join(f'{f"p{percentile:g}":>12}' for percentile in PERCENTILES)
+    header += f'{"max":>12}{"p50 vs best":>13}{"p99 vs best":>13}'
+    print(header)
+
+    best_p50 = min(get_percentile(values, 50) for values in nodes.values())
+    best_p99 = min(get_percentile(values, 99) for values in nodes.values())
+
+    for node, values in sorted(nodes.items()):
+        p50 = get_percentile(values, 50)
+        p99 = get_percentile(values, 99)
+        row = f'    {node:<24}{len(values):>9}{sum(values) / len(values):>12.6f}'
+        row += ''.join(f'{get_percentile(values, percentile):>12.6f}' for percentile in PERCENTILES)
+        row += f'{values[-1]:>12.6f}'
+        row += f'{p50 / best_p50 if best_p50 else 1:>12.2f}x{p99 / best_p99 if best_p99 else 1:>12.2f}x'
+        print(row)
+    print()
+
+
+def save_plots(metric, nodes, field, directory):
+    try:
+        import matplotlib
+    except ImportError:
+        sys.exit('Plots require matplotlib to be installed')
+    matplotlib.use('Agg')
+    from matplotlib import pyplot
+
+    os.makedirs(directory, exist_ok=True)
+
+    figure, axes = pyplot.subplots()
+    for node, values in sorted(nodes.items()):
+        axes.step(values, [(index + 1) / len(values) for index in range(len(values))],
+                  where='post', label=node)
+    axes.set_xlabel(field)
+    axes.set_ylabel('Fraction of points')
+    axes.set_title(f'CDF of {metric}')
+    axes.legend()
+    figure.savefig(os.path.join(directory, f'{metric} CDF.png'))
+    pyplot.close(figure)
+
+    figure, axes = pyplot.subplots()
+    axes.hist([values for _, values in sorted(nodes.items())], bins=50,
+              label=sorted(nodes), histtype='step')
+    axes.set_xlabel(field)
+    axes.set_ylabel('Points')
+    axes.set_title(f'Histogram of {metric}')
+    axes.legend()
+    figure.savefig(os.path.join(directory, f'{metric} histogram.png'))
+    pyplot.close(figure)
+
 
 if __name__ == '__main__':
-    args = docopt(__doc__, version='0.1')
-    args = {k[1:-1]: v for k, v in args.items()}
-    print(args)
-    client = DataFrameClient(
-        args['influx_host'],
-        args['port'],
-        args['user'],
-        args['password'],
-        args['db']
-    )
-    node = args['node']
-    metric = args['metric']
-    res = client.query(f'select "execution_time" from "{metric}","{node}"')
-    res = res[metric]
-    print('Median metric value:', res.median(), 'seconds')
-    print('Mean metric value:', res.mean(), 'seconds')
-    time = datetime.now().strftime('%Y-%m-%d %H:%M:%SZ')
-    plot_title = f'CDF of {metric} on {node}'
-    seaborn \
-        .distplot(
-            res,
-            axlabel='Execution time (seconds)',
-            hist=False,
-            kde_kws=dict(cumulative=True)
-        ) \
-        .get_figure() \
-        .savefig(f'{time} {plot_title}.png')
-    plot_title = f'Histogram of {metric} on {node}'
-    seaborn \
-        .distplot(
-            res,
-            axlabel='Execution time (seconds)'
-        ) \
-        .get_figure() \
-        .savefig(f'{time} {plot_title}.png')
+    arguments = docopt(__doc__)
+    field = arguments['--field']
+
+    metrics = load_values(arguments['<path>'], arguments['--metric'], field)
+    if not metrics:
+        sys.exit('No points found')
+
+    for metric, nodes in sorted(metrics.items()):
+        print_stats(metric, nodes)
+        if arguments['--plot']:
+            save_plots(metric, nodes, field, arguments['--plot'])
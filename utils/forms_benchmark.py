@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Benchmark of transaction payloads validation.
+
+Compares per-transaction cost of validation with wtforms forms
+(`load_proto(pb).validate()`) and with compiled validation plans
+(`validate_proto(pb)`) for valid and invalid payloads.
+
+Usage:
+    forms_benchmark.py [--repeat=<n>]
+
+Options:
+    -h --help       Show this screen.
+    --repeat=<n>    Number of validations of every payload [default: 5000].
+"""
+import os
+import sys
+import timeit
+
+from docopt import docopt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from remme.protos.account_pb2 import TransferPayload  # noqa: E402
+from remme.protos.atomic_swap_pb2 import AtomicSwapClosePayload, AtomicSwapInitPayload  # noqa: E402
+from remme.protos.pub_key_pb2 import NewPubKeyPayload, NewPubKeyStoreAndPayPayload  # noqa: E402
+from remme.shared.forms import (  # noqa: E402
+    AtomicSwapClosePayloadForm,
+    AtomicSwapInitPayloadForm,
+    NewPubKeyStoreAndPayPayloadForm,
+    NewPublicKeyPayloadForm,
+    TransferPayloadForm,
+)
+
+ADDRESS = '112007' + 'db8a00c010402e2e3a7d03491323e761e0ea612481c518605648ceeb5ed454f7'
+SWAP_ID = 'a' * 64
+
+PUB_KEY_PAYLOAD = NewPubKeyPayload(
+    entity_hash=b'e' * 128,
+    entity_hash_signature=b's' * 256,
+    valid_from=1546300800,
+    valid_to=1577836800,
+    hashing_algorithm=NewPubKeyPayload.HashingAlgorithm.Value('SHA512'),
+    rsa=NewPubKeyPayload.RSAConfiguration(
+        padding=NewPubKeyPayload.RSAConfiguration.Padding.Value('PSS'),
+        key=b'k' * 294,
+    ),
+)
+
+PAYLOADS = [
+    ('transfer', TransferPayloadForm, TransferPayload(address_to=ADDRESS, value=100)),
+    ('transfer, invalid', TransferPayloadForm, TransferPayload(address_to='address')),
+    ('pub_key store', NewPublicKeyPayloadForm, PUB_KEY_PAYLOAD),
+    ('pub_key store, invalid', NewPublicKeyPayloadForm, NewPubKeyPayload(valid_to=1)),
+    ('pub_key store and pay', NewPubKeyStoreAndPayPayloadForm, NewPubKeyStoreAndPayPayload(
+        pub_key_payload=PUB_KEY_PAYLOAD, owner_public_key=b'o' * 33, signature_by_owner=b's' * 64,
+    )),
+    ('swap init', AtomicSwapInitPayloadForm, AtomicSwapInitPayload(
+        receiver_address=ADDRESS, sender_address_non_local='0xabc', amount=10,
+        swap_id=SWAP_ID, created_at=1546300800,
+    )),
+    ('swap close', AtomicSwapClosePayloadForm, AtomicSwapClosePayload(swap_id=SWAP_ID, secret_key='key')),
+]
+
+
+def validate_with_form(form_class, pb):
+    form = form_class.load_proto(pb)
+    return form.validate(), form.errors
+
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__)
+    repeat = int(arguments['--repeat'])
+
+    print(f'{"payload":<26}{"wtforms, us":>14}{"compiled, us":>14}{"speedup":>10}')
+
+    for name, form_class, pb in PAYLOADS:
+        if validate_with_form(form_class, pb) != form_class.validate_proto(pb):
+            raise RuntimeError(f'Different validation results for "{name}"')
+
+        before = timeit.timeit(lambda: validate_with_form(form_class, pb), number=repeat)
+        after = timeit.timeit(lambda: form_class.validate_proto(pb), number=repeat)
+
+        print(f'{name:<26}{before / repeat * 1e6:>14.1f}{after / repeat * 1e6:>14.1f}'
+              f'{before / after:>9.1f}x')
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Benchmark of the RPC API startup.
+
+Measures in fresh processes the time to import the RPC API, create
+`JsonRpc` and add methods of the modules, as it's done before the server
+starts. With `--load` methods are also imported at once, as they were
+before methods were loaded lazily.
+
+Usage:
+    startup_benchmark.py [--modules=<modules>] [--runs=<n>] [--load]
+
+Options:
+    -h --help               Show this screen.
+    --modules=<modules>     Comma separated modules, "*" for all [default: *].
+    --runs=<n>              Number of processes to start [default: 5].
+    --load                  Import modules of the methods at startup.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from docopt import docopt
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+STARTUP = '''
+import json
+import sys
+import time
+
+started = time.perf_counter()
+
+from remme.rpc_api._base import JsonRpc
+
+imported = time.perf_counter()
+
+rpc = JsonRpc(zmq_url='tcp://127.0.0.1:4004')
+rpc.load_from_modules(sys.argv[1])
+if sys.argv[2] == 'load':
+    rpc._load_methods()
+
+print(json.dumps({
+    'import': imported - started,
+    'total': time.perf_counter() - started,
+}))
+'''
+
+
+def run(modules, load):
+    output = subprocess.check_output(
+        [sys.executable, '-c', STARTUP, modules, 'load' if load else 'lazy'],
+        cwd=ROOT,
+    )
+    return json.loads(output.decode().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__)
+
+    modules = arguments['--modules']
+    load = arguments['--load']
+    runs = [run(modules, load) for _ in range(int(arguments['--runs']))]
+
+    print(f'Modules: {modules}, methods are loaded {"at once" if load else "lazily"}')
+    for name in ('import', 'total'):
+        times = [measurement[name] for measurement in runs]
+        print(f'{name:>8}: min {min(times) * 1000:8.1f} ms, '
+              f'median {statistics.median(times) * 1000:8.1f} ms')
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Report of the slowest traces exported by REMME components.
+
+Reads span files of the RPC API and transaction processors (see the
+`[remme.tracing]` configuration), joins spans of every trace and prints the
+slowest traces as timelines, followed by the share of time spent in every
+stage over these traces, so tail latency can be attributed to a stage.
+
+Time between spans of different processes, e.g. between submission of a
+batch and execution of its transaction, is spent in the validator. Clocks of
+the processes are compared, so they must be synchronized.
+
+Usage:
+    trace_report.py <path>... [--name=<pattern>] [--slowest=<n>] [--trace=<id>]
+
+Options:
+    -h --help           Show this screen.
+    <path>              Spans file or directory with spans files.
+    --name=<pattern>    Shell-style pattern of root span names of traces to
+                        report [default: *].
+    --slowest=<n>       Number of the slowest traces to report [default: 10].
+    --trace=<id>        Report the single trace.
+"""
+import fnmatch
+import json
+import os
+import sys
+from collections import defaultdict
+
+from docopt import docopt
+
+
+def get_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                file_path = os.path.join(path, name)
+                if os.path.isfile(file_path):
+                    yield file_path
+        else:
+            yield path
+
+
+def load_traces(paths):
+    traces = defaultdict(list)
+    for path in get_files(paths):
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    span = json.loads(line)
+                except ValueError:
+                    continue
+                traces[span['trace_id']].append(span)
+    return traces
+
+
+def get_bounds(spans):
+    start = min(span['start'] for span in spans)
+    end = max(span['start'] + span['duration'] for span in spans)
+    return start, end
+
+
+def print_trace(trace_id, spans):
+    start, end = get_bounds(spans)
+    print(f'trace {trace_id}: {(end - start) * 1000:.3f} ms')
+
+    children = defaultdict(list)
+    ids = {span['span_id'] for span in spans}
+    roots = []
+    for span in sorted(spans, key=lambda span: span['start']):
+        if span['parent_id'] in ids:
+            children[span['parent_id']].append(span)
+        else:
+            roots.append(span)
+
+    def print_span(span, depth):
+        offset = (span['start'] - start) * 1000
+        process = f'{span["hostname"]}:{span["pid"]}'
+        attributes = ' '.join(f'{key}={value}' for key, value in sorted(span['attributes'].items()))
+        print(f'    {offset:>10.3f} ms {span["duration"] * 1000:>10.3f} ms  '
+              f'{"  " * depth}{span["name"]} [{process}] {attributes}'.rstrip())
+        for child in children[span['span_id']]:
+            print_span(child, depth + 1)
+
+    for root in roots:
+        print_span(root, 0)
+    print()
+
+
+def print_stages(traces):
+    """Print share of the time of traces spent in every stage.
+
+    Own time of a span is its duration without durations of its children,
+    time not covered by any span is spent outside of traced processes.
+    """
+    own_time = defaultdict(float)
+    total = 0.0
+    for spans in traces.values():
+        start, end = get_bounds(spans)
+        total += end - start
+
+        ids = {span['span_id'] for span in spans}
+        children_time = defaultdict(float)
+        for span in spans:
+            children_time[span['parent_id']] += span['duration']
+        covered = 0.0
+        for span in spans:
+            own_time[span['name']] += span['duration'] - children_time[span['span_id']]
+            if span['parent_id'] not in ids:
+                covered += span['duration']
+        own_time['(outside of traced processes)'] += max(end - start - covered, 0)
+
+    print(f'{"stage":<48}{"total, ms":>12}{"share":>9}')
+    for name, value in sorted(own_time.items(), key=lambda item: -item[1]):
+        print(f'{name:<48}{value * 1000:>12.3f}{value / total if total else 0:>9.1%}')
+
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__)
+    traces = load_traces(arguments['<path>'])
+
+    if arguments['--trace']:
+        trace_id = arguments['--trace']
+        if trace_id not in traces:
+            sys.exit(f'Trace {trace_id} not found')
+        print_trace(trace_id, traces[trace_id])
+        sys.exit()
+
+    pattern = arguments['--name']
+    traces = {
+        trace_id: spans for trace_id, spans in traces.items()
+        if any(span['parent_id'] is None and fnmatch.fnmatchcase(span['name'], pattern)
+               for span in spans)
+    }
+    if not traces:
+        sys.exit('No traces found')
+
+    def get_duration(item):
+        start, end = get_bounds(item[1])
+        return end - start
+
+    slowest = sorted(traces.items(), key=get_duration, reverse=True)[:int(arguments['--slowest'])]
+    print(f'{len(slowest)} slowest of {len(traces)} traces\n')
+    for trace_id, spans in slowest:
+        print_trace(trace_id, spans)
+    print_stages(dict(slowest))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+# Copyright 2018 REMME
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------
+
+"""Benchmark of public key signatures verification executors.
+
+Verifies a mix of RSA (PKCS1v15 and PSS), ECDSA and Ed25519 public key
+payloads, submitted concurrently by several threads the same way the
+transaction processor does, with every executor kind. Each executor is
+measured with cold and warm deserialized public keys cache, the results
+cache is bypassed.
+
+Usage:
+    verification_benchmark.py [--payloads=<n>] [--keys=<n>] [--threads=<n>] [--workers=<n>]
+
+Options:
+    -h --help          Show this screen.
+    --payloads=<n>     Number of payloads to verify [default: 2000].
+    --keys=<n>         Number of distinct keys per key type [default: 4].
+    --threads=<n>      Number of threads submitting verifications [default: 4].
+    --workers=<n>      Number of executor pool workers [default: 4].
+"""
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from docopt import docopt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from remme.protos.pub_key_pb2 import NewPubKeyPayload  # noqa: E402
+from remme.tp import pub_key  # noqa: E402
+from remme.tp.verification import (  # noqa: E402
+    VERIFICATION_EXECUTORS,
+    VerificationExecutor,
+)
+from testing.utils.client import (  # noqa: E402
+    generate_ecdsa_keys,
+    generate_ecdsa_signature,
+    generate_ed25519_keys,
+    generate_ed25519_signature,
+    generate_rsa_keys,
+    generate_rsa_signature,
+)
+
+SHA512 = NewPubKeyPayload.HashingAlgorithm.Value('SHA512')
+SHA256 = NewPubKeyPayload.HashingAlgorithm.Value('SHA256')
+PKCS1v15 = NewPubKeyPayload.RSAConfiguration.Padding.Value('PKCS1v15')
+PSS = NewPubKeyPayload.RSAConfiguration.Padding.Value('PSS')
+
+
+def rsa_pss_signature(data, private_key):
+    return private_key.sign(data, padding.PSS(
+        mgf=padding.MGF1(hashes.SHA512()), salt_length=padding.PSS.MAX_LENGTH,
+    ), hashes.SHA512())
+
+
+def generate_processors(payloads, keys):
+    signers = []
+    for _ in range(keys):
+        rsa_private_key, rsa_public_key = generate_rsa_keys()
+        ecdsa_private_key, ecdsa_public_key = generate_ecdsa_keys()
+        ed25519_private_key, ed25519_public_key = generate_ed25519_keys()
+        signers.extend([
+            (pub_key.RSAProcessor, NewPubKeyPayload.RSAConfiguration(padding=PKCS1v15, key=rsa_public_key),
+             SHA512, lambda data, key=rsa_private_key: generate_rsa_signature(data, key)),
+            (pub_key.RSAProcessor, NewPubKeyPayload.RSAConfiguration(padding=PSS, key=rsa_public_key),
+             SHA512, lambda data, key=rsa_private_key: rsa_pss_signature(data, key)),
+            (pub_key.ECDSAProcessor, NewPubKeyPayload.ECDSAConfiguration(key=ecdsa_public_key),
+             SHA256, lambda data, key=ecdsa_private_key: generate_ecdsa_signature(data, key)),
+            (pub_key.Ed25519Processor, NewPubKeyPayload.Ed25519Configuration(key=ed25519_public_key),
+             SHA512, lambda data, key=ed25519_private_key: generate_ed25519_signature(data, key)),
+        ])
+
+    processors = []
+    for index, (processor_cls, config, hashing_algorithm, sign) in \
+            zip(range(payloads), itertools.cycle(signers)):
+        entity_hash = f'entity-hash-{index}'.encode()
+        processors.append(processor_cls(
+            entity_hash, sign(entity_hash), 0, 0, hashing_algorithm, config,
+        ))
+    return processors
+
+
+def clear_public_keys_cache():
+    for loader in (pub_key._load_rsa_public_key, pub_key._load_ecdsa_public_key,
+                   pub_key._load_ed25519_public_key):
+        loader.cache_clear()
+
+
+def run(executor, processors, threads):
+    def verify(processor):
+        function, *args = processor.get_verification_call()
+        return executor.submit(function, *args).result()
+
+    with ThreadPoolExecutor(max_workers=threads) as callers:
+        start = time.perf_counter()
+        results = list(callers.map(verify, processors))
+        elapsed = time.perf_counter() - start
+
+    if not all(results):
+        raise RuntimeError('Some signatures were not verified')
+    return elapsed
+
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__)
+    payloads = int(arguments['--payloads'])
+    threads = int(arguments['--threads'])
+    workers = int(arguments['--workers'])
+
+    processors = generate_processors(payloads, int(arguments['--keys']))
+
+    print(f'{payloads} payloads, {threads} submitting threads, {workers} workers')
+    print(f'{"executor":<10}{"keys cache":<12}{"total, s":>10}{"per sec":>12}')
+
+    for kind in VERIFICATION_EXECUTORS:
+        executor = VerificationExecutor(kind, max_workers=workers)
+        # Start pool workers before measuring
+        run(executor, processors[:workers], threads)
+        try:
+            for keys_cache in ('cold', 'warm'):
+                if keys_cache == 'cold':
+                    clear_public_keys_cache()
+                elapsed = run(executor, processors, threads)
+                print(f'{kind:<10}{keys_cache:<12}{elapsed:>10.3f}{payloads / elapsed:>12.1f}')
+        finally:
+            executor.shutdown()